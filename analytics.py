@@ -0,0 +1,218 @@
+"""Cohort analytics over a columnar NumPy snapshot of the roster
+
+The students table is read once into column arrays: ages as int64, and
+grade, email and phone as dictionary-encoded int codes, so every report is
+a handful of vectorized operations. refresh() re-reads only the students
+listed in the student_changes log since the snapshot was taken.
+
+NumPy is optional; nothing else in the application needs it.
+"""
+import re
+from itertools import islice
+from database import MAX_SQL_PARAMS, chunked
+from migrations import last_change_seq, pruned_through
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+DUPLICATE_FIELDS = ('email', 'phone')
+
+# Reload instead of patching once this share of the rows has changed, and
+# compact once this share of the rows are deleted
+REBUILD_FRACTION = 0.25
+
+MISSING = -1
+
+SNAPSHOT_QUERY = ('SELECT student_id, coalesce(CAST(age AS INTEGER), -1), grade, '
+                  'lower(trim(email)), phone FROM students')
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to its digits so formatting differences still match"""
+    return _NON_DIGITS.sub('', phone) if phone else ''
+
+
+class Codes:
+    """Dictionary encoding of strings as dense int codes; empty values are MISSING"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        if not value:
+            return MISSING
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode_all(self, values):
+        codes = self._codes
+        encoded = [codes.setdefault(value, len(codes)) if value else MISSING for value in values]
+        self.values.extend(islice(codes, len(self.values), None))
+        return np.array(encoded, dtype=np.int64)
+
+
+class RosterSnapshot:
+    """Column arrays of the students table, kept current from the change log"""
+
+    def __init__(self, db):
+        if np is None:
+            raise RuntimeError("Roster analytics need NumPy (pip install numpy)")
+        self.db = db
+        self.loads = 0
+        self.load()
+
+    def load(self):
+        """Read the whole students table into fresh column arrays"""
+        with self.db.reader() as conn:
+            # Read the watermark first: a change that lands in between is
+            # replayed by the next refresh, which is harmless
+            seq = last_change_seq(conn)
+            rows = conn.execute(SNAPSHOT_QUERY).fetchall()
+        self.seq = seq
+        self.grades = Codes()
+        self.emails = Codes()
+        self.phones = Codes()
+        self.ids = []
+        self.position = {}
+        self.age = np.empty(0, dtype=np.int64)
+        self.grade = np.empty(0, dtype=np.int64)
+        self.email = np.empty(0, dtype=np.int64)
+        self.phone = np.empty(0, dtype=np.int64)
+        self.alive = np.empty(0, dtype=bool)
+        self.deleted = 0
+        self._append(rows)
+        self.loads += 1
+
+    def refresh(self):
+        """Apply the rows changed since the last load/refresh; returns how many changed"""
+        with self.db.reader() as conn:
+            seq = last_change_seq(conn)
+            if seq == self.seq:
+                return 0
+            stale = pruned_through(conn) > self.seq
+            ids = [row[0] for row in conn.execute(
+                'SELECT DISTINCT student_id FROM student_changes WHERE seq > ? AND seq <= ?',
+                (self.seq, seq))]
+            rows = None
+            if not stale and len(ids) <= REBUILD_FRACTION * len(self.ids):
+                rows = {}
+                for chunk in chunked(ids, MAX_SQL_PARAMS):
+                    placeholders = ', '.join('?' * len(chunk))
+                    rows.update((row[0], row) for row in conn.execute(
+                        f'{SNAPSHOT_QUERY} WHERE student_id IN ({placeholders})', chunk))
+        if rows is None:
+            self.load()
+            return len(ids)
+
+        added = []
+        for student_id in ids:
+            row = rows.get(student_id)
+            index = self.position.get(student_id)
+            if index is None:
+                if row is not None:
+                    added.append(row)
+            elif row is None:
+                self.alive[index] = False
+                del self.position[student_id]
+                self.deleted += 1
+            else:
+                _, age, grade, email, phone = row
+                self.age[index] = age
+                self.grade[index] = self.grades.encode(grade)
+                self.email[index] = self.emails.encode(email)
+                self.phone[index] = self.phones.encode(normalize_phone(phone))
+        self._append(added)
+        self.seq = seq
+        if self.deleted > REBUILD_FRACTION * len(self.ids):
+            self._compact()
+        return len(ids)
+
+    def _append(self, rows):
+        if not rows:
+            return
+        ids, ages, grades, emails, phones = zip(*rows)
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.position.update(zip(ids, range(start, start + len(ids))))
+        self.age = np.concatenate([self.age, np.array(ages, dtype=np.int64)])
+        self.grade = np.concatenate([self.grade, self.grades.encode_all(grades)])
+        self.email = np.concatenate([self.email, self.emails.encode_all(emails)])
+        self.phone = np.concatenate([self.phone, self.phones.encode_all(
+            [normalize_phone(phone) for phone in phones])])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+
+    def _compact(self):
+        """Drop the slots of deleted students"""
+        keep = np.flatnonzero(self.alive)
+        self.ids = [self.ids[i] for i in keep.tolist()]
+        self.position = {student_id: i for i, student_id in enumerate(self.ids)}
+        self.age = self.age[keep]
+        self.grade = self.grade[keep]
+        self.email = self.email[keep]
+        self.phone = self.phone[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.deleted = 0
+
+    def count(self):
+        """Number of students in the snapshot"""
+        return len(self.ids) - self.deleted
+
+    def age_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Return {percentile: age} over the students with an age"""
+        ages = self.age[self.alive & (self.age != MISSING)]
+        if not ages.size:
+            return {p: None for p in percentiles}
+        return dict(zip(percentiles, np.percentile(ages, percentiles).tolist()))
+
+    def grade_by_age(self):
+        """Cross-tabulate grade against age
+
+        Returns {'grades': [...], 'ages': [...], 'counts': rows} where
+        counts[i][j] is the number of students in grades[i] aged ages[j].
+        """
+        mask = self.alive & (self.age != MISSING) & (self.grade != MISSING)
+        ages, age_index = np.unique(self.age[mask], return_inverse=True)
+        codes, grade_index = np.unique(self.grade[mask], return_inverse=True)
+        counts = np.bincount(grade_index * len(ages) + age_index,
+                             minlength=len(codes) * len(ages)).reshape(len(codes), len(ages))
+        grades = [self.grades.values[code] for code in codes.tolist()]
+        order = sorted(range(len(grades)), key=grades.__getitem__)
+        return {'grades': [grades[i] for i in order],
+                'ages': ages.tolist(),
+                'counts': counts[order].tolist()}
+
+    def duplicates(self, field='email'):
+        """Return {value: [student_id, ...]} for emails or phones shared by several students
+
+        Emails are compared case-insensitively, phones by their digits only.
+        """
+        if field not in DUPLICATE_FIELDS:
+            raise ValueError(f"Cannot look for duplicates in {field}")
+        codes, values = (self.email, self.emails) if field == 'email' else (self.phone, self.phones)
+        rows = np.flatnonzero(self.alive & (codes != MISSING))
+        shared = np.bincount(codes[rows], minlength=len(values.values)) > 1
+        rows = rows[shared[codes[rows]]]
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+        groups = np.split(rows, np.flatnonzero(np.diff(codes[rows])) + 1) if rows.size else []
+        result = {values.values[codes[group[0]]]: sorted(self.ids[i] for i in group.tolist())
+                  for group in groups}
+        return dict(sorted(result.items()))
+
+    def report(self, percentiles=DEFAULT_PERCENTILES):
+        """All cohort reports in one dict"""
+        return {
+            'count': self.count(),
+            'age_percentiles': self.age_percentiles(percentiles),
+            'grade_by_age': self.grade_by_age(),
+            'duplicate_emails': self.duplicates('email'),
+            'duplicate_phones': self.duplicates('phone'),
+        }
@@ -0,0 +1,112 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from database import Database
+
+
+class AsyncDatabase:
+    """Awaitable wrapper around Database for asyncio services
+
+    Calls run on a dedicated thread pool. Each executor thread pins its own
+    read connection from the database's read pool, and writes are serialized
+    through the single writer connection.
+    """
+
+    def __init__(self, db_name="students.db", max_workers=4, **options):
+        # One read connection per executor thread, plus one for other callers
+        options.setdefault('read_pool_size', max_workers + 1)
+        self.db = Database(db_name, **options)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='async-db',
+                                           initializer=self.db.pin_thread_reader)
+
+    async def _run(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def add_student(self, student):
+        """Add a new student, returning it or False if the ID exists"""
+        return await self._run(self.db.add_student, student)
+
+    async def get_student(self, student_id):
+        """Retrieve one student by ID, or None"""
+        return await self._run(self.db.get_student, student_id)
+
+    async def get_all_students(self, raw=False):
+        """Retrieve all students"""
+        return await self._run(self.db.get_all_students, raw=raw)
+
+    async def search_student(self, search_term, raw=False, include_archived=False):
+        """Search students by ID, name, email or phone"""
+        return await self._run(self.db.search_student, search_term, raw=raw,
+                               include_archived=include_archived)
+
+    async def fuzzy_search(self, search_term, limit=50, threshold=0.3, raw=False):
+        """Search student names tolerating typos, best match first"""
+        return await self._run(self.db.fuzzy_search, search_term, limit=limit,
+                               threshold=threshold, raw=raw)
+
+    async def update_student(self, student_id, **kwargs):
+        """Update student information, returning the updated student or None"""
+        return await self._run(self.db.update_student, student_id, **kwargs)
+
+    async def delete_student(self, student_id):
+        """Delete a student by ID, returning the deleted student or None"""
+        return await self._run(self.db.delete_student, student_id)
+
+    async def bulk_update(self, student_ids, **kwargs):
+        """Set the same fields on many students in one transaction"""
+        return await self._run(self.db.bulk_update, student_ids, **kwargs)
+
+    async def bulk_delete(self, student_ids):
+        """Delete many students in one transaction, returning the deleted students"""
+        return await self._run(self.db.bulk_delete, student_ids)
+
+    async def archive_students(self, student_ids, batch_size=5000):
+        """Move students from the roster into the archive"""
+        return await self._run(self.db.archive_students, student_ids, batch_size=batch_size)
+
+    async def restore_students(self, student_ids, batch_size=5000):
+        """Move archived students back onto the roster"""
+        return await self._run(self.db.restore_students, student_ids, batch_size=batch_size)
+
+    async def get_student_count(self, include_archived=False):
+        """Get total number of students"""
+        return await self._run(self.db.get_student_count, include_archived=include_archived)
+
+    async def statistics(self):
+        """Compute roster statistics"""
+        return await self._run(self.db.statistics)
+
+    async def iter_students(self, page_size=500, raw=False):
+        """Stream all students in name order, one keyset page per executor call
+
+        Pages bypass the query cache: they are read once and would only push
+        out the results other callers are reusing.
+        """
+        after = None
+        while True:
+            page = await self._run(self.db.get_students_page, page_size, after=after, raw=raw,
+                                   cache=False)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            after = (last[1], last[0]) if raw else (last.name, last.student_id)
+
+    async def close(self):
+        """Wait for pending calls, then close the database
+
+        Both steps block, so they run on the loop's default executor instead
+        of stalling every other task on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.executor.shutdown)
+        await loop.run_in_executor(None, self.db.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
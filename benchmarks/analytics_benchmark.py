@@ -0,0 +1,107 @@
+"""Cohort reports from Python loops over Student objects vs the NumPy snapshot
+
+Times the loop approach (get_all_students, then dicts and sorted()) against
+loading a RosterSnapshot and running its vectorized reports, checks that
+both produce the same numbers, then times refreshing the snapshot after a
+batch of edits against reloading it.
+
+Usage: python benchmarks/analytics_benchmark.py [--rows N] [--edits N]
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+from roster import build_database
+from analytics import DEFAULT_PERCENTILES, RosterSnapshot, normalize_phone
+from database import Database
+
+
+def percentile(ordered, p):
+    """Linear interpolation between closest ranks, as numpy.percentile does"""
+    rank = (len(ordered) - 1) * p / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def loop_reports(db):
+    """The reports computed the way show_statistics does it: loops over Students"""
+    students = db.get_all_students()
+    ages = sorted(s.age for s in students if s.age is not None)
+    percentiles = {p: float(percentile(ages, p)) for p in DEFAULT_PERCENTILES}
+
+    crosstab = {}
+    for s in students:
+        if s.age is not None and s.grade:
+            crosstab[(s.grade, s.age)] = crosstab.get((s.grade, s.age), 0) + 1
+
+    duplicates = {}
+    for field, normalize in (('email', lambda v: (v or '').strip().lower()),
+                             ('phone', normalize_phone)):
+        groups = {}
+        for s in students:
+            value = normalize(getattr(s, field))
+            if value:
+                groups.setdefault(value, []).append(s.student_id)
+        duplicates[field] = {v: sorted(ids) for v, ids in groups.items() if len(ids) > 1}
+    return percentiles, crosstab, duplicates
+
+
+def snapshot_reports(snapshot):
+    table = snapshot.grade_by_age()
+    crosstab = {(grade, age): count
+                for grade, row in zip(table['grades'], table['counts'])
+                for age, count in zip(table['ages'], row) if count}
+    return (snapshot.age_percentiles(), crosstab,
+            {field: snapshot.duplicates(field) for field in ('email', 'phone')})
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--edits', type=int, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'analytics_benchmark.db')
+    build_database(path, args.rows).close()
+    db = Database(path, query_cache_bytes=0)
+
+    print(f"{args.rows} students")
+    expected, loop_time = timed(loop_reports, db)
+    print(f"{'loops over Student objects':<36}{loop_time:>10.3f}s")
+
+    snapshot, load_time = timed(RosterSnapshot, db)
+    actual, report_time = timed(snapshot_reports, snapshot)
+    print(f"{'snapshot load':<36}{load_time:>10.3f}s")
+    print(f"{'vectorized reports':<36}{report_time:>10.3f}s")
+    if actual != expected:
+        raise SystemExit("vectorized reports differ from the loop results")
+
+    rng = random.Random(1)
+    with db.write_behind(max_delay=0) as queue:
+        for _ in range(args.edits):
+            student_id = f"S{rng.randrange(args.rows):07d}"
+            if rng.random() < 0.1:
+                queue.delete_student(student_id)
+            else:
+                queue.update_student(student_id, age=rng.randint(13, 19), grade='Grade 12')
+    changed, refresh_time = timed(snapshot.refresh)
+    print(f"{f'refresh after {changed} changed rows':<36}{refresh_time:>10.3f}s")
+    _, reload_time = timed(RosterSnapshot, db)
+    print(f"{'full reload':<36}{reload_time:>10.3f}s")
+    if snapshot_reports(snapshot) != loop_reports(db):
+        raise SystemExit("refreshed snapshot differs from the database")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
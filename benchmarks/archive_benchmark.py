@@ -0,0 +1,86 @@
+"""Roster query latency before and after archiving most students
+
+Builds a roster, times the everyday queries, moves a share of the students
+into an attached archive with archive_students() and times the same queries
+again, plus searches that include the archive. The statistics summary is
+off and the query cache is disabled, so every count and statistic reads the
+students table.
+
+Usage: python benchmarks/archive_benchmark.py [--rows N] [--archived PCT] [--seed N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from roster import build_database
+from database import Database
+
+SEARCH_TERMS = ['Smith', 'Maria Garcia', 'gmail', 'S00012']
+
+
+def best_ms(function, *args, repeat=5, **kwargs):
+    """Fastest of repeat calls, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def iterate_all(db):
+    for _ in db.iter_students(5000, raw=True):
+        pass
+
+
+def measure(db, include_archived=False):
+    """Return {operation: ms} for the everyday queries"""
+    results = {
+        'count': best_ms(db.get_student_count, include_archived=include_archived),
+        'first page': best_ms(db.get_students_page, 100),
+        'statistics': best_ms(db.statistics, repeat=3),
+        'iterate all': best_ms(iterate_all, db, repeat=1),
+    }
+    for term in SEARCH_TERMS:
+        results[f"search '{term}'"] = best_ms(db.search_student, term,
+                                              include_archived=include_archived)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--archived', type=float, default=80.0,
+                        help="percent of students to archive (default: 80)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'archive_benchmark.db')
+    build_database(path, args.rows, seed=args.seed).close()
+    db = Database(path, query_cache_bytes=0,
+                  archive_name=os.path.join(directory, 'archive_benchmark_archive.db'))
+
+    before = measure(db)
+    rng = random.Random(args.seed)
+    student_ids = [row[0] for row in db.get_all_students(raw=True)]
+    doomed = rng.sample(student_ids, int(len(student_ids) * args.archived / 100))
+    start = time.perf_counter()
+    moved = db.archive_students(doomed)
+    seconds = time.perf_counter() - start
+    print(f"archived {moved} of {args.rows} students in {seconds:.1f} s "
+          f"({moved / seconds:.0f} per second)")
+
+    after = measure(db)
+    both = measure(db, include_archived=True)
+    print(f"{'operation':<24}{'all hot ms':>12}{'after ms':>12}{'+archive ms':>13}")
+    for operation in before:
+        print(f"{operation:<24}{before[operation]:>12.2f}{after[operation]:>12.2f}"
+              f"{both[operation]:>13.2f}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Load test of AsyncDatabase with many concurrent asyncio clients
+
+Each client loops over a read-heavy mix (lookups, page loads, searches,
+counts, with occasional updates) for a fixed time. Reports throughput and
+latency percentiles.
+
+Usage: python benchmarks/async_load_benchmark.py [--rows N] [--clients N] [--workers N] [--seconds S]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from roster import build_database
+from async_database import AsyncDatabase
+
+
+async def client(db, seed, rows, deadline, latencies):
+    """Issue requests until the deadline, recording each latency"""
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        choice = rng.random()
+        if choice < 0.4:
+            await db.get_student(f"S{rng.randrange(rows):07d}")
+        elif choice < 0.7:
+            async for _ in db.iter_students(page_size=50):
+                break
+        elif choice < 0.85:
+            await db.search_student(rng.choice(['Mary', 'Joh', 'Khan', 'Wei C']))
+        elif choice < 0.95:
+            await db.get_student_count()
+        else:
+            await db.update_student(f"S{rng.randrange(rows):07d}", age=rng.randint(13, 19))
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(path, rows, clients, workers, seconds):
+    latencies = []
+    async with AsyncDatabase(path, max_workers=workers) as db:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(client(db, i, rows, deadline, latencies) for i in range(clients)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'async_load_benchmark.db')
+    build_database(path, args.rows).close()
+
+    latencies = asyncio.run(run(path, args.rows, args.clients, args.workers, args.seconds))
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print(f"{args.rows} students, {args.clients} clients, {args.workers} workers, {args.seconds}s")
+    print(f"requests: {len(latencies)} ({len(latencies) / args.seconds:,.0f}/s)")
+    print(f"latency ms: mean {statistics.mean(latencies) * 1000:.2f}  p50 {percentile(50):.2f}  "
+          f"p95 {percentile(95):.2f}  p99 {percentile(99):.2f}")
+
+
+if __name__ == '__main__':
+    main()
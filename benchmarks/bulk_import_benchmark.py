@@ -0,0 +1,95 @@
+"""Bulk import throughput with the search index and the other trigger-kept tables
+
+Times bulk_add_students into an empty database with no search index, with
+the FTS5 index (each batch indexed in one statement), with the FTS5 index
+kept by its per-row trigger as it was before, and with the statistics
+summary and the fuzzy name index on as well. A bare executemany with no
+triggers at all is the floor.
+
+Usage: python benchmarks/bulk_import_benchmark.py [--rows N] [--batch-size N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from roster import generate_students
+from database import Database, STUDENT_COLUMNS
+
+
+def fresh_path(directory, name):
+    path = os.path.join(directory, f'bulk_import_{name}.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return path
+
+
+def bare_executemany(path, students, batch_size):
+    """The floor: the same table and indexes filled with no triggers"""
+    db = Database(path, use_fts=False)
+    rows = [s.to_tuple() for s in students]
+    start = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        with db.conn:
+            db.conn.executemany(f'INSERT INTO students ({STUDENT_COLUMNS}) '
+                                f'VALUES (?, ?, ?, ?, ?, ?)', rows[i:i + batch_size])
+    seconds = time.perf_counter() - start
+    db.close()
+    return seconds
+
+
+def per_row_fts(path, students, batch_size):
+    """bulk_add_students as it was: every row indexed by the insert trigger"""
+    db = Database(path)
+    db.fts_enabled = False  # Leaves the trigger in place for the whole import
+    start = time.perf_counter()
+    db.bulk_add_students(students, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    db.conn.execute("INSERT INTO students_fts (students_fts, rank) VALUES ('integrity-check', 1)")
+    db.close()
+    return seconds
+
+
+def bulk_add(path, students, batch_size, **options):
+    db = Database(path, **options)
+    start = time.perf_counter()
+    db.bulk_add_students(students, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    if db.fts_enabled:
+        try:
+            db.conn.execute(
+                "INSERT INTO students_fts (students_fts, rank) VALUES ('integrity-check', 1)")
+        except sqlite3.DatabaseError as e:
+            raise SystemExit(f"search index out of step with the students table: {e}")
+    db.close()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    students = list(generate_students(args.rows))
+    runs = [
+        ('bare executemany', lambda path: bare_executemany(path, students, args.batch_size)),
+        ('no search index', lambda path: bulk_add(path, students, args.batch_size, use_fts=False)),
+        ('FTS per-row trigger', lambda path: per_row_fts(path, students, args.batch_size)),
+        ('FTS per batch', lambda path: bulk_add(path, students, args.batch_size)),
+        ('FTS + summary + fuzzy', lambda path: bulk_add(path, students, args.batch_size,
+                                                        materialized_stats=True,
+                                                        fuzzy_index=True)),
+    ]
+    print(f"{args.rows} students, batches of {args.batch_size}")
+    print(f"{'import':<24}{'seconds':>10}{'rows/s':>12}")
+    for index, (name, run) in enumerate(runs):
+        seconds = run(fresh_path(directory, index))
+        print(f"{name:<24}{seconds:>10.2f}{args.rows / seconds:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
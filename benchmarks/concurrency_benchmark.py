@@ -0,0 +1,85 @@
+"""Read throughput while the GUI thread keeps writing
+
+Runs reader threads (page loads and lookups) next to one writer thread
+(single-row updates) for a fixed time, once with the old configuration
+(rollback journal, no read pool) and once with WAL and the read pool.
+
+Usage: python benchmarks/concurrency_benchmark.py [--rows N] [--readers N] [--seconds S]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from roster import build_database
+from database import Database
+
+CONFIGURATIONS = [
+    ('rollback journal, shared connection',
+     dict(journal_mode='delete', synchronous='full', read_pool_size=0)),
+    ('WAL + read pool',
+     dict(journal_mode='wal', synchronous='normal', read_pool_size=4)),
+]
+
+
+def run(path, rows, readers, seconds, options):
+    """Return (reads per second, writes per second) for one configuration"""
+    db = Database(path, **options)
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        done = 0
+        while not stop.is_set():
+            if rng.random() < 0.5:
+                db.get_students_page(50, after=(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), ''))
+            else:
+                db.get_student(f"S{rng.randrange(rows):07d}")
+            done += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        rng = random.Random(0)
+        done = 0
+        while not stop.is_set():
+            db.update_student(f"S{rng.randrange(rows):07d}", age=rng.randint(13, 19))
+            done += 1
+        with lock:
+            counts['writes'] += done
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+    return counts['reads'] / seconds, counts['writes'] / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'concurrency_benchmark.db')
+    build_database(path, args.rows, journal_mode='delete').close()
+
+    print(f"{args.rows} students, {args.readers} readers + 1 writer, {args.seconds}s each")
+    print(f"{'configuration':<40}{'reads/s':>12}{'writes/s':>12}")
+    for label, options in CONFIGURATIONS:
+        reads, writes = run(path, args.rows, args.readers, args.seconds, options)
+        print(f"{label:<40}{reads:>12,.0f}{writes:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Time from opening the database to the first painted page of the student table
+
+Replays the GUI's startup against a mocked Treeview on a roster that has no
+statistics summary or name index yet (the first start after an upgrade or
+an import), the old way, building both before painting, and staged, painting
+the first page and building them on a background thread. Also times a
+later start, when both already exist.
+
+Usage: python benchmarks/first_paint_benchmark.py [--rows N] [--runs N]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from roster import build_database
+from suite import MockScrollbar, MockTreeview
+from database import Database
+from table_view import RosterSource, VirtualTable
+
+
+def copy_database(source, path):
+    """Copy a database file with the backup API, which also copies its WAL"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    original = sqlite3.connect(source)
+    copy = sqlite3.connect(path)
+    original.backup(copy)
+    copy.close()
+    original.close()
+
+
+def first_paint(db):
+    """Show the first page the way StudentManagementGUI.refresh_table does"""
+    table = VirtualTable(MockTreeview(), MockScrollbar())
+    table.set_source(RosterSource(db))
+    return table
+
+
+def eager_start(path):
+    """Return (first paint s, None): the indexes are built before painting"""
+    start = time.perf_counter()
+    db = Database(path, materialized_stats=True, fuzzy_index=True)
+    first_paint(db)
+    painted = time.perf_counter() - start
+    db.close()
+    return painted, None
+
+
+def staged_start(path):
+    """Return (first paint s, s until the background build finished)"""
+    start = time.perf_counter()
+    db = Database(path)
+    table = first_paint(db)
+    painted = time.perf_counter() - start
+
+    def build():
+        db.create_summary_table()
+        db.create_fuzzy_index()
+
+    thread = threading.Thread(target=build)
+    thread.start()
+    # The table stays usable while the indexes are built
+    while thread.is_alive():
+        table.yview('scroll', 1, 'pages')
+        time.sleep(0.01)
+    thread.join()
+    built = time.perf_counter() - start
+    db.close()
+    return painted, built
+
+
+def warm_start(path):
+    """Return (first paint s, None) for a database that already has the indexes"""
+    start = time.perf_counter()
+    db = Database(path)
+    first_paint(db)
+    painted = time.perf_counter() - start
+    db.close()
+    return painted, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    original = os.path.join(directory, 'first_paint_original.db')
+    build_database(original, args.rows).close()
+    path = os.path.join(directory, 'first_paint.db')
+
+    print(f"{args.rows} students, median of {args.runs} runs")
+    print(f"{'startup':<10}{'first paint ms':>16}{'indexes ready ms':>18}")
+    for name, run in (('eager', eager_start), ('staged', staged_start)):
+        results = []
+        for _ in range(args.runs):
+            copy_database(original, path)
+            results.append(run(path))
+        painted = statistics.median(p for p, _ in results)
+        built = [b for _, b in results if b is not None]
+        ready = f"{statistics.median(built) * 1000:.0f}" if built else '(before paint)'
+        print(f"{name:<10}{painted * 1000:>16.1f}{ready:>18}")
+
+    painted = statistics.median(warm_start(path)[0] for _ in range(args.runs))
+    print(f"{'warm':<10}{painted * 1000:>16.1f}{'(already built)':>18}")
+
+
+if __name__ == '__main__':
+    main()
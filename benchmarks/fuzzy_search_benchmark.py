@@ -0,0 +1,84 @@
+"""Typo-tolerant name search with and without the trigram index
+
+Times Database.fuzzy_search for misspelled names, first comparing every
+distinct name (no index), then through the trigram index, and reports how
+long building the index took.
+
+Usage: python benchmarks/fuzzy_search_benchmark.py [--rows N] [--typos N] [--seed N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from roster import FIRST_NAMES, LAST_NAMES, build_database
+from database import Database
+
+TERMS = ['Jonson', 'Smiht', 'Willaims', 'Mary Jonson', 'Rodrigez Carlos', 'Nguyn', 'Jo']
+
+
+def misspell(rng, word):
+    """Drop, double, swap or replace one letter of word"""
+    i = rng.randrange(1, len(word))
+    edit = rng.randrange(4)
+    if edit == 0:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + word[i] + word[i:]
+    if edit == 2 and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice('aeiourstn') + word[i + 1:]
+
+
+def time_search(db, term, repeat=3):
+    """Return (best seconds, result count) for one search term"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = db.fuzzy_search(term)
+        best = min(best, time.perf_counter() - start)
+    return best, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--typos', type=int, default=500,
+                        help="random misspelled full names to time (default: 500)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'fuzzy_benchmark.db')
+    build_database(path, args.rows, seed=args.seed).close()
+    plain = Database(path, query_cache_bytes=0)
+    start = time.perf_counter()
+    indexed = Database(path, query_cache_bytes=0, fuzzy_index=True)
+    print(f"{args.rows} students, index built in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'term':<18}{'scan ms':>10}{'hits':>7}{'index ms':>10}{'hits':>7}")
+    for term in TERMS:
+        scan_time, scan_hits = time_search(plain, term, repeat=1)
+        index_time, index_hits = time_search(indexed, term)
+        print(f"{term:<18}{scan_time * 1000:>10.1f}{scan_hits:>7}"
+              f"{index_time * 1000:>10.2f}{index_hits:>7}")
+
+    rng = random.Random(args.seed)
+    samples = []
+    for _ in range(args.typos):
+        term = f"{misspell(rng, rng.choice(FIRST_NAMES))} {misspell(rng, rng.choice(LAST_NAMES))}"
+        start = time.perf_counter()
+        indexed.fuzzy_search(term)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{args.typos} misspelled full names through the index: "
+          f"p50 {samples[len(samples) // 2] * 1000:.2f} ms, "
+          f"p95 {samples[int(len(samples) * 0.95)] * 1000:.2f} ms, "
+          f"max {samples[-1] * 1000:.2f} ms")
+
+    plain.close()
+    indexed.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Cost of the profiling hooks: never enabled, enabled, and disabled again
+
+Runs the same mix of lookups, page loads and searches (query cache off, so
+every call reaches SQLite) in each state and reports microseconds per call.
+
+Usage: python benchmarks/profiling_overhead_benchmark.py [--rows N] [--calls N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from roster import build_database
+from database import Database
+
+
+def workload(db, rows, calls):
+    """Return microseconds per call for a fixed mix of reads"""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(calls):
+        if i % 10 == 0:
+            db.search_student(rng.choice(['Smith', 'Mar', 'gmail', 'S00001']))
+        elif i % 3 == 0:
+            db.get_students_page(50, after=(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), ''))
+        else:
+            db.get_student(f"S{rng.randrange(rows):07d}")
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'profiling_benchmark.db')
+    build_database(path, args.rows).close()
+    db = Database(path, query_cache_bytes=0)
+    workload(db, args.rows, args.calls // 10)  # Warm the page cache
+
+    print(f"{args.rows} students, {args.calls} calls")
+    print(f"{'profiling':<20}{'us/call':>10}")
+    print(f"{'never enabled':<20}{workload(db, args.rows, args.calls):>10.1f}")
+    profiler = db.enable_profiling()
+    print(f"{'enabled':<20}{workload(db, args.rows, args.calls):>10.1f}")
+    db.disable_profiling()
+    print(f"{'disabled again':<20}{workload(db, args.rows, args.calls):>10.1f}")
+    print(f"({profiler.statements} SQL statements traced while enabled)")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
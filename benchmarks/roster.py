@@ -0,0 +1,78 @@
+"""Deterministic synthetic rosters for the benchmarks"""
+import os
+import random
+import sys
+from itertools import accumulate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from student import Student
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael',
+               'Linda', 'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan',
+               'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen', 'Ahmed',
+               'Fatima', 'Hasan', 'Aisha', 'Wei', 'Mei', 'Raj', 'Priya', 'Carlos', 'Sofia',
+               'Daniel', 'Emily', 'Matthew', 'Olivia', 'Anthony', 'Emma', 'Mark', 'Ava',
+               'Luis', 'Isabella', 'Kenji', 'Yuki', 'Omar', 'Layla', 'Ivan', 'Anya',
+               'Kwame', 'Amara', 'Liam', 'Chloe', 'Noah', 'Zoe', 'Ethan', 'Grace']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+              'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez',
+              'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+              'Khan', 'Rahman', 'Chen', 'Wang', 'Patel', 'Singh', 'Kim', 'Nguyen',
+              'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark',
+              'Ramirez', 'Lewis', 'Robinson', 'Walker', 'Young', 'Allen', 'King',
+              'Wright', 'Scott', 'Torres', 'Hill', 'Flores', 'Green', 'Adams', 'Nelson',
+              'Baker', 'Hall', 'Rivera', 'Campbell', 'Mitchell', 'Carter', 'Roberts',
+              'Okafor', 'Mensah', 'Ivanova', 'Kowalski', 'Yamamoto', 'Haddad', 'Novak']
+# (grade, share of students, typical age)
+GRADES = [('Grade 9', 27, 14), ('Grade 10', 26, 15), ('Grade 11', 24, 16), ('Grade 12', 23, 17)]
+# (domain, share of students)
+DOMAINS = [('gmail.com', 45), ('school.edu', 25), ('outlook.com', 15),
+           ('yahoo.com', 10), ('icloud.com', 5)]
+EMAIL_FORMATS = ['{first}.{last}{n}', '{f}{last}{n}', '{first}_{last}{n}', '{first}{n}']
+MISSING_EMAIL = 0.02
+MISSING_PHONE = 0.05
+
+
+def zipf_weights(count, exponent=1.0):
+    """Weights where the k-th most common value is 1/k**exponent as likely as the first"""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def generate_students(count, seed=42):
+    """Yield count reproducible students with realistic value distributions
+
+    First and last names follow Zipf distributions, grades have slightly
+    shrinking cohorts with ages clustered around the typical age for the
+    grade, and emails mix a few address formats over weighted domains. A
+    few students have no email or phone.
+    """
+    rng = random.Random(seed)
+    first_weights = list(accumulate(zipf_weights(len(FIRST_NAMES), 0.8)))
+    last_weights = list(accumulate(zipf_weights(len(LAST_NAMES), 0.7)))
+    grade_weights = list(accumulate(share for _, share, _ in GRADES))
+    domain_weights = list(accumulate(share for _, share in DOMAINS))
+    for i in range(count):
+        first = rng.choices(FIRST_NAMES, cum_weights=first_weights)[0]
+        last = rng.choices(LAST_NAMES, cum_weights=last_weights)[0]
+        grade, _, age = rng.choices(GRADES, cum_weights=grade_weights)[0]
+        age += rng.choices((-1, 0, 1, 2), weights=(10, 70, 17, 3))[0]
+        email = None
+        if rng.random() >= MISSING_EMAIL:
+            local = rng.choice(EMAIL_FORMATS).format(
+                first=first.lower(), last=last.lower(), f=first[0].lower(), n=i)
+            email = f"{local}@{rng.choices(DOMAINS, cum_weights=domain_weights)[0][0]}"
+        phone = f"555-{rng.randint(0, 9999):04d}" if rng.random() >= MISSING_PHONE else None
+        yield Student(f"S{i:07d}", f"{first} {last}", age, grade, email, phone)
+
+
+def build_database(path, count, seed=42, **options):
+    """Create a database at path filled with count synthetic students"""
+    from database import Database
+
+    if os.path.exists(path):
+        os.remove(path)
+    db = Database(path, **options)
+    db.bulk_add_students(generate_students(count, seed), batch_size=5000)
+    return db
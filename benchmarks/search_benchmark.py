@@ -0,0 +1,52 @@
+"""Compare FTS5 and LIKE search latency on a synthetic roster
+
+Usage: python benchmarks/search_benchmark.py [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from roster import build_database
+from database import Database
+
+TERMS = ['J', 'Jo', 'John', 'Johnson', 'Mary Smith', 'S00012', 'gmail', '555-12']
+
+
+def time_search(db, term, repeat):
+    """Return (best seconds, result count) for one search term"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = db.search_student(term)
+        best = min(best, time.perf_counter() - start)
+    return best, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'search_benchmark.db')
+    build_database(path, args.rows).close()
+    fts_db = Database(path)
+    like_db = Database(path, use_fts=False)
+    if not fts_db.fts_enabled:
+        print("This SQLite build has no FTS5; only LIKE can be measured")
+
+    print(f"{args.rows} students, best of {args.repeat}")
+    print(f"{'term':<12}{'FTS ms':>10}{'hits':>8}{'LIKE ms':>10}{'hits':>8}")
+    for term in TERMS:
+        fts_time, fts_hits = time_search(fts_db, term, args.repeat)
+        like_time, like_hits = time_search(like_db, term, args.repeat)
+        print(f"{term:<12}{fts_time * 1000:>10.1f}{fts_hits:>8}"
+              f"{like_time * 1000:>10.1f}{like_hits:>8}")
+
+    fts_db.close()
+    like_db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Cold start time of the headless CLI
+
+Times fresh interpreter runs of `python -m cli stats` and reports the
+slowest imports from -X importtime. Exits with status 1 if the median run
+exceeds the budget or if tkinter was imported.
+
+Usage: python benchmarks/startup_benchmark.py [--runs N] [--budget-ms MS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from roster import build_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_run(command):
+    """Run a command in a fresh interpreter and return its wall time in seconds"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + command, cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def slowest_imports(args, count=10):
+    """Return the count slowest (cumulative microseconds, module) imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'cli'] + args, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), module.strip()))
+    return sorted(imports, reverse=True)[:count], {module for _, module in imports}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'startup_benchmark.db')
+    build_database(path, 1000, materialized_stats=True).close()
+    cli_args = ['--db', path, 'stats']
+
+    # The python interpreter on its own, for reference
+    baseline = statistics.median(time_run(['-c', 'pass']) for _ in range(args.runs))
+    median = statistics.median(time_run(['-m', 'cli'] + cli_args) for _ in range(args.runs))
+
+    imports, modules = slowest_imports(cli_args)
+    print(f"bare interpreter: {baseline * 1000:.1f} ms")
+    print(f"cli stats median of {args.runs}: {median * 1000:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print("slowest imports (cumulative):")
+    for microseconds, module in imports:
+        print(f"  {microseconds / 1000:>8.1f} ms  {module}")
+
+    failed = False
+    if 'tkinter' in modules:
+        print("FAIL: tkinter was imported")
+        failed = True
+    if median * 1000 > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
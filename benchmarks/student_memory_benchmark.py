@@ -0,0 +1,79 @@
+"""Memory and throughput of loading the roster as objects vs raw tuples
+
+Compares the original dict-backed Student built in a positional loop with
+the __slots__ Student built by the row factory and with raw tuples, through
+a Database with the query cache off so every load reads and builds the rows.
+Time is measured with tracing off, as tracemalloc slows allocation-heavy
+loaders unevenly, and peak memory in a second, traced run.
+
+Usage: python benchmarks/student_memory_benchmark.py [--rows N]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from roster import build_database
+
+
+class DictStudent:
+    """The Student class as it was before __slots__, for comparison"""
+
+    def __init__(self, student_id, name, age, grade, email, phone):
+        self.student_id = student_id
+        self.name = name
+        self.age = age
+        self.grade = grade
+        self.email = email
+        self.phone = phone
+
+
+def load_dict_students(db):
+    """The original get_all_students loop"""
+    db.cursor.execute('SELECT * FROM students ORDER BY name, student_id')
+    rows = db.cursor.fetchall()
+    students = []
+    for row in rows:
+        student = DictStudent(row[0], row[1], row[2], row[3], row[4], row[5])
+        students.append(student)
+    return students
+
+
+def measure(label, load, rows):
+    """Print load time and peak traced memory for one loader"""
+    gc.collect()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    assert len(result) == rows
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{elapsed:>10.2f}{rows / elapsed:>14,.0f}{peak / 2 ** 20:>12.1f}")
+    del result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'student_memory_benchmark.db')
+    db = build_database(path, args.rows, query_cache_bytes=0)
+
+    print(f"{args.rows} students")
+    print(f"{'loader':<28}{'seconds':>10}{'rows/s':>14}{'peak MiB':>12}")
+    measure('dict Student (old loop)', lambda: load_dict_students(db), args.rows)
+    measure('__slots__ Student', db.get_all_students, args.rows)
+    measure('raw tuples', lambda: db.get_all_students(raw=True), args.rows)
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
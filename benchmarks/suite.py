@@ -0,0 +1,272 @@
+"""Reproducible benchmark suite for Database operations and table population
+
+For each roster size, builds a database from the deterministic generator in
+roster.py and times insert, listing, search, update and delete (row by row
+and in bulk), statistics and export through Database, plus filling a mocked
+Treeview the old way (one insert per student) and through VirtualTable. The
+query cache is off so every call reaches SQLite, except for list.all.cached,
+which lists every student with the cache at its default size and emptied
+before each call, so that storing the result is part of the timing.
+
+Results are written as JSON. --compare prints every timing next to an
+earlier results file and exits with status 1 if any got slower by more
+than --threshold percent.
+
+Usage: python benchmarks/suite.py [--sizes N ...] [--full] [--output FILE]
+                                  [--compare FILE] [--threshold PCT]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from roster import ROOT, generate_students
+from database import Database
+from exporter import export_students
+from student import Student
+from table_view import RosterSource, VirtualTable, row_values
+
+SIZES = (10000, 100000)
+FULL_SIZES = (10000, 100000, 1000000)
+SEARCH_TERMS = ['Jo', 'Smith', 'Maria Garcia', 'S00012', 'gmail', '555-12']
+
+
+class MockTreeview:
+    """The part of the ttk.Treeview API that VirtualTable and the old refresh loop use"""
+
+    def __init__(self):
+        self.items = []
+        self.values = {}
+        self.selected = ()
+        self.focused = ''
+
+    def bind(self, sequence, callback):
+        pass
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.remove(iid)
+            del self.values[iid]
+
+    def insert(self, parent, index, iid=None, values=()):
+        iid = iid or f"I{len(self.values)}"
+        if index == 'end':
+            self.items.append(iid)
+        else:
+            self.items.insert(index, iid)
+        self.values[iid] = values
+        return iid
+
+    def item(self, iid, values=None):
+        if values is not None:
+            self.values[iid] = values
+        return {'values': self.values[iid]}
+
+    def move(self, iid, parent, index):
+        self.items.remove(iid)
+        self.items.insert(index, iid)
+
+    def index(self, iid):
+        return self.items.index(iid)
+
+    def selection_set(self, iids):
+        self.selected = (iids,) if isinstance(iids, str) else tuple(iids)
+
+    def selection(self):
+        return self.selected
+
+    def focus(self, iid=None):
+        if iid is not None:
+            self.focused = iid
+        return self.focused
+
+
+class MockScrollbar:
+    def config(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def summarize(samples):
+    """Timing summary of a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'total_s': round(sum(ordered), 6),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+    }
+
+
+def time_calls(function, arguments):
+    """Call function once per argument tuple and return the durations"""
+    samples = []
+    for args in arguments:
+        start = time.perf_counter()
+        function(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def legacy_fill(db, tree):
+    """Populate the table the way refresh_table used to: every student, one insert each"""
+    tree.delete(*tree.get_children())
+    for student in db.get_all_students():
+        tree.insert('', 'end', values=row_values(student))
+
+
+def list_all_uncached(db):
+    """get_all_students on a miss: the query, then storing the result in the cache"""
+    db.query_cache.invalidate()
+    db.get_all_students()
+
+
+def run_size(size, seed, ops, directory):
+    """Return {operation: timing summary} for one roster size"""
+    rng = random.Random(seed)
+    path = os.path.join(directory, f'suite_{size}.db')
+    results = {}
+
+    def iterate_all():
+        for _ in db.iter_students(5000, raw=True):
+            pass
+
+    def set_age(student_id, age):
+        db.update_student(student_id, age=age)
+
+    def set_grade(student_ids):
+        db.bulk_update(student_ids, grade='Grade 12')
+
+    def first_paint():
+        table.set_source(RosterSource(db))
+
+    db = Database(path, query_cache_bytes=0)
+    results['insert.bulk'] = summarize(time_calls(
+        db.bulk_add_students, [(generate_students(size, seed), 5000)]))
+    extra = [Student(f"N{i:07d}", f"New Student {i}", 15, 'Grade 10', None, None)
+             for i in range(ops)]
+    results['insert.single'] = summarize(time_calls(db.add_student, [(s,) for s in extra]))
+
+    ids = [f"S{rng.randrange(size):07d}" for _ in range(ops)]
+    results['lookup'] = summarize(time_calls(db.get_student, [(i,) for i in ids]))
+    results['list.all'] = summarize(time_calls(db.get_all_students, [()] * 3))
+    results['list.iter'] = summarize(time_calls(iterate_all, [()] * 3))
+    keys = [db.get_student_key_at(rng.randrange(size)) for _ in range(ops)]
+    results['list.page'] = summarize(time_calls(db.get_students_page, [(100, k) for k in keys]))
+    results['search'] = summarize(time_calls(db.search_student, [(t,) for t in SEARCH_TERMS] * 5))
+    results['update'] = summarize(time_calls(set_age, [(i, rng.randint(13, 19)) for i in ids]))
+    results['update.bulk'] = summarize(time_calls(set_grade, [(ids,)] * 3))
+    results['stats.sql'] = summarize(time_calls(db.statistics, [()] * 3))
+    results['export.csv'] = summarize(time_calls(
+        export_students, [(db, os.path.join(directory, f'suite_{size}.csv'))]))
+
+    tree = MockTreeview()
+    results['treeview.legacy_fill'] = summarize(time_calls(legacy_fill, [(db, tree)]))
+    table = VirtualTable(MockTreeview(), MockScrollbar())
+    results['treeview.virtual_first_paint'] = summarize(time_calls(first_paint, [()] * 5))
+    results['treeview.virtual_scroll'] = summarize(time_calls(
+        table.yview, [('scroll', rng.randint(-40, 40), 'units') for _ in range(ops)]))
+
+    doomed = rng.sample(range(size), ops * 2)
+    results['delete'] = summarize(time_calls(
+        db.delete_student, [(f"S{i:07d}",) for i in doomed[:ops]]))
+    results['delete.bulk'] = summarize(time_calls(
+        db.bulk_delete, [([f"S{i:07d}" for i in doomed[ops:]],)]))
+    db.close()
+
+    db = Database(path, materialized_stats=True, query_cache_bytes=0)
+    results['stats.summary'] = summarize(time_calls(db.statistics, [()] * 3))
+    db.close()
+
+    db = Database(path)
+    results['list.all.cached'] = summarize(time_calls(list_all_uncached, [(db,)] * 3))
+    db.close()
+    return results
+
+
+def metadata(seed, ops):
+    """Where and on what the results were measured"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'seed': seed,
+        'ops': ops,
+    }
+
+
+def compare(old, new, threshold):
+    """Print new timings against old ones; returns the regressions beyond threshold percent"""
+    regressions = []
+    print(f"{'size':>9}  {'operation':<32}{'old ms':>12}{'new ms':>12}{'change':>9}")
+    for size, operations in new['results'].items():
+        for operation, timing in operations.items():
+            before = old['results'].get(size, {}).get(operation)
+            if before is None:
+                continue
+            change = (timing['mean_ms'] / before['mean_ms'] - 1) * 100 if before['mean_ms'] else 0
+            flag = '  <-- slower' if change > threshold else ''
+            print(f"{size:>9}  {operation:<32}{before['mean_ms']:>12.3f}{timing['mean_ms']:>12.3f}"
+                  f"{change:>+8.1f}%{flag}")
+            if flag:
+                regressions.append((size, operation, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--full', action='store_true', help=f"run {FULL_SIZES}")
+    parser.add_argument('--ops', type=int, default=200,
+                        help="calls per single-row operation (default: 200)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='FILE', help="earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="percent slowdown reported as a regression (default: 10)")
+    args = parser.parse_args()
+    sizes = FULL_SIZES if args.full else args.sizes
+
+    report = {'meta': metadata(args.seed, args.ops), 'results': {}}
+    directory = tempfile.mkdtemp()
+    for size in sizes:
+        print(f"{size} students...", file=sys.stderr)
+        report['results'][str(size)] = run_size(size, args.seed, args.ops, directory)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(json.load(file), report, args.threshold)
+        return 1 if regressions else 0
+    for size, operations in report['results'].items():
+        for operation, timing in operations.items():
+            print(f"{size:>9}  {operation:<32}{timing['mean_ms']:>12.3f} ms  (n={timing['n']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
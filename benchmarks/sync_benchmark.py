@@ -0,0 +1,66 @@
+"""Delta sync cost against roster size
+
+For each roster size, clones a database into a second replica, makes the
+same number of edits on both sides and times sync(). The time should stay
+flat as the roster grows. A full CSV export and re-import, the old way of
+reconciling replicas, is timed for comparison.
+
+Usage: python benchmarks/sync_benchmark.py [--rows N [N ...]] [--edits N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from roster import build_database
+from database import Database
+from exporter import export_students
+from importer import import_file
+import sync
+
+
+def edit(db, rows, edits, seed):
+    rng = random.Random(seed)
+    with db.write_behind(max_delay=0) as queue:
+        for _ in range(edits):
+            queue.update_student(f"S{rng.randrange(rows):07d}", age=rng.randint(13, 19))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--edits', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.edits} edits on each replica")
+    print(f"{'students':>10}{'clone':>10}{'sync':>10}{'csv round trip':>16}")
+    for rows in args.rows:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'primary.db')
+        build_database(path, rows).close()
+        primary = Database(path)
+
+        start = time.perf_counter()
+        sync.clone(primary, os.path.join(directory, 'replica.db'))
+        clone_time = time.perf_counter() - start
+        replica = Database(os.path.join(directory, 'replica.db'))
+
+        edit(primary, rows, args.edits, seed=1)
+        edit(replica, rows, args.edits, seed=2)
+        start = time.perf_counter()
+        sync.sync(replica, primary)
+        sync_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        export_students(primary, os.path.join(directory, 'roster.csv'))
+        import_file(replica, os.path.join(directory, 'roster.csv'), on_conflict='replace')
+        csv_time = time.perf_counter() - start
+
+        primary.close()
+        replica.close()
+        print(f"{rows:>10}{clone_time:>10.3f}{sync_time:>10.3f}{csv_time:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Edit throughput with and without the write-behind queue, plus a crash check
+
+Applies the same stream of updates (with repeats, as integrations send them)
+once through Database.update_student, which commits every call, and once
+through a WriteBehindQueue. The crash check runs the queue in a child
+process that is killed mid-stream, then verifies that every flush the child
+acknowledged is in the database and that no flush is half-applied.
+
+Usage: python benchmarks/write_queue_benchmark.py [--rows N] [--edits N] [--synchronous MODE]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from roster import build_database
+from database import Database
+
+CRASH_BATCH = 50
+
+
+def edit_stream(rows, edits, seed=0):
+    """Yield (student_id, fields) updates that hit a working set of students repeatedly"""
+    rng = random.Random(seed)
+    hot = [f"S{rng.randrange(rows):07d}" for _ in range(max(1, edits // 4))]
+    for _ in range(edits):
+        yield rng.choice(hot), {'age': rng.randint(13, 19), 'grade': f"Grade {rng.randint(9, 12)}"}
+
+
+def run_direct(path, rows, edits, synchronous):
+    db = Database(path, synchronous=synchronous)
+    start = time.perf_counter()
+    for student_id, fields in edit_stream(rows, edits):
+        db.update_student(student_id, **fields)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed
+
+
+def run_queued(path, rows, edits, synchronous):
+    db = Database(path, synchronous=synchronous)
+    start = time.perf_counter()
+    with db.write_behind(max_pending=500, max_delay=0.5) as queue:
+        for student_id, fields in edit_stream(rows, edits):
+            queue.update_student(student_id, **fields)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed
+
+
+def crash_child(path):
+    """Write numbered batches of marker names, acknowledging each flush on stdout"""
+    db = Database(path, synchronous='full')
+    queue = db.write_behind(max_pending=10 ** 9, max_delay=0)
+    batch = 0
+    while True:
+        for i in range(CRASH_BATCH):
+            queue.update_student(f"S{i:07d}", name=f"batch {batch}")
+        queue.flush()
+        print(batch, flush=True)
+        batch += 1
+
+
+def crash_check(path):
+    """Kill a writing child at a random point and check what survived"""
+    child = subprocess.Popen([sys.executable, __file__, '--crash-child', path],
+                             stdout=subprocess.PIPE, text=True)
+    time.sleep(random.uniform(0.5, 1.5))
+    child.kill()
+    acknowledged = [int(line) for line in child.stdout.read().split()]
+    child.wait()
+
+    db = Database(path)
+    names = {db.get_student(f"S{i:07d}").name for i in range(CRASH_BATCH)}
+    db.close()
+    if len(names) != 1:
+        return f"FAILED: a flush was half-applied ({sorted(names)})"
+    (name,) = names
+    if acknowledged and (not name.startswith('batch ')
+                         or int(name.split()[1]) < acknowledged[-1]):
+        return f"FAILED: acknowledged batch {acknowledged[-1]} is missing ({name})"
+    return f"ok ({len(acknowledged)} flushes acknowledged, database holds {name!r})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--edits', type=int, default=5000)
+    parser.add_argument('--synchronous', default='full')
+    parser.add_argument('--crash-child', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.crash_child:
+        crash_child(args.crash_child)
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), 'write_queue_benchmark.db')
+    build_database(path, args.rows).close()
+
+    print(f"{args.rows} students, {args.edits} edits, synchronous={args.synchronous}")
+    print(f"{'mode':<28}{'seconds':>10}{'edits/s':>12}")
+    for label, run in (('commit per edit', run_direct), ('write-behind queue', run_queued)):
+        elapsed = run(path, args.rows, args.edits, args.synchronous)
+        print(f"{label:<28}{elapsed:>10.3f}{args.edits / elapsed:>12,.0f}")
+
+    print(f"crash check: {crash_check(path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""Command line interface for scripted jobs on display-less machines
+
+Usage: python -m cli [--db PATH] {import,export,stats,analytics,search,archive,restore,sync,clone,check-plans,vacuum} ...
+
+Only the modules a command needs are imported, and tkinter never is, so
+nightly imports and exports start quickly.
+"""
+import argparse
+import sys
+
+
+def open_database(args):
+    """Open the database named on the command line"""
+    from database import Database
+    db = Database(args.db, materialized_stats=args.materialized_stats,
+                  fuzzy_index=getattr(args, 'fuzzy', False), archive_name=args.archive)
+    if args.profile:
+        args.profiler = db.enable_profiling(getattr(args, 'profiler', None))
+    return db
+
+
+def cmd_import(args):
+    """Stream a CSV, JSONL or columnar file into the database"""
+    import sqlite3
+    from importer import import_file
+
+    imported = 0
+
+    def report(batch_number, inserted, rejected):
+        nonlocal imported
+        imported = inserted
+        if not args.quiet:
+            print(f"batch {batch_number}: {inserted} imported", file=sys.stderr)
+
+    db = open_database(args)
+    try:
+        result = import_file(db, args.file, batch_size=args.batch_size,
+                             on_conflict=args.on_conflict, progress=report)
+    except sqlite3.IntegrityError as e:
+        # Only --on-conflict fail lets a duplicate through to the insert
+        print(f"Import stopped: {e}", file=sys.stderr)
+        print(f"Imported {imported} students before the failing batch")
+        return 1
+    finally:
+        db.close()
+    print(f"Imported {result['inserted']} students, rejected {len(result['rejected'])}")
+    for student_id, reason in result['rejected']:
+        print(f"  {student_id}: {reason}", file=sys.stderr)
+    return 1 if result['rejected'] and args.strict else 0
+
+
+def cmd_export(args):
+    """Stream every student into a CSV, JSONL or columnar file"""
+    from exporter import export_students
+
+    def report(done, total):
+        if not args.quiet:
+            print(f"{done}/{total} exported", file=sys.stderr)
+
+    db = open_database(args)
+    try:
+        count = export_students(db, args.file, batch_size=args.batch_size, progress=report)
+    finally:
+        db.close()
+    print(f"Exported {count} students to {args.file}")
+    return 0
+
+
+def cmd_stats(args):
+    """Print roster statistics"""
+    db = open_database(args)
+    try:
+        stats = db.statistics()
+    finally:
+        db.close()
+
+    if args.json:
+        import json
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    print(f"Total Students: {stats['count']}")
+    if stats['average_age'] is not None:
+        print(f"Average Age: {stats['average_age']:.1f} "
+              f"(range {stats['min_age']}-{stats['max_age']})")
+    else:
+        print("Average Age: N/A")
+    for title, key in (("Grade Distribution", 'grades'), ("Age Groups", 'age_buckets'),
+                       ("Email Domains", 'email_domains')):
+        print(f"\n{title}:")
+        for value, count in stats[key].items():
+            print(f"  {value}: {count}")
+    return 0
+
+
+def cmd_analytics(args):
+    """Print age percentiles, grade-by-age counts and duplicate emails/phones"""
+    from analytics import RosterSnapshot
+
+    db = open_database(args)
+    try:
+        report = RosterSnapshot(db).report()
+    finally:
+        db.close()
+
+    if args.json:
+        import json
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"Total Students: {report['count']}")
+    print("\nAge Percentiles:")
+    for p, age in report['age_percentiles'].items():
+        print(f"  p{p}: {'N/A' if age is None else f'{age:g}'}")
+    table = report['grade_by_age']
+    print("\nGrade by Age:")
+    print('\t'.join(['grade'] + [str(age) for age in table['ages']]))
+    for grade, row in zip(table['grades'], table['counts']):
+        print('\t'.join([grade] + [str(count) for count in row]))
+    for title, key in (("Duplicate Emails", 'duplicate_emails'),
+                       ("Duplicate Phones", 'duplicate_phones')):
+        print(f"\n{title}: {len(report[key])}")
+        for value, student_ids in list(report[key].items())[:args.limit or None]:
+            print(f"  {value}: {', '.join(student_ids)}")
+    return 0
+
+
+def cmd_search(args):
+    """Print the students matching a search term"""
+    db = open_database(args)
+    try:
+        if args.fuzzy:
+            rows = db.fuzzy_search(args.term, limit=args.limit or 50, raw=True)
+        else:
+            rows = db.search_student(args.term, raw=True, include_archived=args.archived)
+    finally:
+        db.close()
+
+    if args.limit:
+        rows = rows[:args.limit]
+    if args.json:
+        import json
+        from student import STUDENT_FIELDS
+        for row in rows:
+            print(json.dumps(dict(zip(STUDENT_FIELDS, row))))
+    else:
+        for row in rows:
+            print('\t'.join('' if value is None else str(value) for value in row))
+    return 0
+
+
+def cmd_archive(args):
+    """Move the students matching the filters into the archive database"""
+    filters = {'grades': args.grade, 'min_age': args.min_age, 'max_age': args.max_age,
+               'email_domain': args.email_domain}
+    if all(value is None for value in filters.values()):
+        print("Give at least one filter; archiving the whole roster is not supported",
+              file=sys.stderr)
+        return 1
+
+    def report(done, total):
+        if not args.quiet:
+            print(f"{done}/{total} archived", file=sys.stderr)
+
+    db = open_database(args)
+    try:
+        student_ids = db.query(**filters).student_ids()
+        moved = db.archive_students(student_ids, batch_size=args.batch_size, progress=report)
+    finally:
+        db.close()
+    print(f"Archived {moved} students to {args.archive}")
+    return 0
+
+
+def cmd_restore(args):
+    """Move archived students back onto the roster"""
+    db = open_database(args)
+    try:
+        restored = db.restore_students(args.student_ids)
+    finally:
+        db.close()
+    print(f"Restored {restored} of {len(args.student_ids)} students")
+    return 0 if restored == len(args.student_ids) else 1
+
+
+def cmd_sync(args):
+    """Exchange changes with another replica"""
+    import os
+    import sync
+    from database import Database
+
+    if not os.path.exists(args.replica):
+        print(f"{args.replica} does not exist; create it with the clone command", file=sys.stderr)
+        return 1
+    db = open_database(args)
+    try:
+        remote = Database(args.replica)
+        try:
+            result = sync.sync(db, remote, policy=args.policy)
+        finally:
+            remote.close()
+    finally:
+        db.close()
+    for direction in ('pulled', 'pushed'):
+        print(f"{direction.capitalize()}: {len(result[direction]['applied'])} applied, "
+              f"{len(result[direction]['skipped'])} skipped")
+    return 0
+
+
+def cmd_clone(args):
+    """Copy the database into a new replica"""
+    import os
+    import sync
+
+    if os.path.exists(args.replica):
+        print(f"{args.replica} already exists", file=sys.stderr)
+        return 1
+    db = open_database(args)
+    try:
+        new_id = sync.clone(db, args.replica)
+    finally:
+        db.close()
+    print(f"Created replica {new_id} at {args.replica}")
+    return 0
+
+
+def cmd_check_plans(args):
+    """Fail if any hot query's EXPLAIN QUERY PLAN shows a full table scan"""
+    from migrations import HOT_QUERIES, check_query_plans, explain, schema_version
+
+    db = open_database(args)
+    try:
+        with db.reader() as conn:
+            print(f"Schema version {schema_version(conn)}")
+            if args.verbose:
+                for description, query, params in HOT_QUERIES:
+                    print(f"{description}: {'; '.join(explain(conn, query, params))}")
+            problems = check_query_plans(conn)
+    finally:
+        db.close()
+
+    for description, detail in problems:
+        print(f"FULL SCAN in {description}: {detail}")
+    if not problems:
+        print("No hot query scans the whole students table")
+    return 1 if problems else 0
+
+
+def cmd_vacuum(args):
+    """Compact the database files and rebuild the search indexes"""
+    db = open_database(args)
+    try:
+        if args.reindex_only:
+            db.rebuild_search_index()
+        else:
+            db.vacuum()
+    finally:
+        db.close()
+    print("Rebuilt the search index" if args.reindex_only else f"Compacted {args.db}")
+    return 0
+
+
+def build_parser():
+    """Build the argument parser for all subcommands"""
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Student Management System")
+    parser.add_argument('--db', default='students.db', help="database file (default: students.db)")
+    parser.add_argument('--materialized-stats', action='store_true',
+                        help="create/use the trigger-maintained statistics summary")
+    parser.add_argument('--archive', metavar='FILE',
+                        help="archive database to attach (the GUI uses students_archive.db)")
+    parser.add_argument('--profile', metavar='JSON',
+                        help="write per-method timings and slow SQL to this file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import', help="import students from CSV, JSONL or .scol")
+    command.add_argument('file')
+    command.add_argument('--batch-size', type=int, default=5000)
+    command.add_argument('--on-conflict', choices=('skip', 'replace', 'fail'), default='skip')
+    command.add_argument('--strict', action='store_true', help="exit with 1 if any row is rejected")
+    command.add_argument('--quiet', action='store_true')
+    command.set_defaults(handler=cmd_import)
+
+    command = commands.add_parser('export', help="export students to CSV, JSONL or .scol")
+    command.add_argument('file')
+    command.add_argument('--batch-size', type=int, default=5000)
+    command.add_argument('--quiet', action='store_true')
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser('stats', help="print roster statistics")
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_stats)
+
+    command = commands.add_parser('analytics', help="print cohort analytics (needs NumPy)")
+    command.add_argument('--limit', type=int, default=20,
+                         help="duplicate groups to list per field, 0 for all (default: 20)")
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_analytics)
+
+    command = commands.add_parser('search', help="search students by ID, name, email or phone")
+    command.add_argument('term')
+    command.add_argument('--fuzzy', action='store_true',
+                         help="match names tolerating typos (builds the trigram index on first use)")
+    command.add_argument('--archived', action='store_true',
+                         help="also search archived students (needs --archive)")
+    command.add_argument('--limit', type=int, default=0)
+    command.add_argument('--json', action='store_true')
+    command.set_defaults(handler=cmd_search)
+
+    command = commands.add_parser('archive', help="move matching students into the archive")
+    command.add_argument('--grade', action='append', help="grade to archive; may be repeated")
+    command.add_argument('--min-age', type=int)
+    command.add_argument('--max-age', type=int)
+    command.add_argument('--email-domain')
+    command.add_argument('--batch-size', type=int, default=5000)
+    command.add_argument('--quiet', action='store_true')
+    command.set_defaults(handler=cmd_archive, needs_archive=True)
+
+    command = commands.add_parser('restore', help="move archived students back onto the roster")
+    command.add_argument('student_ids', nargs='+', metavar='student_id')
+    command.set_defaults(handler=cmd_restore, needs_archive=True)
+
+    command = commands.add_parser('sync', help="exchange changes with another replica")
+    command.add_argument('replica', help="the other replica's database file")
+    command.add_argument('--policy', choices=('lww', 'local', 'remote'), default='lww',
+                         help="who wins when both sides changed a student (default: lww)")
+    command.set_defaults(handler=cmd_sync)
+
+    command = commands.add_parser('clone', help="copy the database into a new replica")
+    command.add_argument('replica', help="database file to create")
+    command.set_defaults(handler=cmd_clone)
+
+    command = commands.add_parser('check-plans', help="assert hot queries use indexes")
+    command.add_argument('--verbose', action='store_true', help="print every query plan")
+    command.set_defaults(handler=cmd_check_plans)
+
+    command = commands.add_parser('vacuum', help="compact the database and rebuild the search index")
+    command.add_argument('--reindex-only', action='store_true',
+                         help="only rebuild the search index from the students table")
+    command.set_defaults(handler=cmd_vacuum)
+    return parser
+
+
+def main(argv=None):
+    """Run one CLI command and return its exit status"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.archive is None and (getattr(args, 'needs_archive', False)
+                                 or getattr(args, 'archived', False)):
+        parser.error(f"{args.command} needs --archive FILE")
+    status = args.handler(args)
+    if getattr(args, 'profiler', None) is not None:
+        args.profiler.dump(args.profile)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """A small thread-safe pool of SQLite connections
+
+    Connections are opened lazily by connect() up to size; once all of them
+    are checked out, callers wait for one to be returned.
+    """
+
+    def __init__(self, connect, size=4):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def acquire(self, timeout=None):
+        """Check out a connection, opening a new one if the pool is not full"""
+        if self.closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No pooled connection became available") from None
+
+    def release(self, conn):
+        """Return a connection to the pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a with block"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def connections(self):
+        """Return every connection the pool has opened, idle or checked out"""
+        with self._lock:
+            return list(self._all)
+
+    def close(self):
+        """Close every connection the pool has opened"""
+        self.closed = True
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
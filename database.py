@@ -1,105 +1,1186 @@
-import sqlite3
-from student import Student
-
-
-class Database:
-    def __init__(self, db_name="students.db"):
-        self.conn = sqlite3.connect(db_name)
-        self.cursor = self.conn.cursor()
-        self.create_table()
-
-    def create_table(self):
-        """Create students table if it doesn't exist"""
-        self.cursor.execute('''
-                            CREATE TABLE IF NOT EXISTS students
-                            (
-                                student_id
-                                TEXT
-                                PRIMARY
-                                KEY,
-                                name
-                                TEXT
-                                NOT
-                                NULL,
-                                age
-                                INTEGER,
-                                grade
-                                TEXT,
-                                email
-                                TEXT,
-                                phone
-                                TEXT
-                            )
-                            ''')
-        self.conn.commit()
-
-    def add_student(self, student):
-        """Add a new student to database"""
-        try:
-            self.cursor.execute('''
-                                INSERT INTO students (student_id, name, age, grade, email, phone)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                                ''', (student.student_id, student.name, student.age,
-                                      student.grade, student.email, student.phone))
-            self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False  # Student ID already exists
-
-    def get_all_students(self):
-        """Retrieve all students"""
-        self.cursor.execute('SELECT * FROM students ORDER BY name')
-        rows = self.cursor.fetchall()
-        students = []
-        for row in rows:
-            student = Student(row[0], row[1], row[2], row[3], row[4], row[5])
-            students.append(student)
-        return students
-
-    def search_student(self, search_term):
-        """Search students by ID or name"""
-        self.cursor.execute('''
-                            SELECT *
-                            FROM students
-                            WHERE student_id LIKE ?
-                               OR name LIKE ?
-                            ORDER BY name
-                            ''', (f'%{search_term}%', f'%{search_term}%'))
-        rows = self.cursor.fetchall()
-        students = []
-        for row in rows:
-            student = Student(row[0], row[1], row[2], row[3], row[4], row[5])
-            students.append(student)
-        return students
-
-    def update_student(self, student_id, **kwargs):
-        """Update student information"""
-        fields = []
-        values = []
-        for key, value in kwargs.items():
-            if value is not None:
-                fields.append(f"{key} = ?")
-                values.append(value)
-
-        if fields:
-            query = f"UPDATE students SET {', '.join(fields)} WHERE student_id = ?"
-            values.append(student_id)
-            self.cursor.execute(query, values)
-            self.conn.commit()
-            return True
-        return False
-
-    def delete_student(self, student_id):
-        """Delete a student by ID"""
-        self.cursor.execute('DELETE FROM students WHERE student_id = ?', (student_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
-
-    def get_student_count(self):
-        """Get total number of students"""
-        self.cursor.execute('SELECT COUNT(*) FROM students')
-        return self.cursor.fetchone()[0]
-
-    def close(self):
-        """Close database connection"""
+import re
+import sqlite3
+import string
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+from connection_pool import ConnectionPool
+from migrations import migrate
+from query_cache import QueryCache
+from student import Student, STUDENT_FIELDS
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+MAX_SQL_PARAMS = 900
+
+CONFLICT_MODES = ('skip', 'replace', 'fail')
+
+JOURNAL_MODES = ('delete', 'truncate', 'persist', 'memory', 'wal', 'off')
+SYNCHRONOUS_MODES = ('off', 'normal', 'full', 'extra')
+TEMP_STORE_MODES = ('default', 'file', 'memory')
+
+# Explicit column list so row tuples always line up with STUDENT_FIELDS
+STUDENT_COLUMNS = ', '.join(STUDENT_FIELDS)
+
+# Fields that can be changed in place; the ID identifies the row
+UPDATABLE_FIELDS = STUDENT_FIELDS[1:]
+
+# Cache tag for results that depend on the students table as a whole
+ALL_STUDENTS = 'students'
+
+# Keeps students_fts in step with inserted rows; bulk_add_students drops it
+# for the length of a batch and indexes the batch in one statement instead
+FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts (rowid, student_id, name, email, phone)
+        VALUES (new.rowid, new.student_id, new.name, new.email, new.phone);
+    END
+'''
+
+# Word characters as the FTS5 unicode61 tokenizer sees them
+SEARCH_TOKEN = re.compile(r'\w+')
+
+# (label, lowest age, highest age) for the statistics age histogram
+AGE_BUCKETS = [
+    ('Under 13', None, 12),
+    ('13-15', 13, 15),
+    ('16-18', 16, 18),
+    ('19-22', 19, 22),
+    ('23-30', 23, 30),
+    ('Over 30', 31, None),
+]
+
+
+def age_bucket(age):
+    """Return the AGE_BUCKETS label for an age"""
+    for label, low, high in AGE_BUCKETS:
+        if (low is None or age >= low) and (high is None or age <= high):
+            return label
+
+
+def _age_bucket_sql(column):
+    """SQL CASE expression mapping column to its AGE_BUCKETS label"""
+    cases = []
+    for label, low, high in AGE_BUCKETS:
+        conditions = []
+        if low is not None:
+            conditions.append(f"{column} >= {low}")
+        if high is not None:
+            conditions.append(f"{column} <= {high}")
+        cases.append(f"WHEN {' AND '.join(conditions)} THEN '{label}'")
+    return f"CASE {' '.join(cases)} END"
+
+
+EMAIL_DOMAIN_SQL = "lower(substr({0}, instr({0}, '@') + 1))"
+
+# SQLite's lower() only folds ASCII letters; str.translate with this matches it
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+# Public Database methods timed by enable_profiling()
+PROFILED_METHODS = (
+    'add_student', 'bulk_add_students', 'update_student', 'delete_student',
+    'bulk_update', 'bulk_delete', 'archive_students', 'restore_students',
+    'get_all_students', 'get_students_page', 'get_student_key_at', 'search_student',
+    'fuzzy_search',
+    'get_student', 'find_by_email', 'get_student_count', 'statistics',
+)
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items without materializing the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Database:
+    def __init__(self, db_name="students.db", use_fts=True, materialized_stats=False,
+                 journal_mode='wal', synchronous='normal', cache_size=-16000,
+                 mmap_size=256 * 2 ** 20, temp_store='memory', read_pool_size=4,
+                 timeout=5.0, query_cache_bytes=32 * 2 ** 20, profiler=None,
+                 fuzzy_index=False, archive_name=None):
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"journal_mode must be one of {JOURNAL_MODES}")
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_MODES}")
+        if temp_store not in TEMP_STORE_MODES:
+            raise ValueError(f"temp_store must be one of {TEMP_STORE_MODES}")
+        self.db_name = db_name
+        self.synchronous = synchronous
+        self.cache_size = int(cache_size)
+        self.mmap_size = int(mmap_size)
+        self.temp_store = temp_store
+        self.timeout = timeout
+        self.archive_name = archive_name
+        self.profiler = None
+
+        # One writer connection, shared by all threads under write_lock
+        self.write_lock = threading.RLock()
+        self.conn = self._connect()
+        self.cursor = self.conn.cursor()
+        self.journal_mode = self.cursor.execute(f'PRAGMA journal_mode = {journal_mode}').fetchone()[0]
+
+        # Readers get their own connections so they never wait for the writer
+        # (an in-memory database cannot be shared, so it reads via the writer)
+        self._local = threading.local()
+        self.pool = None
+        if read_pool_size and db_name != ':memory:' and not db_name.startswith('file::memory:'):
+            self.pool = ConnectionPool(lambda: self._connect(read_only=True), read_pool_size)
+
+        # Query results are memoized until a write (ours or another process's) invalidates them
+        self.query_cache = QueryCache(query_cache_bytes) if query_cache_bytes else None
+        self._data_version = None
+
+        self.create_table()
+        with self.write_lock:
+            migrate(self.conn)
+        self.fts_enabled = use_fts and self.create_search_index()
+        self.archive_fts_enabled = False
+        if archive_name is not None:
+            self.create_archive_table(use_fts)
+        if materialized_stats:
+            self.create_summary_table()
+        # A summary left wrong by an older version is not read until rebuilt
+        with self.write_lock:
+            self.summary_enabled = self._summary_is_current()
+            self.conn.commit()
+        if fuzzy_index:
+            self.create_fuzzy_index()
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'fuzzy_names'")
+        self.fuzzy_enabled = self.cursor.fetchone() is not None
+        if profiler is not None:
+            self.enable_profiling(profiler)
+
+    def _connect(self, read_only=False):
+        """Open a connection with the configured pragmas applied"""
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False,
+                               isolation_level=None if read_only else '')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA cache_size = {self.cache_size}')
+        conn.execute(f'PRAGMA mmap_size = {self.mmap_size}')
+        conn.execute(f'PRAGMA temp_store = {self.temp_store}')
+        if self.archive_name is not None:
+            # Every connection sees archived students as archive.students
+            conn.execute('ATTACH DATABASE ? AS archive', (self.archive_name,))
+            conn.execute(f'PRAGMA archive.synchronous = {self.synchronous}')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        if self.profiler is not None:
+            conn.set_trace_callback(self.profiler.trace)
+        return conn
+
+    def _connections(self):
+        """The writer connection and every pooled read connection opened so far"""
+        return [self.conn] + (self.pool.connections() if self.pool is not None else [])
+
+    def enable_profiling(self, profiler=None):
+        """Time the public methods and trace SQL into profiler (a new one by default)
+
+        Returns the profiler. Until this is called nothing is timed or traced.
+        """
+        from profiling import Profiler
+        if self.profiler is not None:
+            self.disable_profiling()
+        self.profiler = profiler or Profiler()
+        self.profiler.instrument(self, PROFILED_METHODS, 'Database')
+        for conn in self._connections():
+            conn.set_trace_callback(self.profiler.trace)
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop timing and tracing; returns the profiler that was in use"""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.uninstrument(self, PROFILED_METHODS)
+            for conn in self._connections():
+                conn.set_trace_callback(None)
+            self.profiler = None
+        return profiler
+
+    @contextmanager
+    def reader(self):
+        """Borrow a connection for reading
+
+        Uses the connection pinned to this thread by pin_reader() if there is
+        one, else a pooled read connection, else the writer connection.
+        """
+        pinned = getattr(self._local, 'conn', None)
+        if pinned is not None:
+            yield pinned
+        elif self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with self.write_lock:
+                yield self.conn
+
+    def pin_thread_reader(self):
+        """Dedicate a pooled read connection to the calling thread
+
+        Meant for long-lived worker threads; the connection stays pinned
+        until unpin_thread_reader(). Does nothing without a read pool.
+        """
+        if self.pool is not None and getattr(self._local, 'conn', None) is None:
+            self._local.conn = self.pool.acquire()
+
+    def unpin_thread_reader(self):
+        """Give the calling thread's pinned connection back to the pool"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            self.pool.release(conn)
+
+    @contextmanager
+    def pin_reader(self):
+        """Route every read made by this thread through one connection
+
+        Lets a background job interrupt() its own queries.
+        """
+        with self.reader() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+
+    def _cached(self, key, tags, compute):
+        """Return a memoized query result, computing and storing it on a miss"""
+        if self.query_cache is None:
+            return compute()
+        self._check_data_version()
+        found, value = self.query_cache.get(key)
+        if not found:
+            generation = self.query_cache.generation
+            value = compute()
+            self.query_cache.put(key, value, tags, generation)
+        # Callers may modify the list they get back, so never hand out the cached one
+        return list(value) if isinstance(value, list) else value
+
+    def _check_data_version(self):
+        """Drop the whole cache if another connection committed a change
+
+        PRAGMA data_version on the writer connection only moves when some
+        other connection (e.g. another process) commits. Our own writes
+        invalidate precisely instead. The check is skipped while this process
+        is writing, as that write invalidates the cache itself.
+        """
+        if not self.write_lock.acquire(blocking=False):
+            return
+        try:
+            version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        finally:
+            self.write_lock.release()
+        if version != self._data_version:
+            if self._data_version is not None:
+                self.query_cache.invalidate()
+            self._data_version = version
+
+    def _invalidate(self, student_ids=None):
+        """Forget cached results a write may have changed
+
+        With student_ids, only whole-table results and lookups of those
+        students are dropped; without, the whole cache is cleared.
+        """
+        if self.query_cache is None:
+            return
+        if student_ids is None:
+            self.query_cache.invalidate()
+        else:
+            self.query_cache.invalidate([ALL_STUDENTS] + [('student', i) for i in student_ids])
+
+    def cache_stats(self):
+        """Return the query cache hit/miss counters, or None if caching is off"""
+        return self.query_cache.stats() if self.query_cache is not None else None
+
+    def create_table(self):
+        """Create students table if it doesn't exist"""
+        self.cursor.execute('''
+                            CREATE TABLE IF NOT EXISTS students
+                            (
+                                student_id
+                                TEXT
+                                PRIMARY
+                                KEY,
+                                name
+                                TEXT
+                                NOT
+                                NULL,
+                                age
+                                INTEGER,
+                                grade
+                                TEXT,
+                                email
+                                TEXT,
+                                phone
+                                TEXT
+                            )
+                            ''')
+        self.conn.commit()
+
+    def create_archive_table(self, use_fts=True):
+        """Create archive.students, where archive_students() moves inactive students
+
+        It has the columns of students plus archived_at (a Unix time), uses
+        the roster's journal mode, so reads never wait for a move, and has its
+        own FTS5 index so searches including it match the way roster searches
+        do.
+        """
+        with self.write_lock:
+            self.cursor.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'students_fts'")
+            fts_is_new = self.cursor.fetchone() is None
+            self.cursor.execute(f'PRAGMA archive.journal_mode = {self.journal_mode}')
+            self.cursor.executescript('''
+                CREATE TABLE IF NOT EXISTS archive.students (
+                    student_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    age INTEGER,
+                    grade TEXT,
+                    email TEXT,
+                    phone TEXT,
+                    archived_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS archive.idx_archived_name_id ON students (name, student_id);
+            ''')
+            if not use_fts:
+                return
+            try:
+                self.cursor.execute('''
+                                    CREATE VIRTUAL TABLE IF NOT EXISTS archive.students_fts USING fts5(
+                                        student_id, name, email, phone,
+                                        content='students', content_rowid='rowid',
+                                        prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+                                    )
+                                    ''')
+            except sqlite3.OperationalError:
+                return  # No FTS5 module, archived students are searched with LIKE
+            self.cursor.executescript('''
+                CREATE TRIGGER IF NOT EXISTS archive.archived_fts_insert AFTER INSERT ON students BEGIN
+                    INSERT INTO students_fts (rowid, student_id, name, email, phone)
+                    VALUES (new.rowid, new.student_id, new.name, new.email, new.phone);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS archive.archived_fts_delete AFTER DELETE ON students BEGIN
+                    INSERT INTO students_fts (students_fts, rowid, student_id, name, email, phone)
+                    VALUES ('delete', old.rowid, old.student_id, old.name, old.email, old.phone);
+                END;
+
+                CREATE TRIGGER IF NOT EXISTS archive.archived_fts_update AFTER UPDATE ON students BEGIN
+                    INSERT INTO students_fts (students_fts, rowid, student_id, name, email, phone)
+                    VALUES ('delete', old.rowid, old.student_id, old.name, old.email, old.phone);
+                    INSERT INTO students_fts (rowid, student_id, name, email, phone)
+                    VALUES (new.rowid, new.student_id, new.name, new.email, new.phone);
+                END;
+            ''')
+            if fts_is_new:
+                # Index the students archived before the search index existed
+                self.cursor.execute("INSERT INTO archive.students_fts (students_fts) VALUES ('rebuild')")
+                self.conn.commit()
+        self.archive_fts_enabled = True
+
+    def create_search_index(self):
+        """Create the FTS5 search index and the triggers keeping it in sync
+
+        Returns False if this SQLite build was compiled without FTS5.
+        """
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'students_fts'")
+        is_new = self.cursor.fetchone() is None
+        try:
+            self.cursor.execute('''
+                                CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+                                    student_id, name, email, phone,
+                                    content='students', content_rowid='rowid',
+                                    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+                                )
+                                ''')
+        except sqlite3.OperationalError:
+            return False  # No FTS5 module, search_student falls back to LIKE
+
+        self.cursor.executescript(f'''
+            {FTS_INSERT_TRIGGER};
+
+            CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+                INSERT INTO students_fts (students_fts, rowid, student_id, name, email, phone)
+                VALUES ('delete', old.rowid, old.student_id, old.name, old.email, old.phone);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE ON students BEGIN
+                INSERT INTO students_fts (students_fts, rowid, student_id, name, email, phone)
+                VALUES ('delete', old.rowid, old.student_id, old.name, old.email, old.phone);
+                INSERT INTO students_fts (rowid, student_id, name, email, phone)
+                VALUES (new.rowid, new.student_id, new.name, new.email, new.phone);
+            END;
+        ''')
+        if is_new:
+            # Index the rows that existed before the search index did
+            self.rebuild_search_index()
+        return True
+
+    def rebuild_search_index(self):
+        """Re-index every student from the table, e.g. after a VACUUM renumbered rowids
+
+        Covers the archive's search index too. Cached results a stale index
+        may have produced are dropped.
+        """
+        schemas = ['main'] + (['archive'] if self.archive_name is not None else [])
+        with self.write_lock:
+            for schema in schemas:
+                self.cursor.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'students_fts'")
+                if self.cursor.fetchone() is not None:
+                    self.cursor.execute(
+                        f"INSERT INTO {schema}.students_fts (students_fts) VALUES ('rebuild')")
+            self.conn.commit()
+        self._invalidate()
+
+    def vacuum(self):
+        """Rewrite the database (and archive) files to reclaim the space of removed rows
+
+        VACUUM may renumber the rowids the search indexes point at, so they
+        are rebuilt afterwards.
+        """
+        with self.write_lock:
+            self.conn.commit()
+            self.cursor.execute('VACUUM')
+            if self.archive_name is not None:
+                self.cursor.execute('VACUUM archive')
+            self.rebuild_search_index()
+
+    def create_summary_table(self):
+        """Create the materialized statistics summary and its maintenance triggers
+
+        student_summary holds one count per (dimension, value): the total, each
+        age, each grade and each email domain, so statistics() never has to
+        read the students table. Holds write_lock throughout, so it may run on
+        a background thread while other threads keep writing. The table, its
+        triggers and the backfill are one transaction, so other processes
+        never write in between and an interrupted build leaves nothing
+        behind. A summary whose total disagrees with the students table is
+        rebuilt.
+        """
+        with self.write_lock:
+            domain_new = EMAIL_DOMAIN_SQL.format('new.email')
+            domain_old = EMAIL_DOMAIN_SQL.format('old.email')
+            add_new = f'''
+                    INSERT INTO student_summary (dimension, value, count)
+                    SELECT 'age', new.age, 1 WHERE new.age IS NOT NULL
+                    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+                    INSERT INTO student_summary (dimension, value, count)
+                    SELECT 'grade', new.grade, 1 WHERE new.grade IS NOT NULL AND new.grade != ''
+                    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+                    INSERT INTO student_summary (dimension, value, count)
+                    SELECT 'domain', {domain_new}, 1 WHERE instr(new.email, '@') > 0
+                    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+            '''
+            remove_old = f'''
+                    UPDATE student_summary SET count = count - 1
+                    WHERE (dimension = 'age' AND value = old.age)
+                       OR (dimension = 'grade' AND value = old.grade)
+                       OR (dimension = 'domain' AND instr(old.email, '@') > 0 AND value = {domain_old});
+                    DELETE FROM student_summary
+                    WHERE count = 0
+                      AND ((dimension = 'age' AND value = old.age)
+                       OR (dimension = 'grade' AND value = old.grade)
+                       OR (dimension = 'domain' AND value = {domain_old}));
+            '''
+            try:
+                self.cursor.executescript(f'''
+                    BEGIN IMMEDIATE;
+                    CREATE TABLE IF NOT EXISTS student_summary (
+                        dimension TEXT NOT NULL,
+                        value,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (dimension, value)
+                    );
+
+                    CREATE TRIGGER IF NOT EXISTS students_summary_insert AFTER INSERT ON students BEGIN
+                        INSERT INTO student_summary (dimension, value, count) VALUES ('total', '', 1)
+                        ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+                        {add_new}
+                    END;
+
+                    CREATE TRIGGER IF NOT EXISTS students_summary_delete AFTER DELETE ON students BEGIN
+                        UPDATE student_summary SET count = count - 1
+                        WHERE dimension = 'total' AND value = '';
+                        {remove_old}
+                    END;
+
+                    CREATE TRIGGER IF NOT EXISTS students_summary_update
+                    AFTER UPDATE OF age, grade, email ON students BEGIN
+                        {remove_old}
+                        {add_new}
+                    END;
+                ''')
+                if not self._summary_is_current():
+                    # Summarize the rows that existed before the summary did
+                    self.cursor.execute('DELETE FROM student_summary')
+                    for query in (
+                            "SELECT 'total', '', COUNT(*) FROM students",
+                            "SELECT 'age', age, COUNT(*) FROM students "
+                            "WHERE age IS NOT NULL GROUP BY age",
+                            "SELECT 'grade', grade, COUNT(*) FROM students "
+                            "WHERE grade IS NOT NULL AND grade != '' GROUP BY grade",
+                            f"SELECT 'domain', {EMAIL_DOMAIN_SQL.format('email')}, COUNT(*) "
+                            f"FROM students WHERE instr(email, '@') > 0 GROUP BY 2"):
+                        self.cursor.execute('INSERT INTO student_summary (dimension, value, count) '
+                                            + query)
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+        self.summary_enabled = True
+        self._invalidate()
+
+    def _summary_is_current(self):
+        """True if student_summary exists and its total matches the students table"""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'student_summary'")
+        if self.cursor.fetchone() is None:
+            return False
+        self.cursor.execute("SELECT count FROM student_summary WHERE dimension = 'total' AND value = ''")
+        total = self.cursor.fetchone()
+        self.cursor.execute('SELECT COUNT(*) FROM students')
+        return total is not None and total[0] == self.cursor.fetchone()[0]
+
+    def create_fuzzy_index(self):
+        """Create the word and trigram index behind fuzzy_search() and its triggers
+
+        fuzzy_names counts the students with each distinct name, name_words
+        lists the words of those names, name_vocabulary counts the names using
+        each word and vocabulary_trigrams holds the trigrams of every word.
+        Typos are matched against the vocabulary, which stays small however
+        many students there are. trigram_positions only numbers character
+        offsets, as trigger bodies cannot use a recursive CTE to walk a string.
+        Like create_summary_table, it may run on a background thread. The
+        tables and triggers are defined in fuzzy.py.
+        """
+        from fuzzy import index_script
+
+        with self.write_lock:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'fuzzy_names'")
+            is_new = self.cursor.fetchone() is None
+            self.cursor.executescript(index_script(is_new))
+        self.fuzzy_enabled = True
+        self._invalidate()
+
+    def add_student(self, student):
+        """Add a new student to database, returning it or False if the ID exists"""
+        with self.write_lock:
+            try:
+                self.cursor.execute('''
+                                    INSERT INTO students (student_id, name, age, grade, email, phone)
+                                    VALUES (?, ?, ?, ?, ?, ?)
+                                    ''', (student.student_id, student.name, student.age,
+                                          student.grade, student.email, student.phone))
+                self.conn.commit()
+                self._invalidate([student.student_id])
+                return student
+            except sqlite3.IntegrityError:
+                self.conn.rollback()
+                return False  # Student ID already exists
+
+    def bulk_add_students(self, students, batch_size=1000, on_conflict='skip', progress=None):
+        """Add many students using executemany, one transaction per batch
+
+        on_conflict controls rows whose student ID is already taken: 'skip'
+        rejects them, 'replace' overwrites the stored row and 'fail' rolls back
+        the current batch and re-raises sqlite3.IntegrityError naming the
+        first conflicting student ID (earlier batches stay committed). The
+        iterable is consumed lazily, batch_size rows at a time. If given,
+        progress(batch_number, inserted, rejected) is called after every
+        committed batch, with rejected holding (student, reason) pairs for
+        that batch.
+
+        With the search index, each batch's new rows are indexed by a single
+        statement while the per-row insert trigger is dropped, which is about
+        four times faster; the trigger is back before the batch commits.
+        """
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"on_conflict must be one of {CONFLICT_MODES}")
+
+        result = {'inserted': 0, 'rejected': [], 'batches': 0}
+        for batch_number, batch in enumerate(chunked(students, batch_size), 1):
+            try:
+                accepted, rejected = self._insert_batch(batch, on_conflict)
+            except sqlite3.IntegrityError as e:
+                student_id = self._conflicting_id(batch)
+                if student_id is None:
+                    raise
+                raise sqlite3.IntegrityError(f"{e}: student ID {student_id!r} "
+                                             f"in batch {batch_number}") from e
+            self._invalidate([s.student_id for s in accepted])
+
+            result['inserted'] += len(accepted)
+            result['rejected'].extend((s.student_id, reason) for s, reason in rejected)
+            result['batches'] = batch_number
+            if progress:
+                progress(batch_number, result['inserted'], rejected)
+        return result
+
+    def _insert_batch(self, batch, on_conflict):
+        """Screen and insert one batch in its own transaction; returns (accepted, rejected)"""
+        with self.write_lock, self.conn:
+            accepted, rejected = self._screen_batch(batch, on_conflict)
+            rows = [s.to_tuple() for s in accepted]
+            index_batch = self.fts_enabled and rows
+            if index_batch:
+                # New rows get rowids above the current maximum
+                self.cursor.execute('BEGIN')
+                self.cursor.execute('SELECT max(rowid) FROM students')
+                last_rowid = self.cursor.fetchone()[0] or 0
+                self.cursor.execute('DROP TRIGGER IF EXISTS students_fts_insert')
+            if on_conflict == 'replace':
+                # An upsert keeps the row in place, so UPDATE triggers fire
+                # instead of the DELETE+INSERT done by INSERT OR REPLACE
+                self.cursor.executemany('''
+                                        INSERT INTO students (student_id, name, age, grade, email, phone)
+                                        VALUES (?, ?, ?, ?, ?, ?)
+                                        ON CONFLICT(student_id) DO UPDATE SET
+                                            name = excluded.name,
+                                            age = excluded.age,
+                                            grade = excluded.grade,
+                                            email = excluded.email,
+                                            phone = excluded.phone
+                                        ''', rows)
+            else:
+                self.cursor.executemany('''
+                                        INSERT INTO students (student_id, name, age, grade, email, phone)
+                                        VALUES (?, ?, ?, ?, ?, ?)
+                                        ''', rows)
+            if index_batch:
+                # Rows updated by 'replace' were re-indexed by the update trigger
+                self.cursor.execute('''
+                                    INSERT INTO students_fts (rowid, student_id, name, email, phone)
+                                    SELECT rowid, student_id, name, email, phone
+                                    FROM students WHERE rowid > ?
+                                    ''', (last_rowid,))
+                self.cursor.execute(FTS_INSERT_TRIGGER)
+        return accepted, rejected
+
+    def _conflicting_id(self, students):
+        """Return the first student ID in students that repeats or is already stored"""
+        ids = [s.student_id for s in students if s.student_id]
+        existing = set()
+        with self.reader() as conn:
+            for chunk in chunked(ids, MAX_SQL_PARAMS):
+                existing.update(row[0] for row in conn.execute(
+                    f"SELECT student_id FROM students WHERE student_id IN "
+                    f"({', '.join('?' * len(chunk))})", chunk))
+        seen = set()
+        for student_id in ids:
+            if student_id in seen or student_id in existing:
+                return student_id
+            seen.add(student_id)
+        return None
+
+    def write_behind(self, max_pending=500, max_delay=0.5):
+        """Return a WriteBehindQueue that group-commits mutations to this database"""
+        from write_queue import WriteBehindQueue
+        return WriteBehindQueue(self, max_pending=max_pending, max_delay=max_delay)
+
+    def _screen_batch(self, batch, on_conflict):
+        """Split a batch into insertable students and (student, reason) rejects
+
+        Must be called with write_lock held.
+        """
+        accepted = []
+        rejected = []
+        seen = {}
+        for student in batch:
+            if not student.student_id:
+                rejected.append((student, 'missing student ID'))
+            elif not student.name:
+                rejected.append((student, 'missing name'))
+            elif student.student_id in seen and on_conflict == 'skip':
+                rejected.append((student, 'duplicate student ID in input'))
+            else:
+                if student.student_id in seen and on_conflict == 'replace':
+                    # Last occurrence wins, like it would across batches
+                    accepted[seen[student.student_id]] = student
+                    continue
+                seen[student.student_id] = len(accepted)
+                accepted.append(student)
+
+        if on_conflict != 'skip' or not accepted:
+            return accepted, rejected
+
+        existing = set()
+        ids = [s.student_id for s in accepted]
+        for chunk in chunked(ids, MAX_SQL_PARAMS):
+            placeholders = ', '.join('?' * len(chunk))
+            self.cursor.execute(
+                f'SELECT student_id FROM students WHERE student_id IN ({placeholders})', chunk)
+            existing.update(row[0] for row in self.cursor.fetchall())
+
+        if existing:
+            rejected.extend((s, 'student ID already exists') for s in accepted
+                            if s.student_id in existing)
+            accepted = [s for s in accepted if s.student_id not in existing]
+        return accepted, rejected
+
+    def _select(self, query, params=(), raw=False, tags=(ALL_STUDENTS,), cache=True):
+        """Run a student query on a read connection and return all rows
+
+        Rows come back as Student objects built by the row factory, or as
+        plain tuples in STUDENT_FIELDS order when raw is True. Results are
+        cached under tags until a write invalidates them, unless cache is
+        False.
+        """
+        def compute():
+            with self.reader() as conn:
+                profiler = self.profiler
+                if profiler is not None and not raw:
+                    # Time the query and building the Student objects separately
+                    with profiler.span('Database.sql'):
+                        rows = conn.execute(query, params).fetchall()
+                    with profiler.span('Student construction'):
+                        return [Student(*row) for row in rows]
+                cursor = conn.cursor()
+                if not raw:
+                    cursor.row_factory = Student.from_row
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+        if not cache:
+            return compute()
+        return self._cached(('select', query, tuple(params), raw), tags, compute)
+
+    def _scalar(self, query, params=()):
+        """Run a query returning a single value on a read connection"""
+        def compute():
+            with self.reader() as conn:
+                row = conn.execute(query, params).fetchone()
+                return row[0] if row else None
+
+        return self._cached(('scalar', query, tuple(params)), (ALL_STUDENTS,), compute)
+
+    def get_all_students(self, raw=False):
+        """Retrieve all students"""
+        return self._select(f'SELECT {STUDENT_COLUMNS} FROM students ORDER BY name, student_id',
+                            raw=raw)
+
+    def iter_students(self, batch_size=1000, raw=False):
+        """Yield all students in name order, fetching batch_size rows at a time
+
+        Holds one read connection until the iteration finishes or is closed.
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            if not raw:
+                cursor.row_factory = Student.from_row
+            cursor.execute(f'SELECT {STUDENT_COLUMNS} FROM students ORDER BY name, student_id')
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def get_students_page(self, limit=100, after=None, before=None, raw=False, cache=True):
+        """Fetch one page of students in (name, student_id) order
+
+        Uses keyset pagination: after/before are the (name, student_id) key of
+        the row just outside the requested page, so every page costs an index
+        seek instead of an OFFSET scan. Pass cache=False when walking the
+        whole roster, so the pages do not evict other cached results.
+        """
+        if after is not None:
+            rows = self._select(f'''
+                                SELECT {STUDENT_COLUMNS}
+                                FROM students
+                                WHERE (name, student_id) > (?, ?)
+                                ORDER BY name, student_id
+                                LIMIT ?
+                                ''', (after[0], after[1], limit), raw, cache=cache)
+        elif before is not None:
+            rows = self._select(f'''
+                                SELECT {STUDENT_COLUMNS}
+                                FROM students
+                                WHERE (name, student_id) < (?, ?)
+                                ORDER BY name DESC, student_id DESC
+                                LIMIT ?
+                                ''', (before[0], before[1], limit), raw, cache=cache)
+        else:
+            rows = self._select(f'''
+                                SELECT {STUDENT_COLUMNS}
+                                FROM students
+                                ORDER BY name, student_id
+                                LIMIT ?
+                                ''', (limit,), raw, cache=cache)
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    def query(self, sort='name', descending=False, **filters):
+        """Return a StudentQuery listing the students matching filters in sort order
+
+        See StudentQuery for the filters (grades, min_age, max_age,
+        email_domain). Refine it further with filter() and order_by().
+        """
+        from student_query import StudentQuery
+        return StudentQuery(self, sort, descending, **filters)
+
+    def get_student_key_at(self, position):
+        """Return the (name, student_id) key at a position in name order, or None"""
+        rows = self._select('''
+                            SELECT name, student_id
+                            FROM students
+                            ORDER BY name, student_id
+                            LIMIT 1 OFFSET ?
+                            ''', (position,), raw=True)
+        return rows[0] if rows else None
+
+    def search_student(self, search_term, raw=False, include_archived=False):
+        """Search students by ID, name, email or phone
+
+        With FTS5 every word of search_term is matched as a prefix and results
+        are ranked by relevance; otherwise a LIKE substring scan is used.
+        With include_archived, matching archived students follow those on the
+        roster.
+        """
+        rows = self._search('main', self.fts_enabled, search_term, raw)
+        if include_archived and self.archive_name is not None:
+            rows += self._search('archive', self.archive_fts_enabled, search_term, raw)
+        return rows
+
+    def _search(self, schema, use_fts, search_term, raw):
+        """search_student over the students table of one attached database"""
+        # A student briefly in both during a move is listed once, from the roster
+        where = ('AND s.student_id NOT IN (SELECT student_id FROM main.students)'
+                 if schema != 'main' else '')
+        tokens = SEARCH_TOKEN.findall(search_term)
+        if use_fts and tokens:
+            # Quote each word so FTS5 operators typed by the user stay literal
+            query = ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+            columns = ', '.join('s.' + field for field in STUDENT_FIELDS)
+            return self._select(f'''
+                                SELECT {columns}
+                                FROM {schema}.students_fts
+                                JOIN {schema}.students s ON s.rowid = students_fts.rowid
+                                WHERE students_fts MATCH ? {where}
+                                ORDER BY students_fts.rank, s.name
+                                ''', (query,), raw)
+        pattern = f'%{search_term}%'
+        return self._select(f'''
+                            SELECT {STUDENT_COLUMNS}
+                            FROM {schema}.students s
+                            WHERE (student_id LIKE ?
+                                OR name LIKE ?
+                                OR email LIKE ?
+                                OR phone LIKE ?) {where}
+                            ORDER BY name
+                            ''', (pattern, pattern, pattern, pattern), raw)
+
+    def fuzzy_search(self, search_term, limit=50, threshold=0.3, raw=False):
+        """Search student names tolerating typos, best match first
+
+        Every word of search_term must resemble some word of the name, by
+        fuzzy.word_similarity() of at least threshold, so "Jonson" finds "Johnson".
+        A name scores the sum of those similarities. With the index (see
+        create_fuzzy_index) only vocabulary words sharing one of the rarest
+        trigrams are compared; without it every distinct name is.
+        """
+        import fuzzy
+
+        terms = sorted(fuzzy.name_words(search_term))
+        if not terms:
+            return []
+
+        def compute():
+            with self.reader() as conn:
+                rows = fuzzy.search(conn, terms, limit, threshold, self.fuzzy_enabled)
+            return rows if raw else [Student(*row) for row in rows]
+
+        return self._cached(('fuzzy', tuple(terms), limit, threshold, raw), (ALL_STUDENTS,), compute)
+
+    def get_student(self, student_id, include_archived=False):
+        """Retrieve one student by ID, or None
+
+        With include_archived, a student not on the roster is looked up in the
+        archive as well.
+        """
+        rows = self._select(f'SELECT {STUDENT_COLUMNS} FROM students WHERE student_id = ?',
+                            (student_id,), tags=(('student', student_id),))
+        if not rows and include_archived and self.archive_name is not None:
+            rows = self._select(f'SELECT {STUDENT_COLUMNS} FROM archive.students WHERE student_id = ?',
+                                (student_id,), tags=(('student', student_id),))
+        return rows[0] if rows else None
+
+    def _get_for_write(self, student_id):
+        """Read one student through the writer connection; needs write_lock"""
+        self.cursor.execute(f'SELECT {STUDENT_COLUMNS} FROM students WHERE student_id = ?',
+                            (student_id,))
+        row = self.cursor.fetchone()
+        return Student(*row) if row else None
+
+    def update_student(self, student_id, **kwargs):
+        """Update student information, returning the updated student or None"""
+        fields = []
+        values = []
+        for key, value in kwargs.items():
+            if value is not None:
+                fields.append(f"{key} = ?")
+                values.append(value)
+
+        if fields:
+            query = f"UPDATE students SET {', '.join(fields)} WHERE student_id = ?"
+            values.append(student_id)
+            with self.write_lock:
+                self.cursor.execute(query, values)
+                self.conn.commit()
+                if self.cursor.rowcount > 0:
+                    self._invalidate([student_id])
+                    return self._get_for_write(student_id)
+        return None
+
+    def delete_student(self, student_id):
+        """Delete a student by ID, returning the deleted student or None"""
+        with self.write_lock:
+            student = self._get_for_write(student_id)
+            if student is None:
+                return None
+            self.cursor.execute('DELETE FROM students WHERE student_id = ?', (student_id,))
+            self.conn.commit()
+            self._invalidate([student_id])
+            return student
+
+    def bulk_update(self, student_ids, **kwargs):
+        """Set the same fields on many students in one transaction
+
+        None values are ignored, as in update_student. Updates run as chunked
+        UPDATE ... WHERE student_id IN (...) statements. Returns the updated
+        students; IDs that do not exist are skipped.
+        """
+        unknown = set(kwargs) - set(UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update {', '.join(sorted(unknown))}")
+        fields = {key: value for key, value in kwargs.items() if value is not None}
+        student_ids = list(dict.fromkeys(student_ids))
+        if not fields or not student_ids:
+            return []
+
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        values = list(fields.values())
+        updated = []
+        with self.write_lock, self.conn:
+            for chunk in chunked(student_ids, MAX_SQL_PARAMS - len(values)):
+                placeholders = ', '.join('?' * len(chunk))
+                self.cursor.execute(f'UPDATE students SET {assignments} '
+                                    f'WHERE student_id IN ({placeholders})', values + chunk)
+                self.cursor.execute(f'SELECT {STUDENT_COLUMNS} FROM students '
+                                    f'WHERE student_id IN ({placeholders})', chunk)
+                updated += [Student(*row) for row in self.cursor.fetchall()]
+        self._invalidate(student_ids)
+        return updated
+
+    def bulk_delete(self, student_ids):
+        """Delete many students in one transaction, returning the deleted students"""
+        student_ids = list(dict.fromkeys(student_ids))
+        deleted = []
+        with self.write_lock, self.conn:
+            for chunk in chunked(student_ids, MAX_SQL_PARAMS):
+                placeholders = ', '.join('?' * len(chunk))
+                self.cursor.execute(f'SELECT {STUDENT_COLUMNS} FROM students '
+                                    f'WHERE student_id IN ({placeholders})', chunk)
+                deleted += [Student(*row) for row in self.cursor.fetchall()]
+                self.cursor.execute(f'DELETE FROM students WHERE student_id IN ({placeholders})',
+                                    chunk)
+        self._invalidate(student_ids)
+        return deleted
+
+    def archive_students(self, student_ids, batch_size=5000, progress=None):
+        """Move students from the roster into the archive, batch_size at a time
+
+        Each batch is copied into the archive and committed before it is
+        deleted from the roster: SQLite does not commit a WAL transaction
+        atomically across attached files, and this way a crash in between
+        leaves a batch in both, never in neither. Archiving the same IDs
+        again finishes the move. The delete triggers fire as usual, so
+        archived students also leave the search indexes, the statistics and,
+        as deletions, the change log replicas sync from. If given,
+        progress(done, total) is called after every batch, counting the
+        requested IDs. Returns the number of students moved.
+        """
+        self._require_archive()
+        student_ids = list(dict.fromkeys(student_ids))
+        moved = 0
+        for done, batch in enumerate(chunked(student_ids, batch_size), 1):
+            with self.write_lock:
+                archived_at = time.time()
+                with self.conn:
+                    for chunk in chunked(batch, MAX_SQL_PARAMS - 1):
+                        self.cursor.execute(f'''
+                                            INSERT INTO archive.students ({STUDENT_COLUMNS}, archived_at)
+                                            SELECT {STUDENT_COLUMNS}, ? FROM main.students
+                                            WHERE student_id IN ({', '.join('?' * len(chunk))})
+                                            ON CONFLICT (student_id) DO UPDATE SET
+                                                name = excluded.name,
+                                                age = excluded.age,
+                                                grade = excluded.grade,
+                                                email = excluded.email,
+                                                phone = excluded.phone,
+                                                archived_at = excluded.archived_at
+                                            ''', [archived_at] + chunk)
+                with self.conn:
+                    for chunk in chunked(batch, MAX_SQL_PARAMS):
+                        self.cursor.execute(f"DELETE FROM main.students "
+                                            f"WHERE student_id IN ({', '.join('?' * len(chunk))})", chunk)
+                        moved += self.cursor.rowcount
+            self._invalidate(batch)
+            if progress:
+                progress(min(done * batch_size, len(student_ids)), len(student_ids))
+        return moved
+
+    def restore_students(self, student_ids, batch_size=5000):
+        """Move archived students back onto the roster, batch_size at a time
+
+        Students whose ID is on the roster again (reused while they were
+        archived) stay in the archive. Commits in the same order as
+        archive_students, roster first. Returns the number of students
+        restored.
+        """
+        self._require_archive()
+        restored = 0
+        for batch in chunked(dict.fromkeys(student_ids), batch_size):
+            with self.write_lock:
+                ids = []
+                for chunk in chunked(batch, MAX_SQL_PARAMS):
+                    self.cursor.execute(f'''
+                                        SELECT student_id FROM archive.students
+                                        WHERE student_id IN ({', '.join('?' * len(chunk))})
+                                          AND student_id NOT IN (SELECT student_id FROM main.students)
+                                        ''', chunk)
+                    ids += [row[0] for row in self.cursor.fetchall()]
+                with self.conn:
+                    for chunk in chunked(ids, MAX_SQL_PARAMS):
+                        self.cursor.execute(f'''
+                                            INSERT INTO main.students ({STUDENT_COLUMNS})
+                                            SELECT {STUDENT_COLUMNS} FROM archive.students
+                                            WHERE student_id IN ({', '.join('?' * len(chunk))})
+                                            ''', chunk)
+                with self.conn:
+                    for chunk in chunked(ids, MAX_SQL_PARAMS):
+                        self.cursor.execute(f"DELETE FROM archive.students "
+                                            f"WHERE student_id IN ({', '.join('?' * len(chunk))})", chunk)
+            restored += len(ids)
+            self._invalidate(ids)
+        return restored
+
+    def _require_archive(self):
+        if self.archive_name is None:
+            raise RuntimeError("No archive attached; open the Database with archive_name")
+
+    def find_by_email(self, email):
+        """Retrieve students with this email address, ignoring case"""
+        return self._select(f'''
+                            SELECT {STUDENT_COLUMNS}
+                            FROM students
+                            WHERE email = ? COLLATE NOCASE
+                            ''', (email,))
+
+    def get_student_count(self, include_archived=False):
+        """Get total number of students
+
+        Read from the materialized summary when there is one, so it costs the
+        same for any roster size; otherwise counted. With include_archived,
+        archived students are counted too.
+        """
+        if self.summary_enabled:
+            count = self._scalar("SELECT count FROM student_summary "
+                                 "WHERE dimension = 'total' AND value = ''")
+        else:
+            count = self._scalar('SELECT COUNT(*) FROM students')
+        if include_archived and self.archive_name is not None:
+            count += self._scalar('SELECT COUNT(*) FROM archive.students '
+                                  'WHERE student_id NOT IN (SELECT student_id FROM main.students)')
+        return count
+
+    def statistics(self):
+        """Compute roster statistics in SQL within a single read transaction
+
+        Returns a dict with the student count, age count/average/min/max, and
+        grade, email domain and age bucket histograms. Uses the materialized
+        summary when it exists, so the cost does not grow with the roster.
+        The result is cached; treat it as read-only.
+        """
+        return self._cached(('statistics',), (ALL_STUDENTS,), self._compute_statistics)
+
+    def _compute_statistics(self):
+        if self.summary_enabled:
+            summary = {'total': {}, 'age': {}, 'grade': {}, 'domain': {}}
+            for dimension, value, count in self._select(
+                    'SELECT dimension, value, count FROM student_summary', raw=True):
+                summary[dimension][value] = count
+            ages = summary['age']
+            buckets = {}
+            for age, count in sorted(ages.items()):
+                label = age_bucket(age)
+                buckets[label] = buckets.get(label, 0) + count
+            age_count = sum(ages.values())
+            return {
+                'count': summary['total'].get('', 0),
+                'age_count': age_count,
+                'average_age': sum(a * n for a, n in ages.items()) / age_count if age_count else None,
+                'min_age': min(ages) if ages else None,
+                'max_age': max(ages) if ages else None,
+                'grades': dict(sorted(summary['grade'].items())),
+                'email_domains': dict(sorted(summary['domain'].items(), key=lambda item: -item[1])),
+                'age_buckets': {label: buckets[label] for label, _, _ in AGE_BUCKETS if label in buckets},
+            }
+
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            try:
+                cursor.execute('SELECT COUNT(*), COUNT(age), AVG(age), MIN(age), MAX(age) FROM students')
+                count, age_count, average_age, min_age, max_age = cursor.fetchone()
+
+                cursor.execute('''
+                               SELECT grade, COUNT(*)
+                               FROM students
+                               WHERE grade IS NOT NULL AND grade != ''
+                               GROUP BY grade
+                               ORDER BY grade
+                               ''')
+                grades = dict(cursor.fetchall())
+
+                cursor.execute(f'''
+                               SELECT {EMAIL_DOMAIN_SQL.format('email')} AS domain, COUNT(*)
+                               FROM students
+                               WHERE instr(email, '@') > 0
+                               GROUP BY domain
+                               ORDER BY COUNT(*) DESC
+                               ''')
+                email_domains = dict(cursor.fetchall())
+
+                cursor.execute(f'''
+                               SELECT {_age_bucket_sql('age')} AS bucket, COUNT(*)
+                               FROM students
+                               WHERE age IS NOT NULL
+                               GROUP BY bucket
+                               ''')
+                buckets = dict(cursor.fetchall())
+            finally:
+                conn.commit()
+
+        return {
+            'count': count,
+            'age_count': age_count,
+            'average_age': average_age,
+            'min_age': min_age,
+            'max_age': max_age,
+            'grades': grades,
+            'email_domains': email_domains,
+            'age_buckets': {label: buckets[label] for label, _, _ in AGE_BUCKETS if label in buckets},
+        }
+
+    def close(self):
+        """Close database connection"""
+        # Refresh planner statistics that drifted during this session
+        self.conn.execute('PRAGMA optimize')
+        if self.pool is not None:
+            self.pool.close()
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,189 @@
+import csv
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from database import chunked
+from student import STUDENT_FIELDS
+
+CSV_HEADERS = ['Student ID', 'Name', 'Age', 'Grade', 'Email', 'Phone']
+
+# Columnar format: magic, then row groups of "<I row count" followed by one
+# block per column, then a zero row count. Every block starts with one null
+# flag byte per row; the age block follows with little-endian int64 values,
+# string blocks with n + 1 uint32 offsets and the UTF-8 data they index.
+COLUMNAR_MAGIC = b'STUDCOL1'
+INT_FIELDS = ('age',)
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before it finishes"""
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_csv_batches(file, batches):
+    """Write batches of raw student tuples as CSV"""
+    writer = csv.writer(file)
+    writer.writerow(CSV_HEADERS)
+    for batch in batches:
+        writer.writerows(batch)
+
+
+def write_jsonl_batches(file, batches):
+    """Write batches of raw student tuples as JSON Lines"""
+    for batch in batches:
+        file.write(''.join(json.dumps(dict(zip(STUDENT_FIELDS, row))) + '\n' for row in batch))
+
+
+def write_columnar_batches(file, batches):
+    """Write batches of raw student tuples as columnar row groups"""
+    file.write(COLUMNAR_MAGIC)
+    for batch in batches:
+        file.write(struct.pack('<I', len(batch)))
+        for index, field in enumerate(STUDENT_FIELDS):
+            column = [row[index] for row in batch]
+            file.write(bytes(value is None for value in column))
+            if field in INT_FIELDS:
+                file.write(_little_endian(array('q', (v or 0 for v in column))))
+            else:
+                encoded = [b'' if v is None else str(v).encode('utf-8') for v in column]
+                offsets = array('I', [0])
+                for value in encoded:
+                    offsets.append(offsets[-1] + len(value))
+                file.write(_little_endian(offsets))
+                file.write(b''.join(encoded))
+    file.write(struct.pack('<I', 0))
+
+
+def read_columnar(filename):
+    """Yield raw student tuples from a columnar export, one row group at a time"""
+    with open(filename, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{filename} is not a columnar student export")
+        while True:
+            (count,) = struct.unpack('<I', file.read(4))
+            if count == 0:
+                return
+            columns = []
+            for field in STUDENT_FIELDS:
+                nulls = file.read(count)
+                if field in INT_FIELDS:
+                    values = _from_little_endian('q', file.read(8 * count))
+                else:
+                    offsets = _from_little_endian('I', file.read(4 * (count + 1)))
+                    data = file.read(offsets[-1])
+                    values = [data[offsets[i]:offsets[i + 1]].decode('utf-8')
+                              for i in range(count)]
+                columns.append([None if null else value for null, value in zip(nulls, values)])
+            yield from zip(*columns)
+
+
+# Extension -> (writer, file mode)
+EXPORT_FORMATS = {
+    '.csv': (write_csv_batches, 'w'),
+    '.jsonl': (write_jsonl_batches, 'w'),
+    '.scol': (write_columnar_batches, 'wb'),
+}
+
+
+def export_students(db, filename, batch_size=5000, progress=None, cancel_event=None):
+    """Stream every student from db into filename, picking the format by extension
+
+    Rows are read with fetchmany, batch_size at a time, so memory use does not
+    depend on the roster size. progress(done, total) is called after every
+    batch. Setting cancel_event stops the export with ExportCancelled; the
+    data is written to a temporary file that only replaces filename once the
+    export completes. Returns the number of students written.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {extension or filename}")
+    write_batches, mode = EXPORT_FORMATS[extension]
+
+    total = db.get_student_count()
+    done = 0
+
+    def batches():
+        nonlocal done
+        for batch in chunked(db.iter_students(batch_size, raw=True), batch_size):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+            yield batch
+            done += len(batch)
+            if progress:
+                progress(done, total)
+
+    temp_name = filename + '.part'
+    try:
+        if mode == 'wb':
+            with open(temp_name, mode) as file:
+                write_batches(file, batches())
+        else:
+            with open(temp_name, mode, newline='' if extension == '.csv' else None,
+                      encoding='utf-8') as file:
+                write_batches(file, batches())
+        os.replace(temp_name, filename)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    return done
+
+
+class ExportJob:
+    """Runs export_students on a background thread, reading from db's pool
+
+    The Tk thread polls done/total/finished and may call cancel().
+    """
+
+    def __init__(self, db, filename, batch_size=5000):
+        self.db = db
+        self.filename = filename
+        self.batch_size = batch_size
+        self.done = 0
+        self.total = 0
+        self.finished = False
+        self.cancelled = False
+        self.error = None
+        self._cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="export-job", daemon=True)
+
+    def start(self):
+        """Start exporting"""
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the export to stop after the current batch"""
+        self._cancel_event.set()
+
+    def _progress(self, done, total):
+        self.done = done
+        self.total = total
+
+    def _run(self):
+        try:
+            self.total = self.db.get_student_count()
+            export_students(self.db, self.filename, self.batch_size,
+                            progress=self._progress, cancel_event=self._cancel_event)
+        except ExportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
@@ -0,0 +1,296 @@
+"""Typo-tolerant name search over a word and trigram index
+
+Names are split into lower-cased words and every distinct word into padded
+trigrams; two words are similar by the share of trigrams they have in
+common. The index tables are kept in sync by SQL triggers, so any writer
+keeps them correct. Database.create_fuzzy_index() and
+Database.fuzzy_search() are the entry points.
+"""
+import math
+from itertools import product
+from database import ASCII_LOWER, STUDENT_COLUMNS
+from student import STUDENT_FIELDS
+
+# The fuzzy index splits lower-cased names into words at spaces and indexes
+# the trigrams of each distinct word, padded as '  word ' so that a typo
+# only spoils the trigrams around it
+MAX_NAME_LENGTH = 256
+
+# Vocabulary words counted per trigram when picking the rarest ones to look up
+TRIGRAM_COUNT_LIMIT = 10000
+
+# A fuzzy search for several words scores every name matching the least
+# common word when there are at most FUZZY_SCAN_LIMIT of them, or more than
+# FUZZY_MAX_COMBINATIONS combinations of similar words to look up instead
+FUZZY_SCAN_LIMIT = 2000
+FUZZY_MAX_COMBINATIONS = 256
+
+
+def name_words(name):
+    """Return the set of words the fuzzy index holds for name
+
+    Mirrors the SQL in create_fuzzy_index, including SQLite's ASCII-only
+    lower() and the MAX_NAME_LENGTH limit on where a word may start.
+    """
+    words = set()
+    start = 0
+    for word in name.translate(ASCII_LOWER).split(' '):
+        if word and start < MAX_NAME_LENGTH:
+            words.add(word)
+        start += len(word) + 1
+    return words
+
+
+def word_trigrams(word):
+    """Return the set of trigrams the fuzzy index holds for word"""
+    padded = '  ' + word + ' '
+    return {padded[i:i + 3] for i in range(min(len(padded) - 2, MAX_NAME_LENGTH))}
+
+
+def word_similarity(trigrams, word):
+    """Shared trigrams over all distinct trigrams of two words, from 0 to 1"""
+    other = word_trigrams(word)
+    shared = len(trigrams & other)
+    return shared / (len(trigrams) + len(other) - shared)
+
+
+def index_script(is_new):
+    """SQL script creating the fuzzy index tables and their triggers, in one transaction
+
+    With is_new, the names already in students are indexed first.
+    """
+    def words_of(name):
+        return f'''
+            SELECT DISTINCT substr(n, i, instr(substr(n, i), ' ') - 1) AS word
+            FROM (SELECT lower({name}) || ' ' AS n), trigram_positions
+            WHERE i <= length(n) AND substr(n, i, 1) != ' '
+              AND (i = 1 OR substr(n, i - 1, 1) = ' ')'''
+
+    def trigrams_of(word):
+        return f'''
+            SELECT substr(p, i, 3) AS trigram
+            FROM (SELECT '  ' || {word} || ' ' AS p), trigram_positions
+            WHERE i <= length(p) - 2'''
+
+    add_new = '''
+            INSERT INTO fuzzy_names (name, students) VALUES (new.name, 1)
+            ON CONFLICT (name) DO UPDATE SET students = students + 1;
+    '''
+    remove_old = '''
+            UPDATE fuzzy_names SET students = students - 1 WHERE name = old.name;
+            DELETE FROM fuzzy_names WHERE name = old.name AND students = 0;
+    '''
+    # Index the names that existed before the index did, before the
+    # triggers exist so that each table is filled in one pass
+    backfill = '''
+            INSERT INTO fuzzy_names (name, students)
+            SELECT name, COUNT(*) FROM students GROUP BY name;
+            INSERT INTO name_words (word, name)
+            SELECT DISTINCT substr(n, i, instr(substr(n, i), ' ') - 1), name
+            FROM (SELECT name, lower(name) || ' ' AS n FROM fuzzy_names), trigram_positions
+            WHERE i <= length(n) AND substr(n, i, 1) != ' '
+              AND (i = 1 OR substr(n, i - 1, 1) = ' ');
+            INSERT INTO name_vocabulary (word, names)
+            SELECT word, COUNT(*) FROM name_words GROUP BY word;
+            INSERT INTO vocabulary_trigrams (trigram, word)
+            SELECT DISTINCT substr(p, i, 3), word
+            FROM (SELECT word, '  ' || word || ' ' AS p FROM name_vocabulary), trigram_positions
+            WHERE i <= length(p) - 2;
+    ''' if is_new else ''
+    return f'''
+        BEGIN;
+        CREATE TABLE IF NOT EXISTS trigram_positions (i INTEGER PRIMARY KEY);
+        INSERT OR IGNORE INTO trigram_positions (i)
+        WITH RECURSIVE n (i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {MAX_NAME_LENGTH})
+        SELECT i FROM n;
+
+        CREATE TABLE IF NOT EXISTS fuzzy_names (
+            name TEXT PRIMARY KEY,
+            students INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS name_words (
+            word TEXT NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (word, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS name_vocabulary (
+            word TEXT PRIMARY KEY,
+            names INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS vocabulary_trigrams (
+            trigram TEXT NOT NULL,
+            word TEXT NOT NULL,
+            PRIMARY KEY (trigram, word)
+        ) WITHOUT ROWID;
+        {backfill}
+        CREATE TRIGGER IF NOT EXISTS fuzzy_names_insert AFTER INSERT ON fuzzy_names BEGIN
+            INSERT INTO name_words (word, name)
+            SELECT word, new.name FROM ({words_of('new.name')});
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS fuzzy_names_delete AFTER DELETE ON fuzzy_names BEGIN
+            DELETE FROM name_words WHERE name = old.name AND word IN ({words_of('old.name')});
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS name_words_insert AFTER INSERT ON name_words BEGIN
+            INSERT INTO name_vocabulary (word, names) VALUES (new.word, 1)
+            ON CONFLICT (word) DO UPDATE SET names = names + 1;
+            INSERT OR IGNORE INTO vocabulary_trigrams (trigram, word)
+            SELECT trigram, new.word FROM ({trigrams_of('new.word')})
+            WHERE (SELECT names FROM name_vocabulary WHERE word = new.word) = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS name_words_delete AFTER DELETE ON name_words BEGIN
+            UPDATE name_vocabulary SET names = names - 1 WHERE word = old.word;
+            DELETE FROM vocabulary_trigrams
+            WHERE word = old.word AND trigram IN ({trigrams_of('old.word')})
+              AND (SELECT names FROM name_vocabulary WHERE word = old.word) = 0;
+            DELETE FROM name_vocabulary WHERE word = old.word AND names = 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS students_fuzzy_insert AFTER INSERT ON students BEGIN
+            {add_new}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS students_fuzzy_delete AFTER DELETE ON students BEGIN
+            {remove_old}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS students_fuzzy_update AFTER UPDATE OF name ON students
+        WHEN old.name != new.name BEGIN
+            {remove_old}
+            {add_new}
+        END;
+        COMMIT;
+    '''
+
+
+def search(conn, terms, limit, threshold, indexed):
+    """Return up to limit student rows whose names resemble every word in terms
+
+    With indexed, only vocabulary words sharing one of the rarest trigrams
+    are compared; otherwise every distinct name is.
+    """
+    if indexed:
+        similar = [similar_words(conn, word_trigrams(term), threshold) for term in terms]
+        return best_named(conn, similar, limit) if all(similar) else []
+    names = score_names(conn.execute('SELECT DISTINCT name FROM students'),
+                        [{} for _ in terms], terms, threshold)
+    return students_named(conn, names, limit)
+
+
+def similar_words(conn, trigrams, threshold):
+    """Return {vocabulary word: similarity} for the words at least threshold similar
+
+    Reaching threshold takes needed = threshold * len(trigrams) shared
+    trigrams, and a word sharing that many must share one of any
+    len(trigrams) - needed + 1 of them, so only the rarest are looked up.
+    """
+    needed = max(1, math.ceil(threshold * len(trigrams)))
+    postings = sorted((conn.execute('''
+        SELECT COUNT(*) FROM (SELECT 1 FROM vocabulary_trigrams WHERE trigram = ? LIMIT ?)
+    ''', (trigram, TRIGRAM_COUNT_LIMIT)).fetchone()[0], trigram) for trigram in trigrams)
+    probes = [trigram for _, trigram in postings[:len(trigrams) - needed + 1]]
+    words = conn.execute(f'''
+        SELECT DISTINCT word FROM vocabulary_trigrams
+        WHERE trigram IN ({', '.join('?' * len(probes))})
+    ''', probes)
+    similar = {}
+    for (word,) in words:
+        similarity = word_similarity(trigrams, word)
+        if similarity >= threshold:
+            similar[word] = similarity
+    return similar
+
+
+def score_names(names, similar, terms=None, threshold=None):
+    """Return the names resembling every search word, best first
+
+    similar holds {word: similarity} per search word. Words missing from
+    it count as no match, unless the search words themselves are given in
+    terms, in which case they are compared (and remembered) as they turn up.
+    """
+    wanted = [word_trigrams(term) for term in terms] if terms else None
+    scored = []
+    for (name,) in names:
+        score = 0
+        words = name_words(name)
+        for i, known in enumerate(similar):
+            best = 0
+            for word in words:
+                similarity = known.get(word)
+                if similarity is None and wanted is not None:
+                    similarity = word_similarity(wanted[i], word)
+                    similarity = known[word] = similarity if similarity >= threshold else 0
+                if similarity and similarity > best:
+                    best = similarity
+            if not best:
+                break
+            score += best
+        else:
+            scored.append((-score, name))
+    scored.sort()
+    return [name for _, name in scored]
+
+
+def students_named(conn, names, limit):
+    """Return up to limit student rows with the given names, in that order"""
+    rows = []
+    for name in names:
+        if len(rows) >= limit:
+            break
+        rows += conn.execute(f'''
+            SELECT {STUDENT_COLUMNS} FROM students WHERE name = ?
+            ORDER BY student_id LIMIT ?
+        ''', (name, limit - len(rows))).fetchall()
+    return rows
+
+
+def best_named(conn, similar, limit):
+    """Return the limit best student rows given {word: similarity} per search word
+
+    Names are looked up per combination of one similar word for each
+    search word, best combinations first, until limit students are found.
+    With several search words and few names matching one of them (or too
+    many combinations), those names are all scored instead.
+    """
+    names_using = dict(conn.execute(f'''
+        SELECT word, names FROM name_vocabulary
+        WHERE word IN ({', '.join('?' * sum(map(len, similar)))})
+    ''', [word for words in similar for word in words]).fetchall())
+    matching = [sum(names_using.get(word, 0) for word in words) for words in similar]
+    combinations = math.prod(map(len, similar))
+    if len(similar) > 1 and (min(matching) <= FUZZY_SCAN_LIMIT
+                             or combinations > FUZZY_MAX_COMBINATIONS):
+        # Only names matching the least common search word can match them all
+        words = list(similar[matching.index(min(matching))])
+        names = conn.execute(f'''
+            SELECT DISTINCT name FROM name_words
+            WHERE word IN ({', '.join('?' * len(words))})
+        ''', words)
+        return students_named(conn, score_names(names, similar), limit)
+
+    ranked = sorted(product(*(sorted(words.items()) for words in similar)),
+                    key=lambda combination: -sum(s for _, s in combination))
+    rows = []
+    seen = set()
+    for combination in ranked:
+        if len(rows) >= limit:
+            break
+        # Walk the names of the rarest word, checking the others by key
+        words = sorted({word for word, _ in combination}, key=lambda w: names_using.get(w, 0))
+        joins = ''.join(f'''
+            CROSS JOIN name_words w{i} ON w{i}.word = ? AND w{i}.name = w0.name'''
+            for i in range(1, len(words)))
+        for row in conn.execute(f'''
+            SELECT {', '.join('s.' + field for field in STUDENT_FIELDS)}
+            FROM name_words w0 {joins}
+            CROSS JOIN students s ON s.name = w0.name
+            WHERE w0.word = ?
+            ORDER BY w0.name, s.student_id LIMIT ?
+        ''', words[1:] + words[:1] + [limit - len(rows) + len(seen)]):
+            # Names with more similar words were already taken
+            if row[0] not in seen and len(rows) < limit:
+                seen.add(row[0])
+                rows.append(row)
+    return rows
@@ -1,455 +1,992 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from database import Database
-from student import Student
-from datetime import datetime
-
-
-class StudentManagementGUI:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Student Management System")
-        self.root.geometry("1000x600")
-        self.root.resizable(True, True)
-
-        # Initialize database
-        self.db = Database()
-
-        # Set style
-        self.setup_styles()
-
-        # Create GUI elements
-        self.create_menu()
-        self.create_widgets()
-        self.refresh_table()
-
-        # Bind keyboard shortcuts
-        self.root.bind('<Control-f>', lambda e: self.search_students())
-        self.root.bind('<Control-n>', lambda e: self.add_student())
-        self.root.bind('<Delete>', lambda e: self.delete_student())
-
-    def setup_styles(self):
-        """Configure styles for the GUI"""
-        style = ttk.Style()
-        style.theme_use('clam')
-
-        # Configure colors
-        self.bg_color = '#f0f0f0'
-        self.header_color = '#2c3e50'
-        self.button_color = '#3498db'
-        self.root.configure(bg=self.bg_color)
-
-    def create_menu(self):
-        """Create menu bar"""
-        menubar = tk.Menu(self.root)
-        self.root.config(menu=menubar)
-
-        # File menu
-        file_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Export to CSV", command=self.export_to_csv)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-
-        # Edit menu
-        edit_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Edit", menu=edit_menu)
-        edit_menu.add_command(label="Add Student", command=self.add_student)
-        edit_menu.add_command(label="Edit Student", command=self.edit_student)
-        edit_menu.add_command(label="Delete Student", command=self.delete_student)
-
-        # View menu
-        view_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Refresh", command=self.refresh_table)
-        view_menu.add_command(label="Statistics", command=self.show_statistics)
-
-        # Help menu
-        help_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="About", command=self.show_about)
-
-    def create_widgets(self):
-        """Create main GUI widgets"""
-        # Header
-        header_frame = tk.Frame(self.root, bg=self.header_color, height=60)
-        header_frame.pack(fill=tk.X)
-
-        title_label = tk.Label(header_frame, text="Student Management System",
-                               font=('Arial', 20, 'bold'),
-                               bg=self.header_color, fg='white')
-        title_label.pack(pady=15)
-
-        # Search frame
-        search_frame = tk.Frame(self.root, bg=self.bg_color)
-        search_frame.pack(fill=tk.X, padx=10, pady=10)
-
-        tk.Label(search_frame, text="Search:", bg=self.bg_color,
-                 font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
-
-        self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self.search_students())
-        search_entry = tk.Entry(search_frame, textvariable=self.search_var,
-                                width=40, font=('Arial', 10))
-        search_entry.pack(side=tk.LEFT, padx=5)
-        search_entry.focus()
-
-        # Button frame
-        button_frame = tk.Frame(self.root, bg=self.bg_color)
-        button_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        # Buttons
-        buttons = [
-            ("Add Student", self.add_student, '#27ae60'),
-            ("Edit Student", self.edit_student, '#f39c12'),
-            ("Delete Student", self.delete_student, '#e74c3c'),
-            ("Refresh", self.refresh_table, '#3498db'),
-            ("Statistics", self.show_statistics, '#9b59b6')
-        ]
-
-        for text, command, color in buttons:
-            btn = tk.Button(button_frame, text=text, command=command,
-                            bg=color, fg='white', font=('Arial', 10, 'bold'),
-                            padx=15, pady=5, relief=tk.FLAT)
-            btn.pack(side=tk.LEFT, padx=5)
-
-        # Treeview frame
-        tree_frame = tk.Frame(self.root, bg=self.bg_color)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        h_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-
-        # Treeview
-        self.tree = ttk.Treeview(tree_frame,
-                                 columns=('ID', 'Name', 'Age', 'Grade', 'Email', 'Phone'),
-                                 show='tree headings',
-                                 yscrollcommand=v_scrollbar.set,
-                                 xscrollcommand=h_scrollbar.set)
-
-        # Configure columns
-        self.tree.heading('#0', text='')
-        self.tree.heading('ID', text='Student ID')
-        self.tree.heading('Name', text='Name')
-        self.tree.heading('Age', text='Age')
-        self.tree.heading('Grade', text='Grade')
-        self.tree.heading('Email', text='Email')
-        self.tree.heading('Phone', text='Phone')
-
-        self.tree.column('#0', width=0, stretch=False)
-        self.tree.column('ID', width=100)
-        self.tree.column('Name', width=200)
-        self.tree.column('Age', width=50)
-        self.tree.column('Grade', width=100)
-        self.tree.column('Email', width=200)
-        self.tree.column('Phone', width=120)
-
-        self.tree.pack(fill=tk.BOTH, expand=True)
-
-        # Configure scrollbars
-        v_scrollbar.config(command=self.tree.yview)
-        h_scrollbar.config(command=self.tree.xview)
-
-        # Bind double-click to edit
-        self.tree.bind('<Double-1>', lambda e: self.edit_student())
-
-        # Status bar
-        self.status_bar = tk.Label(self.root, text="Ready", bd=1, relief=tk.SUNKEN,
-                                   anchor=tk.W, bg='#ecf0f1')
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-
-    def refresh_table(self):
-        """Refresh the student table"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Get all students and insert
-        students = self.db.get_all_students()
-        for student in students:
-            self.tree.insert('', 'end', values=(
-                student.student_id,
-                student.name,
-                student.age,
-                student.grade,
-                student.email,
-                student.phone
-            ))
-
-        # Update status bar
-        count = self.db.get_student_count()
-        self.status_bar.config(text=f"Total Students: {count}")
-
-    def search_students(self):
-        """Search students based on search term"""
-        search_term = self.search_var.get().strip()
-
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Search and display results
-        if search_term:
-            students = self.db.search_student(search_term)
-            result_text = f"Search results for '{search_term}': {len(students)} found"
-        else:
-            students = self.db.get_all_students()
-            result_text = f"Total Students: {len(students)}"
-
-        for student in students:
-            self.tree.insert('', 'end', values=(
-                student.student_id,
-                student.name,
-                student.age,
-                student.grade,
-                student.email,
-                student.phone
-            ))
-
-        self.status_bar.config(text=result_text)
-
-    def add_student(self):
-        """Open dialog to add new student"""
-        dialog = StudentDialog(self.root, "Add New Student")
-        if dialog.result:
-            student = Student(
-                dialog.result['student_id'],
-                dialog.result['name'],
-                dialog.result['age'],
-                dialog.result['grade'],
-                dialog.result['email'],
-                dialog.result['phone']
-            )
-
-            if self.db.add_student(student):
-                messagebox.showinfo("Success", "Student added successfully!")
-                self.refresh_table()
-            else:
-                messagebox.showerror("Error", "Student ID already exists!")
-
-    def edit_student(self):
-        """Edit selected student"""
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showwarning("Warning", "Please select a student to edit.")
-            return
-
-        # Get current values
-        values = self.tree.item(selected[0])['values']
-
-        dialog = StudentDialog(self.root, "Edit Student", values)
-        if dialog.result:
-            student_id = values[0]  # Original ID
-            self.db.update_student(
-                student_id,
-                name=dialog.result['name'],
-                age=dialog.result['age'],
-                grade=dialog.result['grade'],
-                email=dialog.result['email'],
-                phone=dialog.result['phone']
-            )
-            messagebox.showinfo("Success", "Student updated successfully!")
-            self.refresh_table()
-
-    def delete_student(self):
-        """Delete selected student"""
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showwarning("Warning", "Please select a student to delete.")
-            return
-
-        values = self.tree.item(selected[0])['values']
-
-        if messagebox.askyesno("Confirm Delete",
-                               f"Are you sure you want to delete {values[1]}?"):
-            if self.db.delete_student(values[0]):
-                messagebox.showinfo("Success", "Student deleted successfully!")
-                self.refresh_table()
-            else:
-                messagebox.showerror("Error", "Failed to delete student.")
-
-    def show_statistics(self):
-        """Show statistics dialog"""
-        count = self.db.get_student_count()
-        students = self.db.get_all_students()
-
-        # Calculate average age
-        if students:
-            avg_age = sum(s.age for s in students if s.age) / len(students)
-            avg_age = f"{avg_age:.1f}"
-        else:
-            avg_age = "N/A"
-
-        # Grade distribution
-        grades = {}
-        for student in students:
-            if student.grade:
-                grades[student.grade] = grades.get(student.grade, 0) + 1
-
-        stats_text = f"Total Students: {count}\n"
-        stats_text += f"Average Age: {avg_age}\n\n"
-        stats_text += "Grade Distribution:\n"
-        for grade, count in grades.items():
-            stats_text += f"  {grade}: {count} students\n"
-
-        messagebox.showinfo("Statistics", stats_text)
-
-    def export_to_csv(self):
-        """Export student data to CSV file"""
-        import csv
-        from tkinter import filedialog
-
-        filename = filedialog.asksaveasfilename(
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
-        )
-
-        if filename:
-            students = self.db.get_all_students()
-
-            with open(filename, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(['Student ID', 'Name', 'Age', 'Grade', 'Email', 'Phone'])
-
-                for student in students:
-                    writer.writerow([
-                        student.student_id,
-                        student.name,
-                        student.age,
-                        student.grade,
-                        student.email,
-                        student.phone
-                    ])
-
-            messagebox.showinfo("Success", f"Data exported to {filename}")
-
-    def show_about(self):
-        """Show about dialog"""
-        about_text = """Student Management System
-Version 1.0
-
-A comprehensive system for managing student records.
-Created with Python and Tkinter.
-
-Features:
-- Add, edit, and delete student records
-- Search functionality
-- Export to CSV
-- Statistics
-- User-friendly interface"""
-
-        messagebox.showinfo("About", about_text)
-
-    def __del__(self):
-        """Clean up database connection"""
-        if hasattr(self, 'db'):
-            self.db.close()
-
-
-class StudentDialog:
-    """Dialog for adding/editing students"""
-
-    def __init__(self, parent, title, values=None):
-        self.result = None
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(title)
-        self.dialog.geometry("400x350")
-        self.dialog.resizable(False, False)
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-
-        # Center the dialog
-        self.dialog.update_idletasks()
-        x = parent.winfo_x() + (parent.winfo_width() // 2) - (400 // 2)
-        y = parent.winfo_y() + (parent.winfo_height() // 2) - (350 // 2)
-        self.dialog.geometry(f"+{x}+{y}")
-
-        # Create form
-        self.create_form(values)
-
-        # Bind Enter key to submit
-        self.dialog.bind('<Return>', lambda e: self.submit())
-        self.dialog.bind('<Escape>', lambda e: self.dialog.destroy())
-
-        self.dialog.wait_window()
-
-    def create_form(self, values):
-        """Create input form"""
-        # Main frame
-        main_frame = tk.Frame(self.dialog, padx=20, pady=20)
-        main_frame.pack(fill=tk.BOTH, expand=True)
-
-        # Form fields
-        fields = [
-            ('Student ID:', 'student_id'),
-            ('Name:', 'name'),
-            ('Age:', 'age'),
-            ('Grade:', 'grade'),
-            ('Email:', 'email'),
-            ('Phone:', 'phone')
-        ]
-
-        self.entries = {}
-
-        for i, (label, field) in enumerate(fields):
-            tk.Label(main_frame, text=label, font=('Arial', 10)).grid(
-                row=i, column=0, sticky='w', pady=5)
-
-            entry = tk.Entry(main_frame, font=('Arial', 10), width=30)
-            entry.grid(row=i, column=1, pady=5, padx=(10, 0))
-
-            # Set initial values if editing
-            if values and i < len(values):
-                entry.insert(0, values[i])
-
-            self.entries[field] = entry
-
-        # Buttons
-        button_frame = tk.Frame(main_frame)
-        button_frame.grid(row=len(fields), column=0, columnspan=2, pady=20)
-
-        tk.Button(button_frame, text="Submit", command=self.submit,
-                  bg='#27ae60', fg='white', font=('Arial', 10, 'bold'),
-                  padx=20, pady=5).pack(side=tk.LEFT, padx=5)
-
-        tk.Button(button_frame, text="Cancel", command=self.dialog.destroy,
-                  bg='#e74c3c', fg='white', font=('Arial', 10, 'bold'),
-                  padx=20, pady=5).pack(side=tk.LEFT, padx=5)
-
-    def submit(self):
-        """Validate and submit form"""
-        # Get values
-        result = {}
-        for field, entry in self.entries.items():
-            value = entry.get().strip()
-            if not value:
-                messagebox.showwarning("Warning", f"{field.replace('_', ' ').title()} is required!")
-                entry.focus()
-                return
-            result[field] = value
-
-        # Validate age
-        try:
-            if result['age']:
-                age = int(result['age'])
-                if age < 0 or age > 150:
-                    messagebox.showwarning("Warning", "Please enter a valid age (0-150)")
-                    self.entries['age'].focus()
-                    return
-        except ValueError:
-            messagebox.showwarning("Warning", "Please enter a valid number for age")
-            self.entries['age'].focus()
-            return
-
-        # Validate email format (basic)
-        if '@' not in result['email'] or '.' not in result['email']:
-            messagebox.showwarning("Warning", "Please enter a valid email address")
-            self.entries['email'].focus()
-            return
-
-        self.result = result
-        self.dialog.destroy()
\ No newline at end of file
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+from database import Database
+from student import Student
+from table_view import VirtualTable, RosterSource, ListSource
+from search_worker import SearchWorker
+from datetime import datetime
+import threading
+import time
+
+# File archived students are moved to, next to the roster's students.db
+ARCHIVE_NAME = 'students_archive.db'
+
+# VirtualTable methods timed while profiling is on
+TABLE_PROFILED_METHODS = ('set_source', 'render')
+
+# Treeview column, Student field it shows and heading text
+COLUMNS = (('ID', 'student_id', 'Student ID'), ('Name', 'name', 'Name'), ('Age', 'age', 'Age'),
+           ('Grade', 'grade', 'Grade'), ('Email', 'email', 'Email'), ('Phone', 'phone', 'Phone'))
+
+
+def describe_filters(filters):
+    """Short text for a StudentQuery's filters, for the status bar"""
+    parts = []
+    if 'grades' in filters:
+        parts.append(f"grade {', '.join(filters['grades']) or '(none)'}")
+    if 'min_age' in filters or 'max_age' in filters:
+        parts.append(f"age {filters.get('min_age', '')}-{filters.get('max_age', '')}")
+    if 'email_domain' in filters:
+        parts.append(f"email @{filters['email_domain']}")
+    return '; '.join(parts)
+
+
+class StudentManagementGUI:
+    def __init__(self, root, search_delay_ms=250, search_poll_ms=20, setup_poll_ms=200):
+        self.root = root
+        self.root.title("Student Management System")
+        self.root.geometry("1000x600")
+        self.root.resizable(True, True)
+
+        # Initialize database. Nothing slow happens here, so the window and
+        # the first page show at once; the statistics summary and the name
+        # index are built on a background thread after the first paint.
+        # Archived students live in their own file and are only searched
+        # when asked for
+        self.db = Database(archive_name=ARCHIVE_NAME)
+        self.setup_thread = None
+        self.setup_error = None
+        self.setup_poll_ms = setup_poll_ms
+
+        # Sort order and filters of the table, applied in SQL by StudentQuery
+        self.query = self.db.query()
+
+        # Searches run on a worker thread, debounced while the user types
+        self.search_worker = SearchWorker(self.db)
+        self.search_delay_ms = search_delay_ms
+        self.search_poll_ms = search_poll_ms
+        self.pending_search = None
+        self.search_poll = None
+        self.search_started = None
+
+        # Latency instrumentation, off until enabled from View > Diagnostics
+        self.profiler = None
+        self.diagnostics = None
+
+        # Set style
+        self.setup_styles()
+
+        # Create GUI elements
+        self.create_menu()
+        self.create_widgets()
+        self.refresh_table()
+        self.root.after_idle(self.start_background_setup)
+
+        # Bind keyboard shortcuts
+        self.root.bind('<Control-f>', lambda e: self.search_students())
+        self.root.bind('<Control-n>', lambda e: self.add_student())
+        self.root.bind('<Delete>', lambda e: self.delete_student())
+
+    def setup_styles(self):
+        """Configure styles for the GUI"""
+        style = ttk.Style()
+        style.theme_use('clam')
+
+        # Configure colors
+        self.bg_color = '#f0f0f0'
+        self.header_color = '#2c3e50'
+        self.button_color = '#3498db'
+        self.root.configure(bg=self.bg_color)
+
+    def create_menu(self):
+        """Create menu bar"""
+        menubar = tk.Menu(self.root)
+        self.root.config(menu=menubar)
+
+        # File menu
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="Import...", command=self.import_from_file)
+        file_menu.add_command(label="Export...", command=self.export_data)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.root.quit)
+
+        # Edit menu
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Add Student", command=self.add_student)
+        edit_menu.add_command(label="Edit Student", command=self.edit_student)
+        edit_menu.add_command(label="Delete Student", command=self.delete_student)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Select All", command=self.select_all)
+        edit_menu.add_command(label="Set Grade for Selected...", command=self.set_grade_for_selected)
+        edit_menu.add_command(label="Delete Selected", command=self.delete_selected)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Archive Selected", command=self.archive_selected)
+        edit_menu.add_command(label="Restore Selected", command=self.restore_selected)
+
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Refresh", command=self.refresh_table)
+        view_menu.add_command(label="Filter...", command=self.filter_students)
+        view_menu.add_command(label="Clear Filters", command=lambda: self.set_filters({}))
+        view_menu.add_command(label="Statistics", command=self.show_statistics)
+        view_menu.add_command(label="Diagnostics", command=self.show_diagnostics)
+
+        # Help menu
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="About", command=self.show_about)
+
+    def create_widgets(self):
+        """Create main GUI widgets"""
+        # Header
+        header_frame = tk.Frame(self.root, bg=self.header_color, height=60)
+        header_frame.pack(fill=tk.X)
+
+        title_label = tk.Label(header_frame, text="Student Management System",
+                               font=('Arial', 20, 'bold'),
+                               bg=self.header_color, fg='white')
+        title_label.pack(pady=15)
+
+        # Search frame
+        search_frame = tk.Frame(self.root, bg=self.bg_color)
+        search_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        tk.Label(search_frame, text="Search:", bg=self.bg_color,
+                 font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+
+        self.search_var = tk.StringVar()
+        self.search_var.trace('w', lambda *args: self.schedule_search())
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var,
+                                width=40, font=('Arial', 10))
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.focus()
+
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        self.fuzzy_check = tk.Checkbutton(search_frame, text="Tolerate typos in names",
+                                          variable=self.fuzzy_var, command=self.search_students,
+                                          bg=self.bg_color, font=('Arial', 10))
+        self.fuzzy_check.pack(side=tk.LEFT, padx=5)
+
+        self.archived_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Include archived", variable=self.archived_var,
+                       command=self.search_students, bg=self.bg_color,
+                       font=('Arial', 10)).pack(side=tk.LEFT, padx=5)
+
+        # Button frame
+        button_frame = tk.Frame(self.root, bg=self.bg_color)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        # Buttons
+        buttons = [
+            ("Add Student", self.add_student, '#27ae60'),
+            ("Edit Student", self.edit_student, '#f39c12'),
+            ("Delete Student", self.delete_student, '#e74c3c'),
+            ("Set Grade", self.set_grade_for_selected, '#d35400'),
+            ("Refresh", self.refresh_table, '#3498db'),
+            ("Filter", self.filter_students, '#16a085'),
+            ("Statistics", self.show_statistics, '#9b59b6')
+        ]
+
+        for text, command, color in buttons:
+            btn = tk.Button(button_frame, text=text, command=command,
+                            bg=color, fg='white', font=('Arial', 10, 'bold'),
+                            padx=15, pady=5, relief=tk.FLAT)
+            btn.pack(side=tk.LEFT, padx=5)
+
+        # Treeview frame
+        tree_frame = tk.Frame(self.root, bg=self.bg_color)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Scrollbars
+        v_scrollbar = ttk.Scrollbar(tree_frame)
+        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        h_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL)
+        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+
+        # Treeview (vertical scrolling is driven by the virtual table below)
+        self.tree = ttk.Treeview(tree_frame,
+                                 columns=('ID', 'Name', 'Age', 'Grade', 'Email', 'Phone'),
+                                 show='tree headings',
+                                 xscrollcommand=h_scrollbar.set)
+
+        # Configure columns; clicking a heading sorts by that column
+        self.tree.heading('#0', text='')
+        for column, field, _ in COLUMNS:
+            self.tree.heading(column, command=lambda f=field: self.sort_by(f))
+        self.update_headings()
+
+        self.tree.column('#0', width=0, stretch=False)
+        self.tree.column('ID', width=100)
+        self.tree.column('Name', width=200)
+        self.tree.column('Age', width=50)
+        self.tree.column('Grade', width=100)
+        self.tree.column('Email', width=200)
+        self.tree.column('Phone', width=120)
+
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        # Configure scrollbars
+        h_scrollbar.config(command=self.tree.xview)
+
+        # Only the visible rows are ever loaded into the Treeview
+        self.table = VirtualTable(self.tree, v_scrollbar)
+
+        # Bind double-click to edit
+        self.tree.bind('<Double-1>', lambda e: self.edit_student())
+        self.tree.bind('<Control-a>', lambda e: self.select_all())
+        self.tree.bind('<<TreeviewSelect>>', lambda e: self.update_status_bar(), add='+')
+
+        # Status bar
+        self.status_bar = tk.Label(self.root, text="Ready", bd=1, relief=tk.SUNKEN,
+                                   anchor=tk.W, bg='#ecf0f1')
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def start_background_setup(self):
+        """Build the statistics summary and the name index if the database lacks them"""
+        if self.db.summary_enabled and self.db.fuzzy_enabled:
+            return
+        if not self.db.fuzzy_enabled:
+            self.fuzzy_check.config(state=tk.DISABLED)
+        # Not a daemon: quitting waits for the build rather than cutting it short
+        self.setup_thread = threading.Thread(target=self.build_indexes, name="startup-indexes")
+        self.setup_thread.start()
+        self.update_status_bar()
+        self.root.after(self.setup_poll_ms, self.poll_background_setup)
+
+    def build_indexes(self):
+        """Runs on the setup thread; readers are not blocked, writers wait"""
+        try:
+            if not self.db.summary_enabled:
+                self.db.create_summary_table()
+            if not self.db.fuzzy_enabled:
+                self.db.create_fuzzy_index()
+        except Exception as e:
+            self.setup_error = e
+
+    def poll_background_setup(self):
+        """Check back until the setup thread is done, then enable what it built"""
+        if self.setup_thread.is_alive():
+            self.root.after(self.setup_poll_ms, self.poll_background_setup)
+            return
+        self.setup_thread = None
+        if self.db.fuzzy_enabled:
+            self.fuzzy_check.config(state=tk.NORMAL)
+        self.update_status_bar()
+        if self.setup_error is not None:
+            messagebox.showwarning("Warning", f"Could not build the search indexes: {self.setup_error}")
+
+    def refresh_table(self):
+        """Refresh the student table"""
+        self.table.set_source(RosterSource(self.db, self.query))
+        self.update_status_bar()
+
+    def update_headings(self):
+        """Mark the sorted column's heading with the sort direction"""
+        for column, field, text in COLUMNS:
+            if field == self.query.sort:
+                text += ' \u25bc' if self.query.descending else ' \u25b2'
+            self.tree.heading(column, text=text)
+
+    def sort_by(self, field):
+        """Sort the table by a column; clicking the same column again reverses it"""
+        descending = field == self.query.sort and not self.query.descending
+        self.query = self.query.order_by(field, descending)
+        self.update_headings()
+        if isinstance(self.table.source, ListSource):
+            # Search results are already in memory and few; sort them in place
+            students = sorted(self.table.source.students, key=self.query.sort_key)
+            self.table.set_source(ListSource(students))
+        else:
+            self.refresh_table()
+
+    def filter_students(self):
+        """Ask for filters and apply them to the table"""
+        stats = self.db.statistics()
+        dialog = FilterDialog(self.root, self.query.filters(), list(stats['grades']),
+                              list(stats['email_domains'])[:20])
+        if dialog.result is not None:
+            self.set_filters(dialog.result)
+
+    def set_filters(self, filters):
+        """Replace the table's filters, keeping its sort order"""
+        self.query = self.db.query(self.query.sort, self.query.descending, **filters)
+        if self.search_var.get().strip():
+            self.search_students()
+        else:
+            self.refresh_table()
+
+    def schedule_search(self):
+        """Debounce typing: search once the user pauses for search_delay_ms"""
+        if self.pending_search is not None:
+            self.root.after_cancel(self.pending_search)
+        self.pending_search = self.root.after(self.search_delay_ms, self.search_students)
+
+    def search_students(self):
+        """Search students based on search term"""
+        if self.pending_search is not None:
+            self.root.after_cancel(self.pending_search)
+            self.pending_search = None
+        search_term = self.search_var.get().strip()
+
+        if not search_term:
+            # Cancel any running search; the roster itself is paged lazily
+            self.search_worker.cancel()
+            if self.search_poll is not None:
+                self.root.after_cancel(self.search_poll)
+                self.search_poll = None
+            self.refresh_table()
+            return
+
+        self.search_worker.submit(search_term, fuzzy=self.fuzzy_var.get(),
+                                  include_archived=self.archived_var.get())
+        self.search_started = time.perf_counter()
+        self.status_bar.config(text=f"Searching for '{search_term}'...")
+        if self.search_poll is None:
+            self.search_poll = self.root.after(self.search_poll_ms, self.poll_search_results)
+
+    def poll_search_results(self):
+        """Render the latest finished search, checking back until it arrives"""
+        self.search_poll = None
+        result = self.search_worker.poll()
+        if result is None:
+            self.search_poll = self.root.after(self.search_poll_ms, self.poll_search_results)
+            return
+
+        search_term, students, error = result
+        if search_term != self.search_var.get().strip():
+            return  # The search box changed again; a newer search is queued
+        if error is not None:
+            self.status_bar.config(text=f"Search for '{search_term}' failed: {error}")
+            return
+        students = [s for s in students if self.query.matches(s)]
+        if not self.fuzzy_var.get():
+            # Typo-tolerant results stay in order of similarity
+            students.sort(key=self.query.sort_key)
+        self.table.set_source(ListSource(students))
+        self.update_status_bar()
+        if self.profiler is not None and self.search_started is not None:
+            self.profiler.record('GUI.search round trip', time.perf_counter() - self.search_started)
+
+    def update_status_bar(self):
+        """Show the row count tracked by the table, without re-querying"""
+        filters = self.query.filters()
+        if isinstance(self.table.source, ListSource):
+            search_term = self.search_var.get().strip()
+            text = f"Search results for '{search_term}': {self.table.count()} found"
+        elif filters:
+            text = f"Students matching filters: {self.table.count()}"
+        else:
+            text = f"Total Students: {self.table.count()}"
+        if filters:
+            text += f"  |  {describe_filters(filters)}"
+        if len(self.table.selected_ids) > 1:
+            text += f"  |  {len(self.table.selected_ids)} selected"
+        if self.setup_thread is not None:
+            text += "  |  building indexes..."
+        if self.profiler is not None:
+            render = self.profiler.histograms.get('VirtualTable.render')
+            if render is not None:
+                text += f"  |  last render {render.last * 1000:.1f} ms"
+        self.status_bar.config(text=text)
+
+    def set_profiling(self, enabled):
+        """Turn latency instrumentation of the database and the table on or off"""
+        from profiling import Profiler
+        if enabled and self.db.profiler is None:
+            self.profiler = self.db.enable_profiling(self.profiler)
+            self.profiler.instrument(self.table, TABLE_PROFILED_METHODS, 'VirtualTable')
+        elif not enabled and self.db.profiler is not None:
+            self.db.disable_profiling()
+            Profiler.uninstrument(self.table, TABLE_PROFILED_METHODS)
+            self.profiler = None
+        self.update_status_bar()
+
+    def show_diagnostics(self):
+        """Open the diagnostics panel, or raise it if it is already open"""
+        if self.diagnostics is not None and self.diagnostics.dialog.winfo_exists():
+            self.diagnostics.dialog.lift()
+            return
+        self.diagnostics = DiagnosticsPanel(self.root, self)
+
+    def add_student(self):
+        """Open dialog to add new student"""
+        dialog = StudentDialog(self.root, "Add New Student")
+        if dialog.result:
+            student = Student(
+                dialog.result['student_id'],
+                dialog.result['name'],
+                int(dialog.result['age']),
+                dialog.result['grade'],
+                dialog.result['email'],
+                dialog.result['phone']
+            )
+
+            added = self.db.add_student(student)
+            if added:
+                self.table.insert_student(added)
+                self.update_status_bar()
+                messagebox.showinfo("Success", "Student added successfully!")
+            else:
+                messagebox.showerror("Error", "Student ID already exists!")
+
+    def edit_student(self):
+        """Edit selected student"""
+        student = self.table.selected_student()
+        if not student:
+            messagebox.showwarning("Warning", "Please select a student to edit.")
+            return
+        if self.db.get_student(student.student_id) is None:
+            # Only roster rows can be edited; search results may include archived ones
+            if self.db.get_student(student.student_id, include_archived=True):
+                messagebox.showwarning("Archived", f"{student.name} is archived. "
+                                                   f"Restore the student to edit them.")
+            else:
+                messagebox.showerror("Error", f"{student.name} no longer exists.")
+            return
+
+        # Get current values
+        values = ['' if value is None else value for value in (
+            student.student_id, student.name, student.age,
+            student.grade, student.email, student.phone)]
+
+        dialog = StudentDialog(self.root, "Edit Student", values)
+        if dialog.result:
+            student_id = student.student_id  # Original ID
+            updated = self.db.update_student(
+                student_id,
+                name=dialog.result['name'],
+                age=dialog.result['age'],
+                grade=dialog.result['grade'],
+                email=dialog.result['email'],
+                phone=dialog.result['phone']
+            )
+            if updated:
+                self.table.update_student(student, updated)
+                messagebox.showinfo("Success", "Student updated successfully!")
+            else:
+                messagebox.showerror("Error", "Failed to update student.")
+
+    def delete_student(self):
+        """Delete selected student"""
+        if len(self.table.selected_ids) > 1:
+            self.delete_selected()
+            return
+        student = self.table.selected_student()
+        if not student:
+            messagebox.showwarning("Warning", "Please select a student to delete.")
+            return
+
+        if messagebox.askyesno("Confirm Delete",
+                               f"Are you sure you want to delete {student.name}?"):
+            deleted = self.db.delete_student(student.student_id)
+            if deleted:
+                self.table.remove_student(deleted)
+                self.update_status_bar()
+                messagebox.showinfo("Success", "Student deleted successfully!")
+            else:
+                messagebox.showerror("Error", "Failed to delete student.")
+
+    def select_all(self):
+        """Select every student in the table, including those scrolled out of view"""
+        self.table.select_all()
+        self.update_status_bar()
+        return 'break'
+
+    def describe_selection(self):
+        """'N selected students' for confirmations, counting those out of view"""
+        count = len(self.table.selected_ids)
+        hidden = count - len(self.table.selected_students())
+        text = f"{count} selected students"
+        if hidden:
+            text += f" ({hidden} of them scrolled out of view)"
+        return text
+
+    def set_grade_for_selected(self):
+        """Give every selected student the same grade, in one transaction"""
+        student_ids = list(self.table.selected_ids)
+        if not student_ids:
+            messagebox.showwarning("Warning", "Please select the students to update.")
+            return
+
+        grade = simpledialog.askstring(
+            "Set Grade", f"New grade for {self.describe_selection()}:", parent=self.root)
+        if grade and grade.strip():
+            updated = self.db.bulk_update(student_ids, grade=grade.strip())
+            self.table.apply_changes(updated=updated)
+            self.update_status_bar()
+            messagebox.showinfo("Success", f"{len(updated)} students updated.")
+
+    def delete_selected(self):
+        """Delete every selected student in one transaction"""
+        student_ids = list(self.table.selected_ids)
+        if not student_ids:
+            messagebox.showwarning("Warning", "Please select the students to delete.")
+            return
+
+        if messagebox.askyesno("Confirm Delete",
+                               f"Are you sure you want to delete {self.describe_selection()}?"):
+            deleted = self.db.bulk_delete(student_ids)
+            self.table.apply_changes(removed=deleted)
+            self.update_status_bar()
+            messagebox.showinfo("Success", f"{len(deleted)} students deleted.")
+
+    def archive_selected(self):
+        """Move the selected students into the archive, off the roster"""
+        student_ids = list(self.table.selected_ids)
+        if not student_ids:
+            messagebox.showwarning("Warning", "Please select the students to archive.")
+            return
+
+        if messagebox.askyesno("Confirm Archive",
+                               f"Move {self.describe_selection()} to the archive?"):
+            moved = self.db.archive_students(student_ids)
+            self.reload_after_move()
+            messagebox.showinfo("Success", f"{moved} students archived.")
+
+    def restore_selected(self):
+        """Move the selected archived students back onto the roster"""
+        student_ids = list(self.table.selected_ids)
+        if not student_ids:
+            messagebox.showwarning("Warning", "Please select archived students to restore.")
+            return
+
+        restored = self.db.restore_students(student_ids)
+        self.reload_after_move()
+        messagebox.showinfo("Success", f"{restored} students restored.")
+
+    def reload_after_move(self):
+        """Show the roster or the search results again after students moved"""
+        self.table.selected_ids.clear()
+        if self.search_var.get().strip():
+            self.search_students()
+        else:
+            self.refresh_table()
+
+    def show_statistics(self):
+        """Show statistics dialog"""
+        stats = self.db.statistics()
+
+        # Average over the students that have an age recorded
+        if stats['average_age'] is not None:
+            avg_age = f"{stats['average_age']:.1f} (range {stats['min_age']}-{stats['max_age']})"
+        else:
+            avg_age = "N/A"
+
+        stats_text = f"Total Students: {stats['count']}\n"
+        stats_text += f"Average Age: {avg_age}\n\n"
+        stats_text += "Grade Distribution:\n"
+        for grade, count in stats['grades'].items():
+            stats_text += f"  {grade}: {count} students\n"
+
+        stats_text += "\nAge Groups:\n"
+        for bucket, count in stats['age_buckets'].items():
+            stats_text += f"  {bucket}: {count} students\n"
+
+        stats_text += "\nTop Email Domains:\n"
+        for domain, count in list(stats['email_domains'].items())[:5]:
+            stats_text += f"  {domain}: {count} students\n"
+
+        messagebox.showinfo("Statistics", stats_text)
+
+    def export_data(self):
+        """Export student data in the background, with progress and cancel"""
+        from tkinter import filedialog
+        from exporter import ExportJob
+
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"),
+                       ("Columnar files", "*.scol"), ("All files", "*.*")]
+        )
+
+        if filename:
+            def finished(job):
+                if job.error:
+                    messagebox.showerror("Error", f"Export failed: {job.error}")
+                elif job.cancelled:
+                    messagebox.showinfo("Cancelled", "Export cancelled.")
+                else:
+                    messagebox.showinfo("Success", f"Data exported to {job.filename}")
+
+            job = ExportJob(self.db, filename).start()
+            JobProgressDialog(self.root, job, "Exporting", "Exported", finished)
+
+    def import_from_file(self):
+        """Import students from a CSV, JSONL or columnar file in the background"""
+        from tkinter import filedialog
+        from importer import ImportJob
+
+        filename = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"),
+                       ("Columnar files", "*.scol"), ("All files", "*.*")]
+        )
+
+        if filename:
+            def finished(job):
+                self.refresh_table()
+                if job.error:
+                    messagebox.showerror("Error", f"Import failed after {job.done} students "
+                                                  f"were added: {job.error}")
+                    return
+                if job.cancelled:
+                    messagebox.showinfo("Cancelled", f"Import cancelled after {job.done} "
+                                                     f"students were added.")
+                    return
+
+                result = job.result
+                summary = f"Imported {result['inserted']} students."
+                if result['rejected']:
+                    summary += f"\n{len(result['rejected'])} rows were rejected:\n"
+                    for student_id, reason in result['rejected'][:10]:
+                        summary += f"  {student_id}: {reason}\n"
+                    if len(result['rejected']) > 10:
+                        summary += "  ..."
+                messagebox.showinfo("Import Complete", summary)
+
+            job = ImportJob(self.db, filename).start()
+            JobProgressDialog(self.root, job, "Importing", "Imported", finished)
+
+    def show_about(self):
+        """Show about dialog"""
+        about_text = """Student Management System
+Version 1.0
+
+A comprehensive system for managing student records.
+Created with Python and Tkinter.
+
+Features:
+- Add, edit, and delete student records
+- Search functionality
+- Sort by any column; filter by grade, age and email domain
+- Import from CSV, JSONL and the columnar format
+- Export to CSV, JSONL and a compact columnar format
+- Statistics
+- User-friendly interface"""
+
+        messagebox.showinfo("About", about_text)
+
+    def __del__(self):
+        """Clean up database connection"""
+        if hasattr(self, 'search_worker'):
+            self.search_worker.close()
+        if getattr(self, 'setup_thread', None) is not None:
+            self.setup_thread.join()
+        if hasattr(self, 'db'):
+            self.db.close()
+
+
+class JobProgressDialog:
+    """Shows the progress of a background export or import and lets the user cancel it
+
+    job is an ExportJob or ImportJob. on_finish(job) is called once the job
+    has stopped, whether it completed, failed or was cancelled.
+    """
+
+    def __init__(self, parent, job, title, verb, on_finish, poll_ms=100):
+        self.job = job
+        self.verb = verb
+        self.on_finish = on_finish
+        self.poll_ms = poll_ms
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.protocol('WM_DELETE_WINDOW', self.job.cancel)
+
+        frame = tk.Frame(self.dialog, padx=20, pady=20)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.label = tk.Label(frame, text=f"{title}...", font=('Arial', 10))
+        self.label.pack(anchor='w')
+
+        # An import does not know its row count up front
+        mode = 'indeterminate' if job.total is None else 'determinate'
+        self.progress = ttk.Progressbar(frame, length=300, mode=mode)
+        self.progress.pack(pady=10)
+
+        tk.Button(frame, text="Cancel", command=self.job.cancel,
+                  bg='#e74c3c', fg='white', font=('Arial', 10, 'bold'),
+                  padx=20, pady=5).pack()
+
+        self.dialog.after(self.poll_ms, self.poll)
+
+    def poll(self):
+        """Update the progress bar until the job finishes"""
+        job = self.job
+        if not job.finished:
+            if job.total is None:
+                self.progress.step()
+                self.label.config(text=f"{self.verb} {job.done} students")
+            else:
+                if job.total:
+                    self.progress['value'] = 100 * job.done / job.total
+                self.label.config(text=f"{self.verb} {job.done} of {job.total} students")
+            self.dialog.after(self.poll_ms, self.poll)
+            return
+
+        self.dialog.destroy()
+        self.on_finish(job)
+
+
+class DiagnosticsPanel:
+    """Live view of the profiler's timing histograms and slow calls"""
+
+    COLUMNS = (('count', "Calls"), ('mean_ms', "Mean ms"), ('p50_ms', "p50"),
+               ('p90_ms', "p90"), ('p99_ms', "p99"), ('max_ms', "Max ms"))
+
+    def __init__(self, parent, gui, poll_ms=1000):
+        self.gui = gui
+        self.poll_ms = poll_ms
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Diagnostics")
+        self.dialog.geometry("760x480")
+        self.dialog.transient(parent)
+
+        frame = tk.Frame(self.dialog, padx=10, pady=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.enabled = tk.BooleanVar(value=gui.profiler is not None)
+        tk.Checkbutton(frame, text="Enable profiling", variable=self.enabled,
+                       command=lambda: gui.set_profiling(self.enabled.get())).pack(anchor='w')
+
+        self.tree = ttk.Treeview(frame, columns=[key for key, _ in self.COLUMNS], height=10)
+        self.tree.heading('#0', text="Operation")
+        self.tree.column('#0', width=260)
+        for key, title in self.COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=70, anchor='e')
+        self.tree.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        tk.Label(frame, text="Slow calls", font=('Arial', 10, 'bold')).pack(anchor='w')
+        self.slow_calls = tk.Listbox(frame, height=6)
+        self.slow_calls.pack(fill=tk.BOTH, expand=True)
+
+        buttons = tk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(5, 0))
+        self.summary = tk.Label(buttons, text="")
+        self.summary.pack(side=tk.LEFT)
+        tk.Button(buttons, text="Close", command=self.dialog.destroy).pack(side=tk.RIGHT)
+        tk.Button(buttons, text="Dump JSON...", command=self.dump).pack(side=tk.RIGHT, padx=5)
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side=tk.RIGHT)
+
+        self.poll()
+
+    def poll(self):
+        """Redraw the timings every poll_ms while the panel is open"""
+        if not self.dialog.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.slow_calls.delete(0, tk.END)
+        profiler = self.gui.profiler
+        if profiler is None:
+            self.summary.config(text="Profiling is off")
+        else:
+            snapshot = profiler.snapshot()
+            for name, histogram in snapshot['histograms'].items():
+                self.tree.insert('', tk.END, text=name,
+                                 values=[histogram[key] for key, _ in self.COLUMNS])
+            for call in reversed(snapshot['slow_calls']):
+                statement = call['statements'][0] if call['statements'] else ''
+                self.slow_calls.insert(tk.END, f"{call['ms']:.1f} ms  {call['name']}  {statement}")
+            self.summary.config(text=f"{snapshot['statements']} SQL statements in "
+                                     f"{snapshot['seconds']:.0f} s")
+        self.dialog.after(self.poll_ms, self.poll)
+
+    def reset(self):
+        if self.gui.profiler is not None:
+            self.gui.profiler.reset()
+
+    def dump(self):
+        """Save the timings as JSON for offline analysis"""
+        from tkinter import filedialog
+        if self.gui.profiler is None:
+            messagebox.showinfo("Diagnostics", "Profiling is off.", parent=self.dialog)
+            return
+        filename = filedialog.asksaveasfilename(
+            parent=self.dialog, defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if filename:
+            self.gui.profiler.dump(filename)
+
+
+class StudentDialog:
+    """Dialog for adding/editing students"""
+
+    def __init__(self, parent, title, values=None):
+        self.result = None
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("400x350")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # Center the dialog
+        self.dialog.update_idletasks()
+        x = parent.winfo_x() + (parent.winfo_width() // 2) - (400 // 2)
+        y = parent.winfo_y() + (parent.winfo_height() // 2) - (350 // 2)
+        self.dialog.geometry(f"+{x}+{y}")
+
+        # Create form
+        self.create_form(values)
+
+        # Bind Enter key to submit
+        self.dialog.bind('<Return>', lambda e: self.submit())
+        self.dialog.bind('<Escape>', lambda e: self.dialog.destroy())
+
+        self.dialog.wait_window()
+
+    def create_form(self, values):
+        """Create input form"""
+        # Main frame
+        main_frame = tk.Frame(self.dialog, padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Form fields
+        fields = [
+            ('Student ID:', 'student_id'),
+            ('Name:', 'name'),
+            ('Age:', 'age'),
+            ('Grade:', 'grade'),
+            ('Email:', 'email'),
+            ('Phone:', 'phone')
+        ]
+
+        self.entries = {}
+
+        for i, (label, field) in enumerate(fields):
+            tk.Label(main_frame, text=label, font=('Arial', 10)).grid(
+                row=i, column=0, sticky='w', pady=5)
+
+            entry = tk.Entry(main_frame, font=('Arial', 10), width=30)
+            entry.grid(row=i, column=1, pady=5, padx=(10, 0))
+
+            # Set initial values if editing
+            if values and i < len(values):
+                entry.insert(0, values[i])
+
+            self.entries[field] = entry
+
+        # Buttons
+        button_frame = tk.Frame(main_frame)
+        button_frame.grid(row=len(fields), column=0, columnspan=2, pady=20)
+
+        tk.Button(button_frame, text="Submit", command=self.submit,
+                  bg='#27ae60', fg='white', font=('Arial', 10, 'bold'),
+                  padx=20, pady=5).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(button_frame, text="Cancel", command=self.dialog.destroy,
+                  bg='#e74c3c', fg='white', font=('Arial', 10, 'bold'),
+                  padx=20, pady=5).pack(side=tk.LEFT, padx=5)
+
+    def submit(self):
+        """Validate and submit form"""
+        # Get values
+        result = {}
+        for field, entry in self.entries.items():
+            value = entry.get().strip()
+            if not value:
+                messagebox.showwarning("Warning", f"{field.replace('_', ' ').title()} is required!")
+                entry.focus()
+                return
+            result[field] = value
+
+        # Validate age
+        try:
+            if result['age']:
+                age = int(result['age'])
+                if age < 0 or age > 150:
+                    messagebox.showwarning("Warning", "Please enter a valid age (0-150)")
+                    self.entries['age'].focus()
+                    return
+        except ValueError:
+            messagebox.showwarning("Warning", "Please enter a valid number for age")
+            self.entries['age'].focus()
+            return
+
+        # Validate email format (basic)
+        if '@' not in result['email'] or '.' not in result['email']:
+            messagebox.showwarning("Warning", "Please enter a valid email address")
+            self.entries['email'].focus()
+            return
+
+        self.result = result
+        self.dialog.destroy()
+
+class FilterDialog:
+    """Dialog for choosing grades, an age range and an email domain to filter by
+
+    result is the filters dict for Database.query(), {} to clear them, or
+    None when cancelled.
+    """
+
+    def __init__(self, parent, filters, grades, domains):
+        self.result = None
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Filter Students")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        frame = tk.Frame(self.dialog, padx=20, pady=20)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(frame, text="Grades (none selected: any):", font=('Arial', 10)).grid(
+            row=0, column=0, columnspan=2, sticky='w')
+        self.grades = grades
+        self.grade_list = tk.Listbox(frame, selectmode=tk.MULTIPLE, exportselection=False,
+                                     height=min(8, max(len(grades), 1)))
+        self.grade_list.grid(row=1, column=0, columnspan=2, sticky='we', pady=(0, 10))
+        for index, grade in enumerate(grades):
+            self.grade_list.insert(tk.END, grade)
+            if grade in filters.get('grades', ()):
+                self.grade_list.selection_set(index)
+
+        self.entries = {}
+        for row, (label, field) in enumerate((("Minimum age:", 'min_age'),
+                                              ("Maximum age:", 'max_age')), start=2):
+            tk.Label(frame, text=label, font=('Arial', 10)).grid(row=row, column=0, sticky='w', pady=5)
+            entry = tk.Entry(frame, font=('Arial', 10), width=10)
+            entry.grid(row=row, column=1, sticky='w', pady=5, padx=(10, 0))
+            if filters.get(field) is not None:
+                entry.insert(0, filters[field])
+            self.entries[field] = entry
+
+        tk.Label(frame, text="Email domain:", font=('Arial', 10)).grid(row=4, column=0, sticky='w', pady=5)
+        self.domain = ttk.Combobox(frame, values=domains, width=25)
+        self.domain.grid(row=4, column=1, sticky='w', pady=5, padx=(10, 0))
+        self.domain.set(filters.get('email_domain', ''))
+
+        button_frame = tk.Frame(frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=(15, 0))
+        for text, command, color in (("Apply", self.submit, '#27ae60'),
+                                     ("Clear All", self.clear, '#f39c12'),
+                                     ("Cancel", self.dialog.destroy, '#e74c3c')):
+            tk.Button(button_frame, text=text, command=command,
+                      bg=color, fg='white', font=('Arial', 10, 'bold'),
+                      padx=15, pady=5).pack(side=tk.LEFT, padx=5)
+
+        self.dialog.bind('<Return>', lambda e: self.submit())
+        self.dialog.bind('<Escape>', lambda e: self.dialog.destroy())
+        self.dialog.wait_window()
+
+    def clear(self):
+        self.result = {}
+        self.dialog.destroy()
+
+    def submit(self):
+        """Validate the ages and close with the chosen filters"""
+        result = {}
+        selected = [self.grades[index] for index in self.grade_list.curselection()]
+        if selected:
+            result['grades'] = selected
+        for field, entry in self.entries.items():
+            value = entry.get().strip()
+            if not value:
+                continue
+            try:
+                result[field] = int(value)
+            except ValueError:
+                messagebox.showwarning("Warning", "Please enter a whole number for age",
+                                       parent=self.dialog)
+                entry.focus()
+                return
+        domain = self.domain.get().strip().lstrip('@')
+        if domain:
+            result['email_domain'] = domain
+        self.result = result
+        self.dialog.destroy()
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import threading
+from student import Student, STUDENT_FIELDS
+
+
+class ImportCancelled(Exception):
+    """Raised when an import is cancelled before it finishes"""
+
+
+def _normalize_header(header):
+    """Map 'Student ID' (as written by the CSV export) and 'student_id' alike"""
+    return header.strip().lower().replace(' ', '_')
+
+
+def read_csv(filename):
+    """Yield one dict per CSV row, keyed by student field name"""
+    with open(filename, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_normalize_header(h) for h in header]
+        for row in reader:
+            if not any(row):
+                continue
+            yield dict(zip(columns, row))
+
+
+def read_jsonl(filename):
+    """Yield one dict per non-empty line of a JSON Lines file"""
+    with open(filename, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield {_normalize_header(k): v for k, v in json.loads(line).items()}
+
+
+def read_records(filename):
+    """Pick a reader based on the file extension"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return read_jsonl(filename)
+    if extension == '.scol':
+        from exporter import read_columnar
+        return (dict(zip(STUDENT_FIELDS, row)) for row in read_columnar(filename))
+    return read_csv(filename)
+
+
+def record_to_student(record):
+    """Build a Student from an imported record, raising ValueError if it is invalid"""
+    values = {}
+    for field in STUDENT_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        values[field] = value
+
+    if values['age'] is not None:
+        try:
+            values['age'] = int(values['age'])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid age: {values['age']!r}")
+        if values['age'] < 0 or values['age'] > 150:
+            raise ValueError(f"age out of range: {values['age']}")
+
+    if values['student_id'] is not None:
+        values['student_id'] = str(values['student_id'])
+    return Student(**values)
+
+
+def import_file(db, filename, batch_size=1000, on_conflict='skip', progress=None,
+                cancel_event=None):
+    """Stream a CSV, JSONL or columnar export into db without loading it into memory
+
+    Rows that cannot be parsed are rejected alongside the rows rejected by
+    Database.bulk_add_students. Setting cancel_event stops the import with
+    ImportCancelled before the next batch; batches already added stay.
+    Returns the bulk_add_students result dict.
+    """
+    parse_errors = []
+
+    def students():
+        for record in read_records(filename):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ImportCancelled()
+            try:
+                yield record_to_student(record)
+            except ValueError as e:
+                parse_errors.append((record.get('student_id'), str(e)))
+
+    result = db.bulk_add_students(students(), batch_size=batch_size,
+                                  on_conflict=on_conflict, progress=progress)
+    result['rejected'] = parse_errors + result['rejected']
+    return result
+
+
+class ImportJob:
+    """Runs import_file on a background thread, writing through db's writer
+
+    The Tk thread polls done/finished and may call cancel(). total stays None:
+    the number of rows is not known until the file has been read.
+    """
+
+    def __init__(self, db, filename, batch_size=1000, on_conflict='skip'):
+        self.db = db
+        self.filename = filename
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+        self.done = 0
+        self.total = None
+        self.finished = False
+        self.cancelled = False
+        self.error = None
+        self.result = None
+        self._cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="import-job", daemon=True)
+
+    def start(self):
+        """Start importing"""
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the import to stop before the next batch"""
+        self._cancel_event.set()
+
+    def _progress(self, batch_number, inserted, rejected):
+        self.done = inserted
+
+    def _run(self):
+        try:
+            self.result = import_file(self.db, self.filename, self.batch_size, self.on_conflict,
+                                      progress=self._progress, cancel_event=self._cancel_event)
+        except ImportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
@@ -1,11 +1,22 @@
-import tkinter as tk
-from gui import StudentManagementGUI
-
-def main():
-    """Main function to run the Student Management System"""
-    root = tk.Tk()
-    app = StudentManagementGUI(root)
-    root.mainloop()
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import sys
+
+
+def main():
+    """Main function to run the Student Management System
+
+    With arguments, runs the command line interface instead of the GUI, so
+    scripted jobs never import tkinter.
+    """
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        return cli_main(sys.argv[1:])
+
+    import tkinter as tk
+    from gui import StudentManagementGUI
+
+    root = tk.Tk()
+    app = StudentManagementGUI(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    sys.exit(main())
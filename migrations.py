@@ -0,0 +1,194 @@
+"""Versioned schema migrations, tracked in PRAGMA user_version
+
+Each migration runs in its own transaction together with the user_version
+bump, so a database is always at exactly one known version. New migrations
+are appended to MIGRATIONS; released ones are never edited.
+"""
+
+# (version, description, SQL script)
+MIGRATIONS = [
+    (1, "Index name order, grade and lower(email)", '''
+        CREATE INDEX IF NOT EXISTS idx_students_name_id ON students (name, student_id);
+        CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade);
+        CREATE INDEX IF NOT EXISTS idx_students_email_lower ON students (lower(email));
+    '''),
+    (2, "Log the student_id of every changed row in student_changes", '''
+        CREATE TABLE IF NOT EXISTS student_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT NOT NULL,
+            op TEXT NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS student_changes_ai AFTER INSERT ON students BEGIN
+            INSERT INTO student_changes (student_id, op) VALUES (new.student_id, 'insert');
+        END;
+        CREATE TRIGGER IF NOT EXISTS student_changes_ad AFTER DELETE ON students BEGIN
+            INSERT INTO student_changes (student_id, op) VALUES (old.student_id, 'delete');
+        END;
+        CREATE TRIGGER IF NOT EXISTS student_changes_au AFTER UPDATE ON students BEGIN
+            INSERT INTO student_changes (student_id, op)
+            SELECT old.student_id, 'delete' WHERE old.student_id != new.student_id;
+            INSERT INTO student_changes (student_id, op)
+            VALUES (new.student_id,
+                    CASE WHEN old.student_id = new.student_id THEN 'update' ELSE 'insert' END);
+        END;
+    '''),
+    (3, "Record when and on which replica each change was made, for delta sync", '''
+        ALTER TABLE student_changes ADD COLUMN changed_at REAL;
+        ALTER TABLE student_changes ADD COLUMN origin TEXT;
+        CREATE INDEX IF NOT EXISTS idx_student_changes_student ON student_changes (student_id, seq);
+
+        CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value);
+        INSERT OR IGNORE INTO sync_state VALUES ('replica_id', lower(hex(randomblob(16))));
+        INSERT OR IGNORE INTO sync_state VALUES ('pruned_through', 0);
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT PRIMARY KEY,
+            pulled INTEGER NOT NULL DEFAULT 0,
+            pushed INTEGER NOT NULL DEFAULT 0
+        );
+        -- Holds one row only while changes from another replica are applied
+        CREATE TABLE IF NOT EXISTS sync_context (origin TEXT, changed_at REAL);
+        CREATE VIEW IF NOT EXISTS change_source AS
+            SELECT coalesce(c.changed_at, (julianday('now') - 2440587.5) * 86400.0) AS changed_at,
+                   coalesce(c.origin, s.value) AS origin
+            FROM sync_state s LEFT JOIN sync_context c
+            WHERE s.key = 'replica_id';
+
+        UPDATE student_changes SET (changed_at, origin) = (SELECT changed_at, origin FROM change_source);
+
+        DROP TRIGGER IF EXISTS student_changes_ai;
+        DROP TRIGGER IF EXISTS student_changes_ad;
+        DROP TRIGGER IF EXISTS student_changes_au;
+        CREATE TRIGGER student_changes_ai AFTER INSERT ON students BEGIN
+            INSERT INTO student_changes (student_id, op, changed_at, origin)
+            SELECT new.student_id, 'insert', changed_at, origin FROM change_source;
+        END;
+        CREATE TRIGGER student_changes_ad AFTER DELETE ON students BEGIN
+            INSERT INTO student_changes (student_id, op, changed_at, origin)
+            SELECT old.student_id, 'delete', changed_at, origin FROM change_source;
+        END;
+        CREATE TRIGGER student_changes_au AFTER UPDATE ON students BEGIN
+            INSERT INTO student_changes (student_id, op, changed_at, origin)
+            SELECT old.student_id, 'delete', changed_at, origin FROM change_source
+            WHERE old.student_id != new.student_id;
+            INSERT INTO student_changes (student_id, op, changed_at, origin)
+            SELECT new.student_id,
+                   CASE WHEN old.student_id = new.student_id THEN 'update' ELSE 'insert' END,
+                   changed_at, origin
+            FROM change_source;
+        END;
+    '''),
+    (4, "Index every sortable column with student_id, and email domains, for StudentQuery", '''
+        CREATE INDEX IF NOT EXISTS idx_students_age_id ON students (age, student_id);
+        CREATE INDEX IF NOT EXISTS idx_students_grade_id ON students (grade, student_id);
+        DROP INDEX IF EXISTS idx_students_grade;
+        CREATE INDEX IF NOT EXISTS idx_students_email_id ON students (email, student_id);
+        CREATE INDEX IF NOT EXISTS idx_students_phone_id ON students (phone, student_id);
+        CREATE INDEX IF NOT EXISTS idx_students_email_domain
+            ON students (lower(substr(email, instr(email, '@') + 1)));
+    '''),
+    (5, "Merge the email lookup and email order indexes into one that ignores case", '''
+        DROP INDEX IF EXISTS idx_students_grade;
+        DROP INDEX IF EXISTS idx_students_email_lower;
+        DROP INDEX IF EXISTS idx_students_email_id;
+        CREATE INDEX IF NOT EXISTS idx_students_email_nocase
+            ON students (email COLLATE NOCASE, student_id);
+    '''),
+]
+
+# (description, SQL, parameters) for the queries the GUI and CLI run constantly
+HOT_QUERIES = [
+    ("first page in name order",
+     "SELECT * FROM students ORDER BY name, student_id LIMIT ?", (100,)),
+    ("next page (keyset)",
+     "SELECT * FROM students WHERE (name, student_id) > (?, ?) "
+     "ORDER BY name, student_id LIMIT ?", ('M', '', 100)),
+    ("previous page (keyset)",
+     "SELECT * FROM students WHERE (name, student_id) < (?, ?) "
+     "ORDER BY name DESC, student_id DESC LIMIT ?", ('M', '', 100)),
+    ("student by ID",
+     "SELECT * FROM students WHERE student_id = ?", ('S0000001',)),
+    ("students in a grade",
+     "SELECT * FROM students WHERE grade = ? ORDER BY grade", ('Grade 9',)),
+    ("grade distribution",
+     "SELECT grade, COUNT(*) FROM students WHERE grade IS NOT NULL AND grade != '' "
+     "GROUP BY grade ORDER BY grade", ()),
+    ("duplicate email check",
+     "SELECT * FROM students WHERE email = ? COLLATE NOCASE", ('a@example.com',)),
+    ("next page by age (keyset)",
+     "SELECT * FROM students WHERE age IS NOT NULL AND (age, student_id) > (?, ?) "
+     "ORDER BY age, student_id LIMIT ?", (15, 'S0000001', 100)),
+    ("previous page by email (keyset)",
+     "SELECT * FROM students WHERE email IS NOT NULL "
+     "AND (email, student_id) < (? COLLATE NOCASE, ?) "
+     "ORDER BY email COLLATE NOCASE DESC, student_id DESC LIMIT ?", ('m', '', 100)),
+    ("students without a phone, by ID",
+     "SELECT * FROM students WHERE phone IS NULL AND student_id > ? ORDER BY student_id LIMIT ?",
+     ('', 100)),
+    ("students in an email domain",
+     "SELECT * FROM students WHERE lower(substr(email, instr(email, '@') + 1)) = ?",
+     ('gmail.com',)),
+    ("changes since a watermark",
+     "SELECT seq, student_id, op FROM student_changes WHERE seq > ? ORDER BY seq", (0,)),
+]
+
+
+def schema_version(conn):
+    """Return the migration version the database is at"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def last_change_seq(conn):
+    """Return the seq of the newest entry ever written to student_changes"""
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'student_changes'").fetchone()
+    return row[0] if row else 0
+
+
+def pruned_through(conn):
+    """Return the seq up to which student_changes has been pruned"""
+    return conn.execute(
+        "SELECT value FROM sync_state WHERE key = 'pruned_through'").fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply every migration newer than the database; returns the versions applied
+
+    Runs ANALYZE afterwards so the query planner has statistics for the new
+    indexes.
+    """
+    current = schema_version(conn)
+    applied = []
+    for version, description, script in migrations:
+        if version <= current:
+            continue
+        conn.executescript(f'''
+            BEGIN;
+            {script}
+            PRAGMA user_version = {int(version)};
+            COMMIT;
+        ''')
+        applied.append(version)
+    if applied:
+        conn.execute('ANALYZE')
+        conn.commit()
+    return applied
+
+
+def explain(conn, query, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a query"""
+    return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+
+
+def is_full_scan(detail):
+    """True for plan steps that read the whole students table or sort in a temp b-tree"""
+    return detail == 'SCAN students' or 'USE TEMP B-TREE' in detail
+
+
+def check_query_plans(conn, queries=HOT_QUERIES):
+    """Return (description, plan step) for every hot query step that is a full scan"""
+    problems = []
+    for description, query, params in queries:
+        for detail in explain(conn, query, params):
+            if is_full_scan(detail):
+                problems.append((description, detail))
+    return problems
@@ -0,0 +1,178 @@
+"""Opt-in latency instrumentation for the Database and GUI hot paths
+
+A Profiler keeps a log-scale timing histogram per operation and a short log
+of slow calls together with the SQL statements they ran, captured with
+SQLite's trace callback. Nothing is wrapped or traced until profiling is
+enabled, so while it is off the only cost is an attribute check on the few
+paths that look for a profiler.
+"""
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Bucket i counts durations shorter than 2**i microseconds
+BUCKETS = 32
+
+# Statements kept per slow call; the rest are only counted
+MAX_STATEMENTS = 20
+
+
+class Histogram:
+    """Count, total, extremes and power-of-two buckets of a set of durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.last = None
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, p):
+        """Upper bound in seconds of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(2 ** i / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Summary in milliseconds, plus the non-empty buckets"""
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 3)
+
+        return {
+            'count': self.count,
+            'total_ms': ms(self.total),
+            'mean_ms': ms(self.total / self.count) if self.count else None,
+            'min_ms': ms(self.min),
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(self.max),
+            'buckets_us': {f"<{2 ** i}": count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    """Thread-safe timing histograms and a slow-call log
+
+    Calls taking slow_ms or longer are logged with the SQL statements they
+    ran; the last max_slow of them are kept.
+    """
+
+    def __init__(self, slow_ms=50.0, max_slow=200):
+        self.slow_ms = slow_ms
+        self.histograms = {}
+        self.slow_calls = deque(maxlen=max_slow)
+        self.statements = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, seconds, statements=()):
+        """Add one timing to name's histogram"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            if seconds * 1000 >= self.slow_ms:
+                self.slow_calls.append({
+                    'name': name,
+                    'ms': round(seconds * 1000, 3),
+                    'at': time.time(),
+                    'statements': list(statements),
+                })
+
+    @contextmanager
+    def span(self, name):
+        """Time a with block and collect the SQL traced on this thread meanwhile"""
+        stack = self._local.__dict__.setdefault('stack', [])
+        statements = []
+        stack.append(statements)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1].extend(statements[:MAX_STATEMENTS - len(stack[-1])])
+            self.record(name, elapsed, statements)
+
+    def trace(self, statement):
+        """sqlite3 trace callback: attribute a statement to the innermost running span
+
+        Statements run by triggers and virtual tables arrive prefixed with
+        "--"; they are counted but not listed.
+        """
+        with self._lock:
+            self.statements += 1
+        stack = getattr(self._local, 'stack', None)
+        if stack and len(stack[-1]) < MAX_STATEMENTS and not statement.startswith('--'):
+            stack[-1].append(' '.join(statement.split()))
+
+    def wrap(self, function, name):
+        """Return function timed under name"""
+        def timed(*args, **kwargs):
+            with self.span(name):
+                return function(*args, **kwargs)
+
+        timed.__wrapped__ = function
+        return timed
+
+    def instrument(self, obj, method_names, prefix):
+        """Time the named methods of one object, shadowing them with timed wrappers"""
+        for method_name in method_names:
+            setattr(obj, method_name,
+                    self.wrap(getattr(obj, method_name), f"{prefix}.{method_name}"))
+
+    @staticmethod
+    def uninstrument(obj, method_names):
+        """Remove the wrappers installed by instrument()"""
+        for method_name in method_names:
+            obj.__dict__.pop(method_name, None)
+
+    def reset(self):
+        """Forget every timing recorded so far"""
+        with self._lock:
+            self.histograms.clear()
+            self.slow_calls.clear()
+            self.statements = 0
+            self.started = time.time()
+
+    def snapshot(self):
+        """All timings as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'seconds': round(time.time() - self.started, 3),
+                'slow_ms': self.slow_ms,
+                'statements': self.statements,
+                'histograms': {name: histogram.to_dict()
+                               for name, histogram in sorted(self.histograms.items())},
+                'slow_calls': list(self.slow_calls),
+            }
+
+    def dump(self, filename):
+        """Write snapshot() to filename as JSON"""
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, indent=2)
@@ -0,0 +1,125 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+# Longer results are sized from an evenly spaced sample of about this many rows
+SAMPLE_ROWS = 256
+
+
+def row_size(item):
+    """Rough number of bytes held by one row of a result"""
+    if isinstance(item, tuple):
+        return sys.getsizeof(item) + sum(sys.getsizeof(v) for v in item)
+    if hasattr(item, 'to_tuple'):
+        return sys.getsizeof(item) + sum(sys.getsizeof(v) for v in item.to_tuple())
+    return sys.getsizeof(item)
+
+
+def estimate_size(value, limit=None):
+    """Rough number of bytes held by a cached query result
+
+    Stops counting once the size passes limit, so a result too big to cache
+    is not walked in full; the size returned is then only known to exceed it.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        step = max(1, len(value) // SAMPLE_ROWS)
+        for index in range(0, len(value), step):
+            size += row_size(value[index]) * step
+            if limit is not None and size > limit:
+                return size
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key)
+            size += estimate_size(item, None if limit is None else limit - size)
+            if limit is not None and size > limit:
+                return size
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results within a memory budget
+
+    Every entry carries a set of tags naming the data it was built from, so
+    a write can drop exactly the entries it may have changed. A generation
+    counter stops results computed before an invalidation from being stored.
+    """
+
+    def __init__(self, max_bytes=32 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (value, size, tags)
+        self._keys_by_tag = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, tags, generation):
+        """Store a result computed while the cache was at generation"""
+        size = estimate_size(value, self.max_bytes)
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+            self._discard(key)
+            self._entries[key] = (value, size, tags)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tags=None):
+        """Drop the entries carrying any of tags, or every entry if tags is None"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            if tags is None:
+                self._entries.clear()
+                self._keys_by_tag.clear()
+                self.current_bytes = 0
+                return
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._discard(key)
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current footprint"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+            }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        value, size, tags = entry
+        self.current_bytes -= size
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
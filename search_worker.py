@@ -0,0 +1,99 @@
+import queue
+import sqlite3
+import threading
+
+
+class SearchWorker:
+    """Runs searches on a background thread using a pooled read connection
+
+    Every submit() bumps a generation counter. A search that is superseded
+    while it runs is interrupted with sqlite3.Connection.interrupt, and only
+    results for the latest generation are handed back through poll(). A
+    search that fails hands back its exception instead, and the worker
+    carries on with the next one.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.generation = 0
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.thread = threading.Thread(target=self._run, name="search-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, search_term, fuzzy=False, include_archived=False):
+        """Queue a search, cancelling any older one; returns its generation
+
+        With fuzzy, names are matched tolerating typos (Database.fuzzy_search).
+        With include_archived, a plain search also covers archived students.
+        """
+        generation = self.cancel()
+        self.requests.put((generation, search_term, fuzzy, include_archived))
+        return generation
+
+    def poll(self):
+        """Return (search_term, students, error) for the latest search once it is done, else None
+
+        error is None on success; otherwise the exception the search raised
+        and students is None.
+        """
+        latest = None
+        while True:
+            try:
+                generation, search_term, students, error = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if generation == self.generation:
+                latest = (search_term, students, error)
+
+    def cancel(self):
+        """Abandon the pending search, if any; returns the new generation"""
+        with self._lock:
+            self.generation += 1
+            if self._conn is not None:
+                self._conn.interrupt()
+            return self.generation
+
+    def close(self):
+        """Stop the worker thread"""
+        self.cancel()
+        self.requests.put(None)
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            # Skip straight to the newest request if several queued up
+            while request is not None and not self.requests.empty():
+                request = self.requests.get_nowait()
+            if request is None:
+                return
+
+            generation, search_term, fuzzy, include_archived = request
+            if generation != self.generation:
+                continue
+            students = error = None
+            try:
+                with self.db.pin_reader() as conn:
+                    with self._lock:
+                        if generation != self.generation:
+                            continue
+                        self._conn = conn
+                    try:
+                        if fuzzy:
+                            students = self.db.fuzzy_search(search_term)
+                        else:
+                            students = self.db.search_student(
+                                search_term, include_archived=include_archived)
+                    finally:
+                        with self._lock:
+                            self._conn = None
+            except sqlite3.OperationalError as e:
+                if generation != self.generation:
+                    continue  # Interrupted by a newer search
+                error = e
+            except Exception as e:
+                error = e
+            if generation == self.generation:
+                self.results.put((generation, search_term, students, error))
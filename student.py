@@ -1,22 +1,40 @@
-class Student:
-    def __init__(self, student_id, name, age, grade, email, phone):
-        self.student_id = student_id
-        self.name = name
-        self.age = age
-        self.grade = grade
-        self.email = email
-        self.phone = phone
-
-    def to_dict(self):
-        """Convert student object to dictionary"""
-        return {
-            'student_id': self.student_id,
-            'name': self.name,
-            'age': self.age,
-            'grade': self.grade,
-            'email': self.email,
-            'phone': self.phone
-        }
-
-    def __str__(self):
-        return f"ID: {self.student_id}, Name: {self.name}, Age: {self.age}, Grade: {self.grade}"
\ No newline at end of file
+STUDENT_FIELDS = ('student_id', 'name', 'age', 'grade', 'email', 'phone')
+
+
+class Student:
+    # No per-instance __dict__: a roster of millions of students stays compact
+    __slots__ = STUDENT_FIELDS
+
+    def __init__(self, student_id, name, age, grade, email, phone):
+        self.student_id = student_id
+        self.name = name
+        self.age = age
+        self.grade = grade
+        self.email = email
+        self.phone = phone
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """sqlite3 row_factory building a Student from a STUDENT_FIELDS row"""
+        return cls(*row)
+
+    def to_tuple(self):
+        """Convert student object to a tuple in STUDENT_FIELDS order"""
+        return (self.student_id, self.name, self.age, self.grade, self.email, self.phone)
+
+    def to_dict(self):
+        """Convert student object to dictionary"""
+        return {
+            'student_id': self.student_id,
+            'name': self.name,
+            'age': self.age,
+            'grade': self.grade,
+            'email': self.email,
+            'phone': self.phone
+        }
+
+    def __repr__(self):
+        return f"Student{self.to_tuple()!r}"
+
+    def __str__(self):
+        return f"ID: {self.student_id}, Name: {self.name}, Age: {self.age}, Grade: {self.grade}"
@@ -0,0 +1,249 @@
+"""Composable filtered and sorted student listings with keyset pagination
+
+A StudentQuery comes from Database.query() and is refined with filter() and
+order_by(), each returning a new query. It only builds SQL: rows are read
+through the Database, so they share its read connections and query cache.
+Every sort order ends in student_id, which makes it total, and each has a
+matching (column, student_id) index so a page is one index seek. Emails sort
+ignoring case, so the one index on them also serves Database.find_by_email.
+"""
+from database import ASCII_LOWER, EMAIL_DOMAIN_SQL, STUDENT_COLUMNS
+from student import STUDENT_FIELDS
+
+# Columns that can hold NULL; their NULLs sort first ascending, last descending
+NULLABLE_FIELDS = ('age', 'grade', 'email', 'phone')
+
+FILTERS = ('grades', 'min_age', 'max_age', 'email_domain')
+
+# Columns compared with COLLATE NOCASE, matching their index
+NOCASE_FIELDS = ('email',)
+
+# Filters matching at least this share of the roster are checked while walking
+# the sort column's index; narrower ones are searched through their own index
+SCAN_FRACTION = 0.02
+
+
+class Descending:
+    """Sort key wrapper that orders in reverse"""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def order_term(column):
+    """column as an ORDER BY term in the collation of its index"""
+    return f'{column} COLLATE NOCASE' if column in NOCASE_FIELDS else column
+
+
+def placeholder(column):
+    """A parameter compared against column in the collation of its index"""
+    return '? COLLATE NOCASE' if column in NOCASE_FIELDS else '?'
+
+
+def email_domain(email):
+    """Domain part of an email address as EMAIL_DOMAIN_SQL computes it"""
+    return email[email.find('@') + 1:].translate(ASCII_LOWER)
+
+
+class StudentQuery:
+    """Students matching a set of filters, in the order of one column
+
+    Filters: grades (a collection of grade values), min_age and max_age
+    (inclusive) and email_domain (compared ignoring case). None means no
+    filter.
+    """
+
+    def __init__(self, db, sort='name', descending=False, **filters):
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"unknown filters {sorted(unknown)}, expected some of {FILTERS}")
+        if sort not in STUDENT_FIELDS:
+            raise ValueError(f"sort must be one of {STUDENT_FIELDS}")
+        self.db = db
+        self.sort = sort
+        self.descending = descending
+        self.grades = None
+        self.min_age = None
+        self.max_age = None
+        self.email_domain = None
+        for name, value in filters.items():
+            setattr(self, name, value)
+        if self.grades is not None:
+            self.grades = tuple(sorted(set(self.grades)))
+        if self.email_domain is not None:
+            self.email_domain = self.email_domain.translate(ASCII_LOWER)
+        self._broad = None
+
+    def filters(self):
+        """Return the filters in effect as a dict"""
+        return {name: getattr(self, name) for name in FILTERS if getattr(self, name) is not None}
+
+    def filter(self, **filters):
+        """Return a copy with the given filters replaced; pass None to drop one"""
+        return StudentQuery(self.db, self.sort, self.descending, **{**self.filters(), **filters})
+
+    def order_by(self, sort, descending=False):
+        """Return a copy sorted by another column"""
+        return StudentQuery(self.db, sort, descending, **self.filters())
+
+    def _conditions(self, ordered=False):
+        """Return (SQL conditions, parameters) for the filters
+
+        With ordered, filters on columns other than the sort column are kept
+        away from their indexes (a unary +) when they match a large share of
+        the roster. SQLite would otherwise search the filter's index and sort
+        every match just to return one page, where walking the sort index and
+        skipping non-matching rows fills a page after a few hundred rows.
+        """
+        def column(name):
+            return f'+{name}' if ordered and name != self.sort and self._is_broad() else name
+
+        conditions = []
+        params = []
+        if self.grades is not None:
+            conditions.append(f"{column('grade')} IN ({', '.join('?' * len(self.grades))})"
+                              if self.grades else '0')
+            params += self.grades
+        if self.min_age is not None:
+            conditions.append(f"{column('age')} >= ?")
+            params.append(self.min_age)
+        if self.max_age is not None:
+            conditions.append(f"{column('age')} <= ?")
+            params.append(self.max_age)
+        if self.email_domain is not None:
+            conditions.append(f"{column(EMAIL_DOMAIN_SQL.format('email'))} = ?")
+            params.append(self.email_domain)
+        return conditions, params
+
+    def _is_broad(self):
+        """True if the filters match at least SCAN_FRACTION of the students
+
+        Worked out once per query: a stale answer only costs speed.
+        """
+        if self._broad is None:
+            total = self.db.get_student_count()
+            self._broad = self.count() >= total * SCAN_FRACTION
+        return self._broad
+
+    def matches(self, student):
+        """True if student passes the filters, mirroring the SQL"""
+        if self.grades is not None and student.grade not in self.grades:
+            return False
+        if self.min_age is not None and (student.age is None or student.age < self.min_age):
+            return False
+        if self.max_age is not None and (student.age is None or student.age > self.max_age):
+            return False
+        if self.email_domain is not None and (
+                student.email is None or email_domain(student.email) != self.email_domain):
+            return False
+        return True
+
+    def _columns(self):
+        return ('student_id',) if self.sort == 'student_id' else (self.sort, 'student_id')
+
+    def key(self, student):
+        """The keyset pagination key of student: its sort column values"""
+        return tuple(getattr(student, column) for column in self._columns())
+
+    def sort_key(self, student):
+        """Python sort key that orders students the way the SQL does"""
+        key = tuple((value is not None,
+                     value.translate(ASCII_LOWER) if value and column in NOCASE_FIELDS else value)
+                    for column, value in zip(self._columns(), self.key(student)))
+        return Descending(key) if self.descending else key
+
+    def _segments(self):
+        """(condition, columns) for each block of the sort order
+
+        SQL row values cannot compare NULLs, so the rows whose sort column is
+        NULL are paged as a block of their own, in student_id order.
+        """
+        if self.sort not in NULLABLE_FIELDS:
+            return [(None, self._columns())]
+        values = (f'{self.sort} IS NOT NULL', self._columns())
+        nulls = (f'{self.sort} IS NULL', ('student_id',))
+        return [values, nulls] if self.descending else [nulls, values]
+
+    def _segment_of(self, key):
+        """Index in _segments() of the segment holding the row with this key"""
+        if self.sort not in NULLABLE_FIELDS:
+            return 0
+        nulls_first = not self.descending
+        return 0 if (key[0] is None) == nulls_first else 1
+
+    def _fetch(self, segment, bound, backwards, limit, raw):
+        """Up to limit rows of one segment beyond bound (a key or None)"""
+        condition, columns = segment
+        conditions, params = self._conditions(ordered=True)
+        if condition:
+            conditions.append(condition)
+        descending = self.descending != backwards
+        if bound is not None:
+            key = bound[-len(columns):]
+            operator = '<' if descending else '>'
+            conditions.append(f"({', '.join(columns)}) {operator} "
+                              f"({', '.join(placeholder(column) for column in columns)})")
+            params += key
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        direction = ' DESC' if descending else ''
+        order = ', '.join(order_term(column) + direction for column in columns)
+        return self.db._select(f'SELECT {STUDENT_COLUMNS} FROM students {where} '
+                               f'ORDER BY {order} LIMIT ?', params + [limit], raw)
+
+    def page(self, limit=100, after=None, before=None, raw=False):
+        """Fetch one page of students in this query's order
+
+        after/before are the key() of the row just outside the requested page,
+        so every page costs an index seek instead of an OFFSET scan.
+        """
+        bound = after if after is not None else before
+        backwards = before is not None
+        segments = self._segments()
+        if bound is None:
+            start = len(segments) - 1 if backwards else 0
+        else:
+            start = self._segment_of(bound)
+        order = range(start, -1, -1) if backwards else range(start, len(segments))
+
+        rows = []
+        for index in order:
+            rows += self._fetch(segments[index], bound if index == start else None,
+                                backwards, limit - len(rows), raw)
+            if len(rows) >= limit:
+                break
+        if backwards:
+            rows.reverse()
+        return rows
+
+    def key_at(self, position):
+        """Return the key() of the row at a position in this order, or None"""
+        conditions, params = self._conditions(ordered=True)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        direction = ' DESC' if self.descending else ''
+        columns = self._columns()
+        order = ', '.join(order_term(column) + direction for column in columns)
+        rows = self.db._select(f"SELECT {', '.join(columns)} FROM students {where} "
+                               f"ORDER BY {order} LIMIT 1 OFFSET ?", params + [position], raw=True)
+        return rows[0] if rows else None
+
+    def student_ids(self):
+        """Return the IDs of every matching student, in no particular order"""
+        conditions, params = self._conditions()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return [row[0] for row in self.db._select(f'SELECT student_id FROM students {where}',
+                                                  params, raw=True)]
+
+    def count(self):
+        """Return the number of students matching the filters"""
+        conditions, params = self._conditions()
+        if not conditions:
+            return self.db.get_student_count()
+        return self.db._scalar(f"SELECT COUNT(*) FROM students WHERE {' AND '.join(conditions)}",
+                               params)
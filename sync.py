@@ -0,0 +1,243 @@
+"""Delta sync between students.db replicas through the student_changes log
+
+Every write to students is logged by trigger with the time it was made and
+the replica it was made on (its origin). A sync exchanges only the latest
+state of the students changed since the other side's watermark, so its
+cost follows the number of changes rather than the roster size. A change
+the receiving replica already has (same time and origin) is skipped.
+
+Start a new replica with clone(), which copies the whole database with the
+SQLite backup API; delta sync only covers changes made after the log was
+created. sync() and clone() prune the log past the oldest watermark in
+sync_peers, so it stays about one entry per student; a replica that has
+never synced with either side, directly or through a clone, must be cloned.
+
+Conflicts (a student changed on both sides since the last sync) are
+resolved by policy:
+  lww     the most recent change wins (ties broken by origin)
+  local   the replica running sync() keeps its version
+  remote  the other replica's version wins
+"""
+import sqlite3
+from database import STUDENT_COLUMNS
+from migrations import last_change_seq, pruned_through
+from student import STUDENT_FIELDS
+
+POLICIES = ('lww', 'local', 'remote')
+
+# The policy the remote side applies when sync() pushes local changes to it
+MIRRORED_POLICIES = {'lww': 'lww', 'local': 'remote', 'remote': 'local'}
+
+
+class SyncError(Exception):
+    """Raised when two replicas can no longer be synced from the change log"""
+
+
+def replica_id(db):
+    """Return the ID identifying db's changes in other replicas"""
+    with db.reader() as conn:
+        return _replica_id(conn)
+
+
+def _replica_id(conn):
+    return conn.execute("SELECT value FROM sync_state WHERE key = 'replica_id'").fetchone()[0]
+
+
+def clone(db, path):
+    """Copy db into a new replica at path; returns the new replica's ID
+
+    The copy gets its own replica ID, and both databases record that they
+    are in sync with each other. The copy holds the source's change log up
+    to the clone, so it keeps the source's watermarks for its other peers.
+    """
+    target = sqlite3.connect(path)
+    try:
+        with db.reader() as conn:
+            source_id = _replica_id(conn)
+            conn.backup(target)
+        new_id = target.execute("SELECT lower(hex(randomblob(16)))").fetchone()[0]
+        seq = last_change_seq(target)
+        with target:
+            target.execute("UPDATE sync_state SET value = ? WHERE key = 'replica_id'", (new_id,))
+            target.execute('INSERT INTO sync_peers (peer_id, pulled, pushed) VALUES (?, ?, ?)',
+                           (source_id, seq, seq))
+    finally:
+        target.close()
+    _save_watermarks(db, new_id, seq, seq)
+    prune_synced(db)
+    return new_id
+
+
+def _save_watermarks(db, peer_id, pulled, pushed):
+    with db.write_lock, db.conn:
+        db.conn.execute('''
+            INSERT INTO sync_peers (peer_id, pulled, pushed) VALUES (?, ?, ?)
+            ON CONFLICT(peer_id) DO UPDATE SET pulled = excluded.pulled, pushed = excluded.pushed
+        ''', (peer_id, pulled, pushed))
+
+
+def changes_since(db, watermark=0):
+    """Return (new watermark, changes) for the students changed after watermark
+
+    Each change is a dict with the student's current row (None once it is
+    deleted) and the time and origin of its latest change.
+    """
+    with db.reader() as conn:
+        # One read transaction, so the rows match the watermark
+        conn.execute('BEGIN')
+        try:
+            if watermark < pruned_through(conn):
+                raise SyncError("The change log was pruned past the watermark; clone the replica again")
+            high = last_change_seq(conn)
+            rows = conn.execute(f'''
+                SELECT c.seq, c.student_id, c.changed_at, c.origin, s.student_id IS NOT NULL,
+                       {', '.join('s.' + field for field in STUDENT_FIELDS)}
+                FROM student_changes c LEFT JOIN students s ON s.student_id = c.student_id
+                WHERE c.seq IN (SELECT max(seq) FROM student_changes
+                                WHERE seq > ? AND seq <= ? GROUP BY student_id)
+                ORDER BY c.seq
+            ''', (watermark, high)).fetchall()
+        finally:
+            conn.execute('COMMIT')
+    changes = [{'seq': seq, 'student_id': student_id, 'changed_at': changed_at, 'origin': origin,
+                'row': tuple(row) if exists else None}
+               for seq, student_id, changed_at, origin, exists, *row in rows]
+    return high, changes
+
+
+def apply_changes(db, changes, policy='lww', since=0):
+    """Apply changes from another replica in one transaction
+
+    A student changed locally after seq since is a conflict, settled by
+    policy. Returns {'applied': [student_id, ...], 'skipped': [student_id, ...]}.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy}")
+    placeholders = ', '.join('?' * len(STUDENT_FIELDS))
+    assignments = ', '.join(f"{field} = excluded.{field}" for field in STUDENT_FIELDS[1:])
+    applied = []
+    skipped = []
+    with db.write_lock, db.conn:
+        cursor = db.conn.cursor()
+        cursor.execute('DELETE FROM sync_context')
+        cursor.execute('INSERT INTO sync_context (origin, changed_at) VALUES (NULL, NULL)')
+        try:
+            for change in changes:
+                student_id = change['student_id']
+                local = cursor.execute(
+                    'SELECT seq, changed_at, origin FROM student_changes '
+                    'WHERE student_id = ? ORDER BY seq DESC LIMIT 1', (student_id,)).fetchone()
+                if local is not None and _keep_local(local, change, policy, since):
+                    skipped.append(student_id)
+                    continue
+                # The triggers log the change with its original time and origin
+                cursor.execute('UPDATE sync_context SET origin = ?, changed_at = ?',
+                               (change['origin'], change['changed_at']))
+                if change['row'] is None:
+                    cursor.execute('DELETE FROM students WHERE student_id = ?', (student_id,))
+                else:
+                    cursor.execute(f'''
+                        INSERT INTO students ({STUDENT_COLUMNS}) VALUES ({placeholders})
+                        ON CONFLICT(student_id) DO UPDATE SET {assignments}
+                    ''', change['row'])
+                applied.append(student_id)
+        finally:
+            cursor.execute('DELETE FROM sync_context')
+    db._invalidate(applied)
+    return {'applied': applied, 'skipped': skipped}
+
+
+def _keep_local(local, change, policy, since):
+    """True if the local version of a student should win over change"""
+    seq, changed_at, origin = local
+    if (changed_at, origin) == (change['changed_at'], change['origin']):
+        return True  # Already applied
+    if policy == 'lww':
+        return (changed_at, origin) > (change['changed_at'], change['origin'])
+    return policy == 'local' and seq > since
+
+
+def sync(local, remote, policy='lww'):
+    """Exchange changes between two replicas in both directions
+
+    Both replicas record the new watermarks in their sync_peers table, so
+    the next sync between them, started from either side, only looks at
+    newer changes. Returns the applied and skipped student IDs for each
+    direction.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy}")
+    local_id = replica_id(local)
+    peer_id = replica_id(remote)
+    if local_id == peer_id:
+        raise SyncError("Both databases have the same replica ID")
+    with local.reader() as conn:
+        row = conn.execute('SELECT pulled, pushed FROM sync_peers WHERE peer_id = ?',
+                           (peer_id,)).fetchone()
+    if row is None:
+        # remote may be a clone of one of local's peers, which knows local already
+        with remote.reader() as conn:
+            row = conn.execute('SELECT pushed, pulled FROM sync_peers WHERE peer_id = ?',
+                               (local_id,)).fetchone()
+    pulled, pushed = row or (0, 0)
+
+    remote_high, incoming = changes_since(remote, pulled)
+    pull = apply_changes(local, incoming, policy, since=pushed)
+    local_high, outgoing = changes_since(local, pushed)
+    push = apply_changes(remote, outgoing, MIRRORED_POLICIES[policy], since=remote_high)
+
+    _save_watermarks(local, peer_id, remote_high, local_high)
+    _save_watermarks(remote, local_id, local_high, remote_high)
+    prune_synced(local)
+    prune_synced(remote)
+    return {'pulled': pull, 'pushed': push}
+
+
+def prune_changes(db, through=None):
+    """Shrink the change log; returns the number of entries deleted
+
+    Entries superseded by a newer change to the same student are always
+    safe to drop. With through, every entry up to that seq is dropped too;
+    replicas and snapshots whose watermark is older must then start over.
+    """
+    with db.write_lock, db.conn:
+        deleted = db.conn.execute('''
+            DELETE FROM student_changes
+            WHERE seq NOT IN (SELECT max(seq) FROM student_changes GROUP BY student_id)
+        ''').rowcount
+        if through is not None:
+            deleted += db.conn.execute('DELETE FROM student_changes WHERE seq <= ?',
+                                       (through,)).rowcount
+            db.conn.execute('''
+                UPDATE sync_state SET value = max(value, ?) WHERE key = 'pruned_through'
+            ''', (through,))
+    return deleted
+
+
+def prune_synced(db):
+    """Drop the log entries every known peer has been sent; returns how many
+
+    Run after each sync and clone, so the log holds the changes some peer
+    in sync_peers is still missing plus one entry per existing student:
+    apply_changes needs that entry to recognise a change it already has.
+    Only the entries logged since the last prune are looked at, so the cost
+    follows the number of changes. With no peers nothing is dropped.
+    """
+    with db.write_lock, db.conn:
+        cursor = db.conn.cursor()
+        through = cursor.execute('SELECT min(pushed) FROM sync_peers').fetchone()[0]
+        since = pruned_through(db.conn)
+        if not through or through <= since:
+            return 0
+        deleted = cursor.execute('''
+            DELETE FROM student_changes WHERE seq IN (
+                SELECT older.seq
+                FROM student_changes newer
+                JOIN student_changes older
+                    ON older.student_id = newer.student_id AND older.seq < newer.seq
+                WHERE newer.seq > ? AND newer.seq <= ?)
+        ''', (since, through)).rowcount
+        deleted += cursor.execute("DELETE FROM student_changes WHERE seq > ? AND seq <= ? "
+                                  "AND op = 'delete'", (since, through)).rowcount
+        cursor.execute("UPDATE sync_state SET value = ? WHERE key = 'pruned_through'", (through,))
+    return deleted
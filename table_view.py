@@ -0,0 +1,344 @@
+from bisect import bisect_left
+from tkinter import font as tkfont
+from tkinter import ttk
+
+# Event.state bits of Shift and Control, which extend a selection instead of replacing it
+EXTEND_SELECTION = 0x0001 | 0x0004
+
+
+def row_values(student):
+    """Treeview values for one student"""
+    return student.to_tuple()
+
+
+class RosterSource:
+    """Pages through the students of a StudentQuery with keyset pagination
+
+    Only a block covering the visible window plus a prefetch buffer is kept in
+    memory, so memory use does not depend on the number of students. Without
+    a query the whole roster is shown in name order.
+    """
+
+    def __init__(self, db, query=None):
+        self.db = db
+        self.query = query or db.query()
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget cached rows and the row count after the data changed"""
+        self.block_start = 0
+        self.block = []
+        self._count = None
+
+    def count(self):
+        """Return the total number of rows"""
+        if self._count is None:
+            self._count = self.query.count()
+        return self._count
+
+    def rows(self, start, size):
+        """Return the students at positions start..start+size-1"""
+        end = min(start + size, self.count())
+        block_end = self.block_start + len(self.block)
+
+        if self.block and self.block_start <= start and end <= block_end:
+            pass
+        elif self.block and self.block_start <= start <= block_end:
+            # Scrolling down: continue from the last cached key
+            self.block += self.query.page(end - block_end, after=self.query.key(self.block[-1]))
+        elif self.block and start < self.block_start < end:
+            # Scrolling up: continue backwards from the first cached key
+            missing = self.block_start - start
+            self.block = self.query.page(
+                missing, before=self.query.key(self.block[0])) + self.block
+            self.block_start -= missing
+        else:
+            # Jump (scrollbar drag or first load): locate an anchor key first
+            anchor = self.query.key_at(start - 1) if start > 0 else None
+            self.block = self.query.page(end - start, after=anchor)
+            self.block_start = start
+
+        # Trim the block back to the requested window
+        offset = start - self.block_start
+        self.block = self.block[offset:offset + (end - start)]
+        self.block_start = start
+        return self.block
+
+    def insert(self, student):
+        """Account for a newly added student without re-querying"""
+        if not self.query.matches(student):
+            return
+        if self._count is not None:
+            self._count += 1
+        if not self.block:
+            return
+        sort_key = self.query.sort_key
+        index = bisect_left(self.block, sort_key(student), key=sort_key)
+        if index == 0 and self.block_start > 0:
+            # Sorts before the cached block, which shifts down by one row
+            self.block_start += 1
+        elif index == len(self.block) and self.block_start + index < self._count - 1:
+            pass  # Sorts after the cached block and is not the new last row
+        else:
+            self.block.insert(index, student)
+
+    def remove(self, student):
+        """Account for a deleted student without re-querying"""
+        if not self.query.matches(student):
+            return
+        if self._count is not None:
+            self._count -= 1
+        if not self.block:
+            return
+        sort_key = self.query.sort_key
+        key = sort_key(student)
+        index = bisect_left(self.block, key, key=sort_key)
+        if index < len(self.block) and sort_key(self.block[index]) == key:
+            del self.block[index]
+        elif index == 0 and self.block_start > 0:
+            self.block_start -= 1
+
+    def update(self, old, new):
+        """Account for an edited student, which may have moved in the sort order"""
+        self.remove(old)
+        self.insert(new)
+
+    def apply(self, updated, removed):
+        """Account for a batch of edited and deleted students
+
+        Edited rows may have moved anywhere in the sort order, so rather than
+        placing each one the cached rows are dropped; the next render reads
+        just the visible window again.
+        """
+        self.invalidate()
+
+    def student_ids(self):
+        """Return the IDs of every row"""
+        return self.query.student_ids()
+
+
+class ListSource:
+    """Serves rows from an already fetched list, e.g. search results"""
+
+    def __init__(self, students):
+        self.students = students
+
+    def invalidate(self):
+        """Nothing is cached beyond the list itself"""
+
+    def count(self):
+        """Return the total number of rows"""
+        return len(self.students)
+
+    def rows(self, start, size):
+        """Return the students at positions start..start+size-1"""
+        return self.students[start:start + size]
+
+    def insert(self, student):
+        """New students are not added to a fixed result list"""
+
+    def remove(self, student):
+        """Drop a deleted student from the list"""
+        self.students = [s for s in self.students if s.student_id != student.student_id]
+
+    def update(self, old, new):
+        """Replace an edited student in place, keeping the result order"""
+        for index, student in enumerate(self.students):
+            if student.student_id == old.student_id:
+                self.students[index] = new
+                break
+
+    def apply(self, updated, removed):
+        """Replace edited and drop deleted students in one pass"""
+        replacements = {s.student_id: s for s in updated}
+        removed_ids = {s.student_id for s in removed}
+        self.students = [replacements.get(s.student_id, s) for s in self.students
+                         if s.student_id not in removed_ids]
+
+    def student_ids(self):
+        """Return the IDs of every row"""
+        return [s.student_id for s in self.students]
+
+
+class VirtualTable:
+    """Drives a Treeview that only holds the rows currently on screen
+
+    The Treeview never contains more than the visible rows; the row source
+    supplies them on demand and the scrollbar is driven from the source's row
+    count rather than from the Treeview contents.
+    """
+
+    def __init__(self, tree, scrollbar, source=None, buffer_rows=20):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.source = source or ListSource([])
+        self.buffer_rows = buffer_rows
+        self.top = 0
+        self.visible_rows = 20
+        self.window = []
+        self.selected_ids = set()
+
+        self.scrollbar.config(command=self.yview)
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        self.tree.bind('<Button-1>', self._on_click)
+        self.tree.bind('<Up>', lambda e: self._on_arrow(e, -1))
+        self.tree.bind('<Down>', lambda e: self._on_arrow(e, 1))
+        self.tree.bind('<Prior>', lambda e: self._scroll_by(-self.visible_rows))
+        self.tree.bind('<Next>', lambda e: self._scroll_by(self.visible_rows))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+
+    def set_source(self, source):
+        """Show a different row source, starting from the top"""
+        self.source = source
+        self.top = 0
+        self.selected_ids.clear()
+        self.render()
+
+    def refresh(self):
+        """Re-read the current source, keeping the scroll position"""
+        self.source.invalidate()
+        self.render()
+
+    def count(self):
+        """Return the number of rows in the current source"""
+        return self.source.count()
+
+    def insert_student(self, student):
+        """Show a newly added student without reloading the table"""
+        self.source.insert(student)
+        self.render()
+
+    def update_student(self, old, new):
+        """Show an edited student without reloading the table"""
+        self.source.update(old, new)
+        if old.student_id in self.selected_ids:
+            self.selected_ids.discard(old.student_id)
+            self.selected_ids.add(new.student_id)
+        self.render()
+
+    def remove_student(self, student):
+        """Drop a deleted student without reloading the table"""
+        self.source.remove(student)
+        self.selected_ids.discard(student.student_id)
+        self.render()
+
+    def apply_changes(self, updated=(), removed=()):
+        """Show a batch of edited and deleted students with a single render"""
+        self.source.apply(updated, removed)
+        self.selected_ids.difference_update(s.student_id for s in removed)
+        self.render()
+
+    def select_all(self):
+        """Select every row of the source, including rows not on screen"""
+        self.selected_ids = set(self.source.student_ids())
+        self.render()
+
+    def selected_students(self):
+        """Return the selected students that are currently loaded"""
+        return [s for s in self.window if s.student_id in self.selected_ids]
+
+    def selected_student(self):
+        """Return the first selected student, or None"""
+        selected = self.selected_students()
+        return selected[0] if selected else None
+
+    def render(self):
+        """Bring the Treeview items in line with the current window"""
+        count = self.source.count()
+        self.top = max(0, min(self.top, count - self.visible_rows))
+        # Prefetch a buffer below the window so small scrolls hit the cache
+        rows = self.source.rows(self.top, self.visible_rows + self.buffer_rows)
+        shown = {s.student_id: row_values(s) for s in self.window}
+        self.window = rows[:self.visible_rows]
+
+        # Only touch the items that were added, removed, moved or changed
+        window_ids = {s.student_id for s in self.window}
+        stale = [iid for iid in self.tree.get_children() if iid not in window_ids]
+        if stale:
+            self.tree.delete(*stale)
+        for index, student in enumerate(self.window):
+            values = row_values(student)
+            iid = student.student_id
+            if iid not in shown:
+                self.tree.insert('', index, iid=iid, values=values)
+                continue
+            if self.tree.index(iid) != index:
+                self.tree.move(iid, '', index)
+            if shown[iid] != values:
+                self.tree.item(iid, values=values)
+
+        visible_selection = [s.student_id for s in self.window
+                             if s.student_id in self.selected_ids]
+        if visible_selection:
+            self.tree.selection_set(visible_selection)
+
+        if count:
+            self.scrollbar.set(self.top / count,
+                               min(1.0, (self.top + self.visible_rows) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Scrollbar command: handles 'moveto' and 'scroll' requests"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.source.count())
+            self.render()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self._scroll_by(amount)
+
+    def _scroll_by(self, amount):
+        self.top += amount
+        self.render()
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, event, direction):
+        """Scroll instead of stopping when the focus is on the first/last row"""
+        if not event.state & EXTEND_SELECTION:
+            # Moving the focus selects only the focused row, wherever the rest were
+            self.selected_ids.clear()
+        children = self.tree.get_children()
+        if not children:
+            return None
+        edge = children[0] if direction < 0 else children[-1]
+        if self.tree.focus() != edge:
+            return None
+        self._scroll_by(direction)
+        children = self.tree.get_children()
+        if children:
+            edge = children[0] if direction < 0 else children[-1]
+            self.tree.focus(edge)
+            self.tree.selection_set(edge)
+        return 'break'
+
+    def _on_click(self, event):
+        """A plain click on a row replaces the whole selection, not just its visible part"""
+        iid = self.tree.identify_row(event.y)
+        if iid and not event.state & EXTEND_SELECTION:
+            self.selected_ids = {iid}
+
+    def _on_select(self, event):
+        visible = {s.student_id for s in self.window}
+        self.selected_ids -= visible
+        self.selected_ids.update(self.tree.selection())
+
+    def _on_configure(self, event):
+        style = ttk.Style()
+        row_height = style.lookup('Treeview', 'rowheight')
+        try:
+            row_height = int(row_height)
+        except (TypeError, ValueError):
+            row_height = tkfont.nametofont('TkDefaultFont').metrics('linespace') + 4
+        # One row's worth of space is taken by the headings
+        visible_rows = max(1, event.height // max(row_height, 1) - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
@@ -0,0 +1,54 @@
+"""Shared fixtures; the application modules live in the repository root"""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import Database  # noqa: E402
+from student import Student  # noqa: E402
+
+FIRST_NAMES = ('James', 'Mary', 'Ahmed', 'Wei', 'Priya', 'Carlos', 'Anne Marie', 'Zoë')
+LAST_NAMES = ('Smith', 'Garcia', 'Khan', 'Chen', 'Okafor', 'van der Berg')
+GRADES = ('Grade 9', 'Grade 10', 'Grade 11', 'Grade 12', '')
+DOMAINS = ('gmail.com', 'School.edu', 'outlook.com')
+
+
+def make_student(rng, number):
+    """A random student; some fields are missing and some emails are upper case"""
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    email = None
+    if rng.random() < 0.9:
+        email = f"{first}.{last}{number}@{rng.choice(DOMAINS)}".replace(' ', '')
+        if rng.random() < 0.2:
+            email = email.upper()
+    return Student(f"S{number:07d}", f"{first} {last}",
+                   rng.randint(12, 20) if rng.random() < 0.95 else None,
+                   rng.choice(GRADES) or None, email,
+                   f"555-{rng.randint(0, 9999):04d}" if rng.random() < 0.9 else None)
+
+
+def make_students(count, seed=0, start=0):
+    """count reproducible students numbered from start"""
+    rng = random.Random(seed)
+    return [make_student(rng, number) for number in range(start, start + count)]
+
+
+@pytest.fixture
+def open_db(tmp_path):
+    """Open Databases under tmp_path, with the query cache off, closing them afterwards"""
+    opened = []
+
+    def open_db(name='students.db', **options):
+        options.setdefault('query_cache_bytes', 0)
+        db = Database(str(tmp_path / name), **options)
+        opened.append(db)
+        return db
+
+    yield open_db
+    for db in opened:
+        db.close()
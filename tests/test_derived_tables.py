@@ -0,0 +1,122 @@
+"""Trigger-maintained tables must match a recomputation from students"""
+import random
+from collections import Counter
+
+import pytest
+
+import sync
+from conftest import make_student, make_students
+from fuzzy import name_words, word_trigrams
+
+ROSTER = 300
+
+
+@pytest.fixture
+def roster(open_db, tmp_path):
+    """Open a database with ROSTER students and an archive attached"""
+    def roster(**options):
+        db = open_db(archive_name=str(tmp_path / 'archive.db'), **options)
+        db.bulk_add_students(make_students(ROSTER))
+        return db
+    return roster
+
+
+def mutate(db, rng):
+    """Run every kind of write the application makes"""
+    db.bulk_add_students(make_students(50, seed=1, start=ROSTER - 20), on_conflict='replace')
+    for _ in range(100):
+        student_id = f"S{rng.randrange(ROSTER + 50):07d}"
+        action = rng.random()
+        if action < 0.4:
+            # One field at a time, so a trigger missing a column is caught
+            field, value = rng.choice([
+                ('age', rng.randint(10, 25)),
+                ('grade', rng.choice(['Grade 9', 'Grade 12', 'Graduate'])),
+                ('email', rng.choice([f"{student_id}@Example.org", 'no-at-sign'])),
+                ('name', rng.choice(['Mary Smith', 'Mary  Jane', ' Renée DUBOIS '])),
+            ])
+            db.update_student(student_id, **{field: value})
+        elif action < 0.6:
+            db.delete_student(student_id)
+        else:
+            db.add_student(make_student(rng, rng.randrange(ROSTER + 100)))
+    ids = [f"S{i:07d}" for i in rng.sample(range(ROSTER), 40)]
+    db.bulk_update(ids[:20], grade='Grade 11', age=13)
+    db.bulk_delete(ids[20:30])
+    with db.write_behind(max_delay=0) as queue:
+        for student_id in ids[30:]:
+            queue.update_student(student_id, name='Queued Name')
+        queue.add_student(make_student(rng, ROSTER + 500))
+    if db.archive_name is not None:
+        archived = db.query(grades=['Grade 9']).student_ids()
+        db.archive_students(archived)
+        db.restore_students(archived[::2])
+
+
+def recomputed_statistics(db):
+    db.summary_enabled = False
+    try:
+        return db._compute_statistics()
+    finally:
+        db.summary_enabled = True
+
+
+def assert_summary_current(db):
+    assert db.summary_enabled
+    summary = db._compute_statistics()
+    expected = recomputed_statistics(db)
+    assert summary.pop('average_age') == pytest.approx(expected.pop('average_age'))
+    assert summary == expected
+
+
+def test_summary_follows_every_write(roster):
+    db = roster(materialized_stats=True)
+    assert_summary_current(db)
+    mutate(db, random.Random(5))
+    assert_summary_current(db)
+
+
+def test_summary_follows_synced_changes(roster, tmp_path, open_db):
+    db = roster(materialized_stats=True)
+    sync.clone(db, str(tmp_path / 'replica.db'))
+    replica = open_db('replica.db')
+    mutate(replica, random.Random(6))
+    sync.sync(db, replica)
+    assert_summary_current(db)
+
+
+def test_summary_built_on_existing_rows(roster):
+    db = roster()
+    mutate(db, random.Random(7))
+    db.create_summary_table()
+    db.summary_enabled = db._summary_is_current()
+    assert_summary_current(db)
+
+
+def table(db, name):
+    return set(db.conn.execute(f'SELECT * FROM {name}'))
+
+
+def assert_fuzzy_index_current(db):
+    names = Counter(row[0] for row in db.conn.execute('SELECT name FROM students'))
+    words = {(word, name) for name in names for word in name_words(name)}
+    vocabulary = Counter(word for word, _ in words)
+    assert table(db, 'fuzzy_names') == set(names.items())
+    assert table(db, 'name_words') == words
+    assert table(db, 'name_vocabulary') == set(vocabulary.items())
+    assert table(db, 'vocabulary_trigrams') == {(trigram, word) for word in vocabulary
+                                                for trigram in word_trigrams(word)}
+
+
+def test_fuzzy_index_follows_every_write(roster):
+    db = roster(fuzzy_index=True)
+    assert_fuzzy_index_current(db)
+    mutate(db, random.Random(8))
+    assert_fuzzy_index_current(db)
+
+
+def test_fuzzy_index_built_on_existing_rows(roster):
+    db = roster()
+    mutate(db, random.Random(9))
+    db.create_fuzzy_index()
+    assert_fuzzy_index_current(db)
@@ -0,0 +1,46 @@
+"""The hot queries must stay index seeks (see migrations.HOT_QUERIES)"""
+from conftest import make_students
+from migrations import MIGRATIONS, check_query_plans, is_full_scan, schema_version
+
+
+def analyzed(open_db, rows=3000):
+    db = open_db()
+    db.bulk_add_students(make_students(rows))
+    db.conn.execute('ANALYZE')
+    db.conn.commit()
+    return db
+
+
+def test_migrations_reach_the_latest_version(open_db):
+    db = open_db()
+    assert schema_version(db.conn) == MIGRATIONS[-1][0]
+
+
+def test_hot_queries_use_indexes(open_db):
+    db = analyzed(open_db)
+    with db.reader() as conn:
+        assert check_query_plans(conn) == []
+
+
+def test_dropped_index_is_reported(open_db):
+    db = analyzed(open_db)
+    db.conn.execute('DROP INDEX idx_students_name_id')
+    db.conn.commit()
+    with db.reader() as conn:
+        problems = dict(check_query_plans(conn))
+    assert 'first page in name order' in problems
+
+
+def test_is_full_scan():
+    assert is_full_scan('SCAN students')
+    assert is_full_scan('USE TEMP B-TREE FOR ORDER BY')
+    assert not is_full_scan('SCAN students USING INDEX idx_students_name_id')
+    assert not is_full_scan('SEARCH students USING INDEX idx_students_email_nocase (email=?)')
+
+
+def test_check_plans_command(open_db, capsys):
+    import cli
+
+    db = analyzed(open_db)
+    assert cli.main(['--db', db.db_name, 'check-plans']) == 0
+    assert 'No hot query scans' in capsys.readouterr().out
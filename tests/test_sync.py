@@ -0,0 +1,96 @@
+"""Delta sync: replicas converge and the change log stays bounded"""
+import random
+import sqlite3
+import time
+
+import pytest
+
+import sync
+from conftest import make_student, make_students
+
+ROSTER = 500
+
+
+@pytest.fixture
+def replicas(open_db, tmp_path):
+    """A primary with ROSTER students and two clones of it"""
+    primary = open_db('a.db')
+    primary.bulk_add_students(make_students(ROSTER))
+    sync.clone(primary, str(tmp_path / 'b.db'))
+    sync.clone(primary, str(tmp_path / 'c.db'))
+    return primary, open_db('b.db'), open_db('c.db')
+
+
+def rows(db):
+    return db.conn.execute('SELECT * FROM students ORDER BY student_id').fetchall()
+
+
+def log_size(db):
+    return db.conn.execute('SELECT COUNT(*) FROM student_changes').fetchone()[0]
+
+
+def edit_randomly(db, rng, edits):
+    for _ in range(edits):
+        student_id = f"S{rng.randrange(ROSTER + 50):07d}"
+        action = rng.random()
+        if action < 0.7:
+            db.update_student(student_id, age=rng.randint(12, 20), grade=f"Grade {rng.randint(9, 12)}")
+        elif action < 0.85:
+            db.delete_student(student_id)
+        else:
+            db.add_student(make_student(rng, int(student_id[1:])))
+
+
+def test_ring_converges_and_log_stays_bounded(replicas):
+    a, b, c = replicas
+    rng = random.Random(7)
+    for _ in range(8):
+        for db in replicas:
+            edit_randomly(db, rng, 30)
+        sync.sync(b, c)
+        sync.sync(c, a)
+        sync.sync(a, b)
+        sync.sync(b, c)
+        assert rows(a) == rows(b) == rows(c)
+    # About one entry per student, not one per edit ever made
+    for db in replicas:
+        assert log_size(db) <= ROSTER + 50
+
+
+def test_deletes_propagate(replicas):
+    a, b, _ = replicas
+    a.delete_student('S0000001')
+    result = sync.sync(b, a)
+    assert 'S0000001' in result['pulled']['applied']
+    assert b.get_student('S0000001') is None
+
+
+@pytest.mark.parametrize('policy, winner', [('lww', 'remote'), ('local', 'local'),
+                                            ('remote', 'remote')])
+def test_conflict_policies(replicas, policy, winner):
+    a, b, _ = replicas
+    b.update_student('S0000002', name='Local Edit')
+    time.sleep(0.01)
+    a.update_student('S0000002', name='Remote Edit')
+    sync.sync(b, a, policy=policy)
+    expected = 'Local Edit' if winner == 'local' else 'Remote Edit'
+    assert a.get_student('S0000002').name == b.get_student('S0000002').name == expected
+
+
+def test_pruned_log_needs_a_clone(open_db, tmp_path):
+    primary = open_db('a.db')
+    primary.bulk_add_students(make_students(10))
+    stranger = open_db('b.db')
+    sync.prune_changes(primary, through=10)
+    with pytest.raises(sync.SyncError):
+        sync.sync(stranger, primary)
+
+
+def test_same_replica_id_is_refused(open_db, tmp_path):
+    primary = open_db('a.db')
+    copy = sqlite3.connect(str(tmp_path / 'copy.db'))
+    with primary.reader() as conn:
+        conn.backup(copy)
+    copy.close()
+    with pytest.raises(sync.SyncError):
+        sync.sync(primary, open_db('copy.db'))
@@ -0,0 +1,104 @@
+"""WriteBehindQueue: coalescing, equivalence with direct writes and crash safety"""
+import os
+import random
+import sys
+
+import pytest
+
+from conftest import ROOT, make_student, make_students
+from student import Student
+from write_queue import WriteBehindQueue
+
+ROSTER = 200
+
+
+def rows(db):
+    return db.conn.execute('SELECT * FROM students ORDER BY student_id').fetchall()
+
+
+def change_count(db):
+    return db.conn.execute('SELECT COUNT(*) FROM student_changes').fetchone()[0]
+
+
+def insert(student_id, name='New'):
+    return ('insert', Student(student_id, name, 15, 'Grade 10', None, None).to_dict(), None)
+
+
+@pytest.mark.parametrize('current, new, expected', [
+    (None, ('update', None, {'age': 3}), ('update', None, {'age': 3})),
+    (('update', None, {'age': 3}), ('update', None, {'name': 'B'}),
+     ('update', None, {'age': 3, 'name': 'B'})),
+    (('update', None, {'age': 3}), ('delete', None, None), ('delete', None, None)),
+    (('delete', None, None), ('update', None, {'age': 3}), ('delete', None, None)),
+    (insert('S1'), ('update', None, {'age': 3}),
+     ('upsert', {**insert('S1')[1], 'age': 3}, {'age': 3})),
+    (('delete', None, None), insert('S1'), ('replace', insert('S1')[1], None)),
+    (('update', None, {'age': 3}), insert('S1'), ('upsert', insert('S1')[1], {'age': 3})),
+    (insert('S1'), insert('S1', 'Other'), None),
+])
+def test_coalesce(current, new, expected):
+    assert WriteBehindQueue._coalesce(current, new) == expected
+
+
+def test_repeated_edits_flush_as_one_change(open_db):
+    db = open_db()
+    db.bulk_add_students(make_students(ROSTER))
+    before = change_count(db)
+    queue = db.write_behind(max_delay=0)
+    for age in range(100):
+        queue.update_student('S0000003', age=age)
+    queue.update_student('S0000003', name='Renamed')
+    assert queue.pending_count == 1
+    assert queue.flush() == {'applied': 1, 'rejected': []}
+    assert change_count(db) == before + 1
+    student = db.get_student('S0000003')
+    assert (student.name, student.age) == ('Renamed', 99)
+
+
+def test_queue_matches_direct_writes(open_db):
+    direct = open_db('direct.db')
+    queued = open_db('queued.db')
+    for db in (direct, queued):
+        db.bulk_add_students(make_students(ROSTER))
+
+    rng = random.Random(3)
+    queue = queued.write_behind(max_pending=10 ** 6, max_delay=0)
+    for step in range(2000):
+        student_id = f"S{rng.randrange(ROSTER + 20):07d}"
+        action = rng.random()
+        if action < 0.5:
+            fields = {'age': rng.randint(12, 20)} if rng.random() < 0.5 else {'name': f"N{step}"}
+            direct.update_student(student_id, **fields)
+            queue.update_student(student_id, **fields)
+        elif action < 0.75:
+            direct.delete_student(student_id)
+            queue.delete_student(student_id)
+        else:
+            student = make_student(rng, int(student_id[1:]))
+            direct.add_student(student)
+            queue.add_student(student)
+        if step % 250 == 0:
+            queue.flush()
+    queue.close()
+    assert rows(queued) == rows(direct)
+
+
+def test_context_manager_discards_on_error(open_db):
+    db = open_db()
+    db.bulk_add_students(make_students(5))
+    with pytest.raises(RuntimeError):
+        with db.write_behind(max_delay=0) as queue:
+            queue.update_student('S0000001', name='Lost')
+            raise RuntimeError
+    assert db.get_student('S0000001').name != 'Lost'
+
+
+def test_acknowledged_flushes_survive_a_kill(tmp_path):
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    import write_queue_benchmark
+    from roster import build_database
+
+    path = str(tmp_path / 'crash.db')
+    build_database(path, write_queue_benchmark.CRASH_BATCH).close()
+    outcome = write_queue_benchmark.crash_check(path)
+    assert outcome.startswith('ok'), outcome
@@ -0,0 +1,206 @@
+import threading
+import time
+from database import STUDENT_COLUMNS, UPDATABLE_FIELDS
+from student import Student, STUDENT_FIELDS
+
+
+class WriteBehindQueue:
+    """Coalesces student mutations and commits them in groups
+
+    Mutations are queued instead of committed one by one. Several mutations
+    of the same student collapse into a single operation, and the queue is
+    flushed in one transaction once max_pending students have changes or the
+    oldest change is max_delay seconds old (or on flush()/close()).
+
+    Guarantees:
+      * A flush is atomic: every queued change commits, or none does and the
+        changes stay queued so the flush can be retried.
+      * Once flush() returns, the changes are committed. They are as durable
+        as the database's synchronous setting makes them.
+      * Changes still queued when the process dies are lost. Call flush()
+        before acknowledging anything that must survive a crash.
+      * Used as a context manager, the queue flushes on a clean exit and
+        discards its pending changes if the block raises.
+    """
+
+    def __init__(self, db, max_pending=500, max_delay=0.5):
+        self.db = db
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.last_error = None
+        self._pending = {}  # student_id -> (kind, insert fields, update fields)
+        self._oldest = None
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._timer = None
+        if max_delay:
+            self._timer = threading.Thread(target=self._flush_periodically,
+                                           name="write-behind", daemon=True)
+            self._timer.start()
+
+    @property
+    def pending_count(self):
+        """Number of students with queued changes"""
+        return len(self._pending)
+
+    def add_student(self, student):
+        """Queue an insert; returns False if it would be rejected when flushed"""
+        if not student.student_id or not student.name:
+            return False
+        fields = dict(zip(STUDENT_FIELDS, student.to_tuple()))
+        return self._queue(student.student_id, 'insert', fields, None)
+
+    def update_student(self, student_id, **kwargs):
+        """Queue an update of the given fields (None values are ignored, as in Database)"""
+        unknown = set(kwargs) - set(UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot update {', '.join(sorted(unknown))}")
+        fields = {key: value for key, value in kwargs.items() if value is not None}
+        if not fields:
+            return False
+        return self._queue(student_id, 'update', None, fields)
+
+    def delete_student(self, student_id):
+        """Queue a delete"""
+        return self._queue(student_id, 'delete', None, None)
+
+    def _queue(self, student_id, kind, insert, update):
+        with self._lock:
+            current = self._pending.get(student_id)
+            merged = self._coalesce(current, (kind, insert, update))
+            if merged is None:
+                return False
+            self._pending[student_id] = merged
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+        return True
+
+    @staticmethod
+    def _coalesce(current, new):
+        """Fold a new mutation into the one already queued for the same student
+
+        Returns None when the new mutation would fail anyway, i.e. an insert
+        of a student that the queued change already creates.
+        """
+        if current is None:
+            return new
+        kind, insert, update = current
+        new_kind, new_insert, new_update = new
+
+        if new_kind == 'delete':
+            return new
+        if new_kind == 'update':
+            if kind == 'delete':
+                return current  # Updating a deleted row changes nothing
+            if kind == 'replace':
+                return ('replace', {**insert, **new_update}, None)
+            if kind == 'insert':
+                # The row may already exist, in which case the insert fails
+                # and only the update applies
+                return ('upsert', {**insert, **new_update}, new_update)
+            if kind == 'update':
+                return ('update', None, {**update, **new_update})
+            return ('upsert', {**insert, **new_update}, {**update, **new_update})
+        # new_kind == 'insert'
+        if kind == 'delete':
+            return ('replace', new_insert, None)
+        if kind == 'update':
+            # Applies the update if the row exists, else inserts
+            return ('upsert', new_insert, update)
+        return None
+
+    def flush(self):
+        """Commit every queued change in one transaction
+
+        Returns a dict with the number of students changed and (student_id,
+        reason) pairs for inserts that were rejected. New changes wait while
+        a flush is running.
+        """
+        with self._lock:
+            if not self._pending:
+                return {'applied': 0, 'rejected': []}
+            # If this raises nothing was committed and the changes stay queued
+            result = self._apply(self._pending)
+            changed = list(self._pending)
+            self._pending = {}
+            self._oldest = None
+        self.db._invalidate(changed)
+        return result
+
+    def _apply(self, pending):
+        db = self.db
+        groups = {'insert': [], 'update': {}, 'delete': [], 'replace': [], 'upsert': {}}
+        for student_id, (kind, insert, update) in pending.items():
+            if kind in ('update', 'upsert'):
+                key = tuple(sorted(update))
+                groups[kind].setdefault(key, []).append((student_id, insert, update))
+            elif kind == 'delete':
+                groups['delete'].append((student_id,))
+            else:
+                groups[kind].append(Student(**insert))
+
+        placeholders = ', '.join('?' * len(STUDENT_FIELDS))
+        with db.write_lock, db.conn:
+            cursor = db.conn.cursor()
+            accepted, rejected = db._screen_batch(groups['insert'], 'skip')
+            replace_accepted, replace_rejected = db._screen_batch(groups['replace'], 'fail')
+            rejected += replace_rejected
+
+            cursor.executemany('DELETE FROM students WHERE student_id = ?',
+                               groups['delete'] + [(s.student_id,) for s in replace_accepted])
+            cursor.executemany(f'INSERT INTO students ({STUDENT_COLUMNS}) VALUES ({placeholders})',
+                               [s.to_tuple() for s in accepted + replace_accepted])
+            for fields, rows in groups['update'].items():
+                assignments = ', '.join(f"{field} = ?" for field in fields)
+                cursor.executemany(
+                    f'UPDATE students SET {assignments} WHERE student_id = ?',
+                    [[update[field] for field in fields] + [student_id]
+                     for student_id, _, update in rows])
+            for fields, rows in groups['upsert'].items():
+                assignments = ', '.join(f"{field} = ?" for field in fields)
+                cursor.executemany(
+                    f'INSERT INTO students ({STUDENT_COLUMNS}) VALUES ({placeholders}) '
+                    f'ON CONFLICT(student_id) DO UPDATE SET {assignments}',
+                    [[insert[field] for field in STUDENT_FIELDS] + [update[field] for field in fields]
+                     for _, insert, update in rows])
+
+        return {'applied': len(pending) - len(rejected),
+                'rejected': [(s.student_id, reason) for s, reason in rejected]}
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.max_delay / 4):
+            oldest = self._oldest
+            if oldest is not None and time.monotonic() - oldest >= self.max_delay:
+                try:
+                    self.flush()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+
+    def close(self):
+        """Flush what is queued and stop the background flusher"""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        return self.flush()
+
+    def discard(self):
+        """Drop every queued change and stop the background flusher"""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        with self._lock:
+            self._pending = {}
+            self._oldest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()